@@ -6,7 +6,7 @@ Endpoints FastAPI organisés par domaine
 from fastapi import APIRouter
 
 # Import des routers individuels
-from app.api import auth, movies, ratings, recommendations, music, music_recommendations, books
+from app.api import auth, movies, ratings, recommendations, music, music_recommendations, books, autocomplete
 
 # Router principal qui regroupe tous les sous-routers
 api_router = APIRouter()
@@ -19,3 +19,4 @@ api_router.include_router(books.router, tags=["Books"])  # Pas de prefix - books
 api_router.include_router(ratings.router, prefix="/ratings", tags=["Ratings"])
 api_router.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
 api_router.include_router(music_recommendations.router, tags=["Music Recommendations"])  # Pas de prefix - router a déjà prefix="/music-recommendations"
+api_router.include_router(autocomplete.router, prefix="/autocomplete", tags=["Autocomplete"])
@@ -28,7 +28,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **email**: Email unique
     - **password**: Mot de passe (minimum 6 caractères)
     """
-    user = AuthService.create_user(
+    user = await AuthService.create_user(
         db=db,
         username=user_data.username,
         email=user_data.email,
@@ -49,7 +49,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     Retourne un token JWT Bearer à utiliser dans le header Authorization
     """
     # Authentifier l'utilisateur
-    user = AuthService.authenticate_user(db, credentials.email, credentials.password)
+    user = await AuthService.authenticate_user(db, credentials.email, credentials.password)
     
     if not user:
         raise HTTPException(
@@ -0,0 +1,46 @@
+"""
+Route d'autocomplétion (films, pistes, artistes, livres, auteurs)
+Répond depuis l'index de préfixes en mémoire, sans appel aux API externes
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.autocomplete import autocomplete_index, KINDS, TOP_SIZE
+
+
+router = APIRouter()
+
+
+@router.get("", response_model=dict)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100, description="Début de saisie"),
+    types: Optional[str] = Query(None, description="Types séparés par virgule (movie,track,artist,book,author)"),
+    limit: int = Query(10, ge=1, le=TOP_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Complétions de la saisie, par popularité décroissante
+    
+    - **q**: Début de saisie (accents et casse ignorés)
+    - **types**: Types d'entrées (défaut: tous)
+    - **limit**: Nombre de complétions (1-20)
+    """
+    kinds = KINDS
+    if types:
+        kinds = tuple(dict.fromkeys(kind.strip() for kind in types.split(",") if kind.strip()))
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Types inconnus: {', '.join(unknown)}"
+            )
+    
+    autocomplete_index.ensure_loaded(db)
+    
+    return {
+        "query": q,
+        "results": autocomplete_index.complete(q, kinds, limit)
+    }
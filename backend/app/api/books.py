@@ -2,10 +2,12 @@
 Routes API pour les livres (Google Books)
 """
 
-from typing import Optional, List
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, List
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
+from app.config import settings
 from app.dependencies import get_db, get_current_user
 from app.models.user import User
 from app.models.book import Book, BookRating
@@ -17,6 +19,8 @@ from app.schemas.book import (
     BookRatingResponse
 )
 from app.services.google_books_service import GoogleBooksService
+from app.services import catalog_search
+from app.services.book_recommendation_engine import BookRecommendationEngine
 
 router = APIRouter(prefix="/books", tags=["Books"])
 books_service = GoogleBooksService()
@@ -27,6 +31,7 @@ async def search_books(
     query: str,
     limit: int = Query(20, ge=1, le=40),
     offset: int = Query(0, ge=0),
+    mode: Optional[str] = Query(None, pattern=catalog_search.SEARCH_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
@@ -36,24 +41,20 @@ async def search_books(
         query: Terme de recherche
         limit: Nombre de résultats (1-40)
         offset: Index de départ
+        mode: upstream, local_first (catalogue local d'abord) ou local
         db: Session de base de données
     """
+    mode = catalog_search.resolve_mode(mode)
+    if mode != "upstream":
+        local = catalog_search.search_books(db, query, limit, offset)
+        if catalog_search.is_sufficient(mode, local, limit):
+            return {"items": local.items, "total_items": local.total}
+    
     try:
         search_results = await books_service.search_books(query, limit, offset)
         
-        # Convertir les résultats en modèles de base de données
-        books = []
-        for book_data in search_results.get("items", []):
-            try:
-                # Rollback en cas d'erreur précédente pour éviter "transaction is aborted"
-                if db.is_active and db.get_transaction() and db.get_transaction().is_active:
-                    db.rollback()
-                
-                book = books_service.save_book_to_db(db, book_data)
-                books.append(book)
-            except Exception as e:
-                db.rollback()  # Rollback en cas d'erreur
-                continue
+        # Sauvegarder la page en une seule requête (volumes invalides écartés)
+        books = books_service.save_books_bulk(db, search_results.get("items", []))
         
         return {
             "items": books,
@@ -90,6 +91,24 @@ async def get_book_details(
         )
 
 
+async def _search_limited(
+    semaphore: asyncio.Semaphore,
+    search: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Lance une recherche Google Books en respectant la limite de concurrence
+    
+    Args:
+        semaphore: Sémaphore bornant le nombre d'appels simultanés
+        search: Fonction lançant la recherche
+    
+    Returns:
+        Résultats de recherche Google Books
+    """
+    async with semaphore:
+        return await search()
+
+
 @router.get("/recommendations", response_model=List[BookResponse])
 async def get_recommendations(
     limit: int = Query(20, ge=1, le=40),
@@ -99,12 +118,20 @@ async def get_recommendations(
     """
     Obtient des recommandations de livres basées sur les notes de l'utilisateur
     
+    Les recommandations viennent d'abord du moteur local (voisins
+    précalculés) ; Google Books ne sert qu'à compléter (cold start).
+    
     Args:
         limit: Nombre de recommandations
         current_user: Utilisateur actuel
         db: Session de base de données
     """
     try:
+        # Recommandations locales (filtrage collaboratif + contenu)
+        books = BookRecommendationEngine(db).recommend(current_user.id, limit)
+        if len(books) >= limit:
+            return books
+        
         # Récupérer les livres les mieux notés (≥4 étoiles)
         top_ratings = db.query(BookRating).options(
             joinedload(BookRating.book)
@@ -113,10 +140,12 @@ async def get_recommendations(
             BookRating.rating >= 4
         ).order_by(BookRating.rating.desc()).limit(5).all()
         
-        books = []
+        # Recherches par ordre de priorité : auteurs, catégories, puis
+        # livres populaires (lancés d'emblée pour compléter si nécessaire)
+        searches = []
         
         if top_ratings:
-            # Extraire les auteurs des livres les mieux notés
+            # Extraire les auteurs et catégories des livres les mieux notés
             authors = []
             categories = []
             
@@ -126,82 +155,75 @@ async def get_recommendations(
                 if rating.book.categories:
                     categories.extend(rating.book.categories)
             
-            # Dédupliquer
-            authors = list(set(authors))[:3]
-            categories = list(set(categories))[:3]
+            # Dédupliquer en conservant l'ordre
+            authors = list(dict.fromkeys(authors))[:3]
+            categories = list(dict.fromkeys(categories))[:3]
             
-            # Rechercher des livres similaires par auteur
-            for author in authors:
-                if len(books) >= limit:
+            searches.extend(
+                (f"auteur {author}", lambda author=author: books_service.search_by_author(author, limit=5))
+                for author in authors
+            )
+            searches.extend(
+                (f"catégorie {category}", lambda category=category: books_service.search_by_category(category, limit=5))
+                for category in categories
+            )
+        
+        popular_query = "bestseller fiction"  # Livres populaires
+        searches.append(
+            ("populaires", lambda: books_service.search_books(popular_query, limit=limit))
+        )
+        
+        # Livres déjà notés (une seule requête au lieu d'un parcours par candidat)
+        rated_ids = {
+            google_id for (google_id,) in db.query(Book.google_books_id).join(
+                BookRating, BookRating.book_id == Book.id
+            ).filter(BookRating.user_id == current_user.id).all()
+        }
+        
+        semaphore = asyncio.Semaphore(settings.google_books_max_concurrency)
+        tasks = [
+            asyncio.create_task(_search_limited(semaphore, search))
+            for _, search in searches
+        ]
+        
+        seen = {book.google_books_id for book in books}
+        selected = []  # Volumes Google Books retenus, sauvegardés en une fois
+        
+        try:
+            # Fusionner dans l'ordre de priorité (déterministe) et s'arrêter
+            # dès que `limit` livres distincts sont disponibles
+            for (label, _), task in zip(searches, tasks):
+                if len(books) + len(selected) >= limit:
                     break
-                    
-                try:
-                    search_results = await books_service.search_by_author(author, limit=5)
-                    
-                    for book_data in search_results.get("items", []):
-                        if len(books) >= limit:
-                            break
-                        
-                        google_id = book_data["id"]
-                        
-                        # Éviter les doublons et les livres déjà notés
-                        already_rated = any(r.book.google_books_id == google_id for r in top_ratings)
-                        already_in_list = any(b.google_books_id == google_id for b in books)
-                        
-                        if not already_rated and not already_in_list:
-                            book = books_service.save_book_to_db(db, book_data)
-                            books.append(book)
                 
-                except Exception as e:
-                    print(f"[BOOKS] Erreur recherche auteur {author}: {str(e)}")
-                    continue
-            
-            # Compléter avec des livres par catégorie
-            for category in categories:
-                if len(books) >= limit:
-                    break
-                    
                 try:
-                    search_results = await books_service.search_by_category(category, limit=5)
-                    
-                    for book_data in search_results.get("items", []):
-                        if len(books) >= limit:
-                            break
-                        
-                        google_id = book_data["id"]
-                        
-                        already_rated = any(r.book.google_books_id == google_id for r in top_ratings)
-                        already_in_list = any(b.google_books_id == google_id for b in books)
-                        
-                        if not already_rated and not already_in_list:
-                            book = books_service.save_book_to_db(db, book_data)
-                            books.append(book)
-                
+                    search_results = await task
                 except Exception as e:
-                    print(f"[BOOKS] Erreur recherche catégorie {category}: {str(e)}")
+                    print(f"[BOOKS] Erreur recherche {label}: {str(e)}")
                     continue
-        
-        # Si pas assez de recommandations, rechercher des livres populaires
-        if len(books) < limit:
-            try:
-                popular_query = "bestseller fiction"  # Livres populaires
-                search_results = await books_service.search_books(popular_query, limit=limit - len(books))
                 
                 for book_data in search_results.get("items", []):
-                    if len(books) >= limit:
+                    if len(books) + len(selected) >= limit:
                         break
                     
-                    google_id = book_data["id"]
-                    already_in_list = any(b.google_books_id == google_id for b in books)
+                    # Volumes inexploitables écartés ici pour ne pas compter
+                    # dans `limit` des livres que la sauvegarde rejetterait
+                    google_id = books_service.valid_volume_id(book_data)
                     
-                    if not already_in_list:
-                        book = books_service.save_book_to_db(db, book_data)
-                        books.append(book)
-            
-            except Exception as e:
-                print(f"[BOOKS] Erreur recherche populaires: {str(e)}")
+                    # Éviter les doublons et les livres déjà notés
+                    if not google_id or google_id in seen or google_id in rated_ids:
+                        continue
+                    
+                    seen.add(google_id)
+                    selected.append(book_data)
+        finally:
+            # Les recherches devenues inutiles sont annulées ; une requête de
+            # test du disjoncteur ainsi annulée est libérée (voir CircuitCall)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
-        return books[:limit]
+        return books + books_service.save_books_bulk(db, selected)
         
     except Exception as e:
         raise HTTPException(
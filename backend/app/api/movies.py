@@ -10,20 +10,43 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.movie import MovieResponse, MovieDetail, GenreResponse, MovieSearchResponse
 from app.services.tmdb_service import TMDBService
+from app.services import catalog_search
+from app.services.genre_cache import genre_cache
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.movie import Movie, Genre
+from app.models.movie import Movie
 from app.models.rating import Rating
 
 
 router = APIRouter()
 tmdb_service = TMDBService()
 
+TMDB_PAGE_SIZE = 20  # Taille fixe des pages de résultats TMDB
+
+
+def _local_fallback(error: HTTPException, local_page: dict) -> dict:
+    """
+    Remplace une erreur TMDB par les résultats du catalogue local
+    
+    Args:
+        error: Erreur levée par le service TMDB
+        local_page: Page construite depuis la BDD
+    
+    Returns:
+        local_page si TMDB est indisponible (503) et le catalogue non vide
+    """
+    if error.status_code != status.HTTP_503_SERVICE_UNAVAILABLE or not local_page["results"]:
+        raise error
+    
+    print(f"[MOVIES] TMDB indisponible, catalogue local servi ({error.detail})")
+    return local_page
+
 
 @router.get("/search", response_model=dict)
 async def search_movies(
     query: str = Query(..., min_length=1, description="Terme de recherche"),
     page: int = Query(1, ge=1, description="Numéro de page"),
+    mode: Optional[str] = Query(None, pattern=catalog_search.SEARCH_MODE_PATTERN, description="upstream, local_first ou local"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -32,12 +55,28 @@ async def search_movies(
     
     - **query**: Terme de recherche (minimum 1 caractère)
     - **page**: Numéro de page (défaut: 1)
+    - **mode**: Catalogue local d'abord (local_first), local seul ou TMDB seul
     """
-    results = await tmdb_service.search_movies(query, page)
+    mode = catalog_search.resolve_mode(mode)
+    local_page = None
+    if mode != "upstream":
+        local = catalog_search.search_movies(
+            db, query, limit=TMDB_PAGE_SIZE, offset=(page - 1) * TMDB_PAGE_SIZE
+        )
+        if local is not None:
+            local_page = tmdb_service.local_search_page(local, page, per_page=TMDB_PAGE_SIZE)
+        if catalog_search.is_sufficient(mode, local, TMDB_PAGE_SIZE):
+            return local_page
+    
+    try:
+        results = await tmdb_service.search_movies(query, page)
+    except HTTPException as e:
+        if local_page is None:
+            raise
+        return _local_fallback(e, local_page)
     
     # Sauvegarder les films en BDD (optionnel, pour cache)
-    for movie_data in results.get("results", []):
-        tmdb_service.save_movie_to_db(db, movie_data)
+    tmdb_service.save_movies_bulk(db, results.get("results", []))
     
     return results
 
@@ -53,11 +92,13 @@ async def get_popular_movies(
     
     - **page**: Numéro de page (défaut: 1)
     """
-    results = await tmdb_service.get_popular_movies(page)
+    try:
+        results = await tmdb_service.get_popular_movies(page)
+    except HTTPException as e:
+        return _local_fallback(e, tmdb_service.get_local_movies(db, "popularity", page))
     
     # Sauvegarder en BDD (results est une liste)
-    for movie_data in results:
-        tmdb_service.save_movie_to_db(db, movie_data)
+    tmdb_service.save_movies_bulk(db, results)
     
     # Retourner le format attendu
     return {
@@ -77,10 +118,12 @@ async def get_top_rated_movies(
     """
     Récupère les films les mieux notés via TMDB
     """
-    results = await tmdb_service.get_top_rated_movies(page)
+    try:
+        results = await tmdb_service.get_top_rated_movies(page)
+    except HTTPException as e:
+        return _local_fallback(e, tmdb_service.get_local_movies(db, "vote_average", page))
     
-    for movie_data in results.get("results", []):
-        tmdb_service.save_movie_to_db(db, movie_data)
+    tmdb_service.save_movies_bulk(db, results.get("results", []))
     
     return results
 
@@ -94,10 +137,12 @@ async def get_now_playing_movies(
     """
     Récupère les films actuellement au cinéma via TMDB
     """
-    results = await tmdb_service.get_now_playing_movies(page)
+    try:
+        results = await tmdb_service.get_now_playing_movies(page)
+    except HTTPException as e:
+        return _local_fallback(e, tmdb_service.get_local_movies(db, "release_date", page))
     
-    for movie_data in results.get("results", []):
-        tmdb_service.save_movie_to_db(db, movie_data)
+    tmdb_service.save_movies_bulk(db, results.get("results", []))
     
     return results
 
@@ -130,8 +175,7 @@ async def discover_movies(
         year=year
     )
     
-    for movie_data in results.get("results", []):
-        tmdb_service.save_movie_to_db(db, movie_data)
+    tmdb_service.save_movies_bulk(db, results.get("results", []))
     
     return results
 
@@ -144,8 +188,10 @@ async def get_genres(
     """
     Récupère la liste de tous les genres
     """
-    genres = db.query(Genre).order_by(Genre.name).all()
-    return genres
+    return [
+        GenreResponse(id=genre_id, name=name)
+        for genre_id, name in genre_cache.all(db)
+    ]
 
 
 @router.get("/{movie_id}", response_model=dict)
@@ -161,11 +207,16 @@ async def get_movie_details(
     
     Retourne les infos du film + la note de l'utilisateur connecté si elle existe
     """
-    # Récupérer depuis TMDB
-    movie_data = await tmdb_service.get_movie_details(movie_id)
-    
-    # Sauvegarder en BDD
-    movie = tmdb_service.save_movie_to_db(db, movie_data)
+    # Récupérer depuis TMDB (ou depuis la BDD si TMDB est indisponible)
+    try:
+        movie_data = await tmdb_service.get_movie_details(movie_id)
+    except HTTPException as e:
+        movie_data = tmdb_service.get_local_movie_details(db, movie_id)
+        if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE or movie_data is None:
+            raise
+    else:
+        # Sauvegarder en BDD
+        tmdb_service.save_movie_to_db(db, movie_data)
     
     # Récupérer la note de l'utilisateur connecté
     user_rating = db.query(Rating).filter(
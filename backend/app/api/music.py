@@ -3,7 +3,7 @@ Routes API pour la musique (Spotify)
 """
 
 from typing import Optional, List
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.dependencies import get_db, get_current_user
@@ -17,6 +17,8 @@ from app.schemas.music import (
     MusicRatingResponse
 )
 from app.services.spotify_service import SpotifyService
+from app.services import catalog_search
+from app.services.music_recommendation_refresh import schedule_regeneration
 
 router = APIRouter(prefix="/music", tags=["Music"])
 spotify_service = SpotifyService()
@@ -27,6 +29,7 @@ async def search_music(
     query: str,
     limit: int = Query(20, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    mode: Optional[str] = Query(None, pattern=catalog_search.SEARCH_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
@@ -36,16 +39,20 @@ async def search_music(
         query: Terme de recherche
         limit: Nombre de résultats (1-50)
         offset: Index de départ
+        mode: upstream, local_first (catalogue local d'abord) ou local
         db: Session de base de données
     """
+    mode = catalog_search.resolve_mode(mode)
+    if mode != "upstream":
+        local = catalog_search.search_tracks(db, query, limit, offset)
+        if catalog_search.is_sufficient(mode, local, limit):
+            return {"items": local.items, "total": local.total, "limit": limit, "offset": offset}
+    
     try:
         search_results = await spotify_service.search_tracks(query, limit, offset)
         
-        # Convertir les résultats en modèles de base de données
-        tracks = []
-        for track_data in search_results["tracks"]["items"]:
-            track = spotify_service.save_track_to_db(db, track_data)
-            tracks.append(track)
+        # Convertir les résultats en modèles de base de données (une seule requête)
+        tracks = spotify_service.save_tracks_bulk(db, search_results["tracks"]["items"])
         
         return {
             "items": tracks,
@@ -115,7 +122,9 @@ async def get_recommendations(
             MusicRating.rating >= 4
         ).order_by(MusicRating.rating.desc()).limit(5).all()
         
-        tracks = []
+        # Pistes candidates (données Spotify), sauvegardées en une fois à la fin
+        candidates = {}
+        rated_spotify_ids = {rating.track.spotify_id for rating in top_ratings if rating.track}
         
         if top_ratings:
             # Extraire les artistes des pistes les mieux notées
@@ -133,28 +142,26 @@ async def get_recommendations(
                     for track_data in search_results["tracks"]["items"]:
                         # Éviter les doublons et les pistes déjà notées
                         track_spotify_id = track_data["id"]
-                        already_rated = any(r.track.spotify_id == track_spotify_id for r in top_ratings)
                         
-                        if not already_rated and track_spotify_id not in [t.spotify_id for t in tracks]:
-                            track = spotify_service.save_track_to_db(db, track_data)
-                            tracks.append(track)
+                        if track_spotify_id not in rated_spotify_ids and track_spotify_id not in candidates:
+                            candidates[track_spotify_id] = track_data
                             
-                            if len(tracks) >= limit:
+                            if len(candidates) >= limit:
                                 break
                 except Exception as e:
                     print(f"[RECOMMENDATIONS] Error searching for artist {artist}: {str(e)}")
                     continue
                 
-                if len(tracks) >= limit:
+                if len(candidates) >= limit:
                     break
         
         # Si pas assez de recommandations, compléter avec des nouveautés
-        if len(tracks) < limit:
+        if len(candidates) < limit:
             try:
-                releases = await spotify_service.get_new_releases(limit=limit - len(tracks), offset=0)
+                releases = await spotify_service.get_new_releases(limit=limit - len(candidates), offset=0)
                 for album in releases["albums"]["items"]:
-                    if album["id"] and len(tracks) < limit:
-                        track_data = {
+                    if album["id"] and len(candidates) < limit:
+                        candidates.setdefault(album["id"], {
                             "id": album["id"],
                             "name": album["name"],
                             "artists": album["artists"],
@@ -162,12 +169,12 @@ async def get_recommendations(
                             "preview_url": None,
                             "duration_ms": None,
                             "popularity": None
-                        }
-                        track = spotify_service.save_track_to_db(db, track_data)
-                        tracks.append(track)
+                        })
             except Exception as e:
                 print(f"[RECOMMENDATIONS] Error getting new releases: {str(e)}")
         
+        tracks = spotify_service.save_tracks_bulk(db, list(candidates.values()))
+        
         return tracks[:limit]
         
     except Exception as e:
@@ -195,11 +202,11 @@ async def get_new_releases(
         releases = await spotify_service.get_new_releases(limit, offset)
         
         # Sauvegarder et convertir en modèles de base de données
-        tracks = []
+        tracks_data = []
         for album in releases["albums"]["items"]:
             # Pour chaque album, on récupère la première piste
             if album["id"]:
-                track_data = {
+                tracks_data.append({
                     "id": album["id"],
                     "name": album["name"],
                     "artists": album["artists"],
@@ -207,11 +214,9 @@ async def get_new_releases(
                     "preview_url": None,  # Nécessiterait un appel API supplémentaire
                     "duration_ms": None,  # Nécessiterait un appel API supplémentaire
                     "popularity": None    # Nécessiterait un appel API supplémentaire
-                }
-                track = spotify_service.save_track_to_db(db, track_data)
-                tracks.append(track)
+                })
         
-        return tracks
+        return spotify_service.save_tracks_bulk(db, tracks_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -222,6 +227,7 @@ async def get_new_releases(
 @router.post("/ratings", response_model=MusicRatingResponse)
 async def rate_track(
     rating: MusicRatingCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -230,6 +236,7 @@ async def rate_track(
     
     Args:
         rating: Données de la note
+        background_tasks: Régénération des recommandations après la réponse
         current_user: Utilisateur actuel
         db: Session de base de données
     """
@@ -263,6 +270,7 @@ async def rate_track(
     db.add(db_rating)
     db.commit()
     db.refresh(db_rating)
+    schedule_regeneration(background_tasks, current_user.id)
     
     # Charger explicitement la relation track
     db.refresh(db_rating, ['track'])
@@ -274,6 +282,7 @@ async def rate_track(
 async def update_rating(
     rating_id: int,
     rating_update: MusicRatingUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -283,6 +292,7 @@ async def update_rating(
     Args:
         rating_id: ID de la note
         rating_update: Nouvelle note
+        background_tasks: Régénération des recommandations après la réponse
         current_user: Utilisateur actuel
         db: Session de base de données
     """
@@ -302,6 +312,7 @@ async def update_rating(
     db_rating.rating = rating_update.rating
     db.commit()
     db.refresh(db_rating)
+    schedule_regeneration(background_tasks, current_user.id)
     
     # Charger explicitement la relation track
     db.refresh(db_rating, ['track'])
@@ -312,6 +323,7 @@ async def update_rating(
 @router.delete("/ratings/{rating_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_rating(
     rating_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -320,6 +332,7 @@ async def delete_rating(
     
     Args:
         rating_id: ID de la note
+        background_tasks: Régénération des recommandations après la réponse
         current_user: Utilisateur actuel
         db: Session de base de données
     """
@@ -338,6 +351,7 @@ async def delete_rating(
     # Supprimer la note
     db.delete(db_rating)
     db.commit()
+    schedule_regeneration(background_tasks, current_user.id)
 
 
 @router.get("/ratings/me", response_model=List[MusicRatingResponse])
@@ -3,13 +3,14 @@ Routes API pour les recommandations musicales
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session, joinedload
 
 from app.dependencies import get_db, get_current_user
 from app.models.user import User
 from app.schemas.recommendation import MusicRecommendationResponse
 from app.services.music_recommendation_engine import MusicRecommendationEngine
+from app.services.music_recommendation_refresh import recommendations_state, schedule_regeneration
 from app.models.recommendation import MusicRecommendation
 
 
@@ -18,18 +19,48 @@ router = APIRouter(prefix="/music-recommendations", tags=["Music Recommendations
 
 @router.get("", response_model=List[MusicRecommendationResponse])
 async def get_music_recommendations(
+    response: Response,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Récupère les recommandations musicales pour l'utilisateur connecté
     
+    Sert le dernier jeu enregistré. S'il est périmé (nouvelles notes ou
+    durée de vie dépassée), il est régénéré en arrière-plan après la
+    réponse. Seule la toute première demande génère le jeu immédiatement.
+    
+    En-têtes de réponse:
+        X-Recommendations-Age: âge du jeu servi, en secondes
+        X-Recommendations-Stale: "true" si une régénération est en cours
+    
     Args:
+        response: Réponse HTTP (en-têtes)
+        background_tasks: Tâches exécutées après la réponse
         current_user: Utilisateur connecté
         db: Session de base de données
     """
-    engine = MusicRecommendationEngine(db)
-    recommendations = engine.generate_recommendations(current_user.id)
+    age, is_stale = recommendations_state(db, current_user.id)
+    
+    if age is None:
+        # Aucun jeu enregistré : générer maintenant
+        engine = MusicRecommendationEngine(db)
+        engine.generate_recommendations(current_user.id)
+        age, is_stale = 0.0, False
+    elif is_stale:
+        schedule_regeneration(background_tasks, current_user.id)
+    
+    recommendations = db.query(MusicRecommendation).options(
+        joinedload(MusicRecommendation.track)
+    ).filter(
+        MusicRecommendation.user_id == current_user.id,
+        MusicRecommendation.is_dismissed.isnot(True)
+    ).order_by(MusicRecommendation.score.desc(), MusicRecommendation.id).all()
+    
+    response.headers["X-Recommendations-Age"] = str(int(age))
+    response.headers["X-Recommendations-Stale"] = "true" if is_stale else "false"
+    
     return recommendations
 
 
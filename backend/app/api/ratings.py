@@ -3,10 +3,12 @@ Routes pour les notations
 Créer, modifier, supprimer, consulter les notes
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from sqlalchemy import func, tuple_
 
 from app.database import get_db
 from app.schemas.rating import RatingCreate, RatingUpdate, RatingResponse, RatingWithMovie, UserRatingStats
@@ -14,12 +16,36 @@ from app.schemas.movie import MovieResponse
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.rating import Rating
-from app.models.movie import Movie, MovieGenre, Genre
+from app.models.movie import Movie
+from app.models.user_preference import UserMoviePreference
 
 
 router = APIRouter()
 
 
+def _encode_cursor(rating: Rating) -> str:
+    """Curseur opaque désignant la position (updated_at, id) d'une note"""
+    raw = f"{rating.updated_at.isoformat()}|{rating.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Position (updated_at, id) encodée dans un curseur
+
+    Raises:
+        HTTPException: 400 si le curseur est invalide
+    """
+    try:
+        updated_at, rating_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(updated_at), int(rating_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.post("/", response_model=RatingResponse, status_code=status.HTTP_201_CREATED)
 async def create_or_update_rating(
     rating_data: RatingCreate,
@@ -69,36 +95,49 @@ async def create_or_update_rating(
 
 @router.get("/", response_model=List[RatingWithMovie])
 async def get_user_ratings(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100)
 ):
     """
-    Récupère toutes les notes de l'utilisateur connecté avec les détails des films
+    Récupère les notes de l'utilisateur connecté avec les détails des films
     
-    - **skip**: Nombre d'éléments à sauter (pagination)
+    Notes les plus récemment modifiées d'abord. Pour la page suivante,
+    renvoyer le curseur de l'en-tête X-Next-Cursor (absent sur la
+    dernière page) : la requête reprend après la dernière note servie
+    au lieu de sauter les précédentes.
+    
+    - **cursor**: Curseur de la page suivante (en-tête X-Next-Cursor)
+    - **skip**: Nombre d'éléments à sauter (ancienne pagination, ignoré avec cursor)
     - **limit**: Nombre maximum d'éléments à retourner (max 100)
     """
-    ratings = db.query(Rating).filter(
+    # Notes et films en une requête jointe, genres en une seconde
+    query = db.query(Rating).join(Rating.movie).options(
+        contains_eager(Rating.movie).selectinload(Movie.genres)
+    ).filter(
         Rating.user_id == current_user.id
-    ).order_by(Rating.updated_at.desc()).offset(skip).limit(limit).all()
+    )
+    
+    if cursor:
+        query = query.filter(tuple_(Rating.updated_at, Rating.id) < _decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    
+    ratings = query.order_by(Rating.updated_at.desc(), Rating.id.desc()).limit(limit).all()
     
-    # Construire la réponse avec les films
-    result = []
-    for rating in ratings:
-        movie = db.query(Movie).filter(Movie.id == rating.movie_id).first()
-        
-        if movie:
-            movie_response = MovieResponse.model_validate(movie)
-            rating_response = RatingResponse.model_validate(rating)
-            
-            result.append(RatingWithMovie(
-                **rating_response.model_dump(),
-                movie=movie_response
-            ))
+    if len(ratings) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(ratings[-1])
     
-    return result
+    return [
+        RatingWithMovie(
+            **RatingResponse.model_validate(rating).model_dump(),
+            movie=MovieResponse.model_validate(rating.movie)
+        )
+        for rating in ratings
+    ]
 
 
 @router.get("/stats", response_model=UserRatingStats)
@@ -114,11 +153,15 @@ async def get_user_rating_stats(
     - Nombre de films bien notés (4-5)
     - Distribution des notes
     - Genres préférés
+    
+    Statistiques lues dans user_movie_preferences, table tenue à jour par
+    trigger à chaque note créée, modifiée ou supprimée (voir database/init.sql)
     """
-    # Statistiques de base
-    ratings = db.query(Rating).filter(Rating.user_id == current_user.id).all()
+    preferences = db.query(UserMoviePreference).filter(
+        UserMoviePreference.user_id == current_user.id
+    ).first()
     
-    if not ratings:
+    if not preferences or not preferences.total_ratings:
         return UserRatingStats(
             total_ratings=0,
             average_rating=0.0,
@@ -128,39 +171,22 @@ async def get_user_rating_stats(
             last_rating_date=None
         )
     
-    total_ratings = len(ratings)
-    average_rating = sum(r.rating for r in ratings) / total_ratings
-    highly_rated_count = sum(1 for r in ratings if r.rating >= 4)
-    
-    # Distribution des notes
-    rating_distribution = {i: 0 for i in range(1, 6)}
-    for rating in ratings:
-        rating_distribution[rating.rating] += 1
-    
-    # Genres préférés (calcul)
-    genre_scores = {}
-    for rating in ratings:
-        if rating.rating >= 4:  # Seulement les films bien notés
-            movie_genres = db.query(Genre).join(
-                MovieGenre, MovieGenre.genre_id == Genre.id
-            ).filter(MovieGenre.movie_id == rating.movie_id).all()
-            
-            for genre in movie_genres:
-                genre_scores[genre.name] = genre_scores.get(genre.name, 0) + 1
+    # Distribution des notes (clés JSON en texte)
+    distribution = preferences.rating_distribution or {}
+    rating_distribution = {i: int(distribution.get(str(i), 0)) for i in range(1, 6)}
     
     # Trier les genres par score décroissant
-    favorite_genres = dict(sorted(genre_scores.items(), key=lambda x: x[1], reverse=True))
-    
-    # Date de la dernière note
-    last_rating = max(ratings, key=lambda r: r.updated_at)
+    favorite_genres = dict(sorted(
+        (preferences.favorite_genres or {}).items(), key=lambda x: x[1], reverse=True
+    ))
     
     return UserRatingStats(
-        total_ratings=total_ratings,
-        average_rating=round(average_rating, 2),
-        highly_rated_count=highly_rated_count,
+        total_ratings=preferences.total_ratings,
+        average_rating=round(float(preferences.average_rating or 0), 2),
+        highly_rated_count=preferences.highly_rated_count or 0,
         rating_distribution=rating_distribution,
         favorite_genres=favorite_genres if favorite_genres else None,
-        last_rating_date=last_rating.updated_at
+        last_rating_date=preferences.last_rating_date
     )
 
 
@@ -3,10 +3,12 @@ Routes pour les recommandations
 Générer, consulter, expliquer les recommandations
 """
 
+import asyncio
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
 
+from app.config import settings
 from app.database import get_db
 from app.schemas.recommendation import RecommendationResponse, RecommendationExplanation
 from app.schemas.movie import MovieResponse
@@ -22,6 +24,26 @@ from app.services.tmdb_service import TMDBService
 router = APIRouter()
 
 
+async def _fetch_similar_movies(
+    tmdb_service: TMDBService,
+    semaphore: asyncio.Semaphore,
+    movie_id: int
+) -> List[dict]:
+    """
+    Récupère les films similaires en respectant la limite de concurrence
+    
+    Args:
+        tmdb_service: Service TMDB
+        semaphore: Sémaphore bornant le nombre d'appels simultanés
+        movie_id: ID TMDB du film de référence
+    
+    Returns:
+        Liste de films similaires
+    """
+    async with semaphore:
+        return await tmdb_service.get_similar_movies(movie_id, limit=10)
+
+
 @router.post("/generate", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def generate_recommendations(
     db: Session = Depends(get_db),
@@ -32,6 +54,8 @@ async def generate_recommendations(
     Génère de nouvelles recommandations basées sur les films bien notés
     
     Recherche des films similaires via TMDB (même réalisateur, acteurs, genres)
+    Les appels TMDB sont lancés en parallèle (concurrence bornée) et les
+    résultats sont fusionnés dans l'ordre des films les mieux notés.
     """
     tmdb_service = TMDBService()
     
@@ -42,23 +66,28 @@ async def generate_recommendations(
     db.commit()
     
     # Récupérer les films les mieux notés (≥4 étoiles)
+    # Tri secondaire pour un ordre de fusion déterministe
     top_ratings = db.query(Rating).options(
         joinedload(Rating.movie)
     ).filter(
         Rating.user_id == current_user.id,
         Rating.rating >= 4
-    ).order_by(Rating.rating.desc()).limit(5).all()
+    ).order_by(
+        Rating.rating.desc(),
+        Rating.updated_at.desc(),
+        Rating.id.desc()
+    ).limit(5).all()
     
     if not top_ratings:
         # Si pas de notes élevées, utiliser les films populaires
         popular_movies = await tmdb_service.get_popular_movies(limit=limit)
         
-        for idx, movie_data in enumerate(popular_movies):
-            movie = tmdb_service.save_movie_to_db(db, movie_data)
-            
+        movies = tmdb_service.save_movies_bulk(db, popular_movies)
+        
+        for idx, movie in enumerate(movies):
             recommendation = Recommendation(
                 user_id=current_user.id,
-                movie_id=movie.tmdb_id,
+                movie_id=movie.id,
                 score=0.8 - (idx * 0.02),  # Score décroissant
                 algorithm_type="popular",
                 explanation="Film populaire recommandé"
@@ -68,101 +97,103 @@ async def generate_recommendations(
         db.commit()
         return {
             "message": "Généré des recommandations populaires (notez plus de films pour des recommandations personnalisées)",
-            "count": len(popular_movies)
+            "count": len(movies)
         }
     
+    # Lancer tous les appels TMDB en parallèle : un par film bien noté,
+    # plus les films populaires récupérés de manière spéculative pour
+    # compléter la liste si nécessaire.
+    semaphore = asyncio.Semaphore(settings.tmdb_max_concurrency)
+    results = await asyncio.gather(
+        *[
+            _fetch_similar_movies(tmdb_service, semaphore, rating.movie.id)
+            for rating in top_ratings
+        ],
+        tmdb_service.get_popular_movies(limit=limit),
+        return_exceptions=True
+    )
+    similar_results, popular_result = results[:-1], results[-1]
+    
+    # Films déjà notés (une seule requête au lieu d'une par candidat)
+    rated_movie_ids = {
+        movie_id for (movie_id,) in db.query(Rating.movie_id).filter(
+            Rating.user_id == current_user.id
+        ).all()
+    }
+    
+    # Sélection des candidats : (données TMDB, score, algorithme, explication)
+    candidates = []
     recommendations_set = set()
-    recommendations_count = 0
     
-    # Pour chaque film bien noté, rechercher des films similaires
-    for rating in top_ratings:
-        if recommendations_count >= limit:
+    # Fusionner dans l'ordre des films bien notés (déterministe)
+    for rating, similar_movies in zip(top_ratings, similar_results):
+        if len(candidates) >= limit:
             break
             
         movie = rating.movie
         
-        try:
-            # Récupérer les films similaires via TMDB
-            similar_movies = await tmdb_service.get_similar_movies(movie.tmdb_id, limit=10)
+        if isinstance(similar_movies, Exception):
+            print(f"[RECOMMENDATIONS] Erreur pour le film {movie.title}: {str(similar_movies)}")
+            continue
+        
+        for similar_data in similar_movies:
+            if len(candidates) >= limit:
+                break
+            
+            similar_tmdb_id = similar_data["id"]
+            
+            # Éviter les doublons et les films déjà notés
+            if similar_tmdb_id in recommendations_set or similar_tmdb_id in rated_movie_ids:
+                continue
+            
+            # Calculer le score de correspondance
+            match_score = 0.9 - (len(candidates) * 0.01)
             
-            for similar_data in similar_movies:
-                if recommendations_count >= limit:
+            candidates.append((
+                similar_data,
+                match_score,
+                "content_based",
+                f"Recommandé car vous avez aimé '{movie.title}' ({rating.rating}⭐)"
+            ))
+            recommendations_set.add(similar_tmdb_id)
+    
+    # Compléter avec les films populaires déjà récupérés si nécessaire
+    if len(candidates) < limit:
+        if isinstance(popular_result, Exception):
+            print(f"[RECOMMENDATIONS] Erreur lors de la récupération des films populaires: {str(popular_result)}")
+        else:
+            for movie_data in popular_result:
+                if len(candidates) >= limit:
                     break
                 
-                similar_tmdb_id = similar_data["id"]
-                
-                # Éviter les doublons et les films déjà notés
-                if similar_tmdb_id in recommendations_set:
-                    continue
-                
-                already_rated = db.query(Rating).filter(
-                    Rating.user_id == current_user.id,
-                    Rating.movie_id == similar_tmdb_id
-                ).first()
-                
-                if already_rated:
-                    continue
-                
-                # Sauvegarder le film
-                similar_movie = tmdb_service.save_movie_to_db(db, similar_data)
-                
-                # Calculer le score de correspondance
-                match_score = 0.9 - (recommendations_count * 0.01)
-                
-                # Créer la recommandation
-                recommendation = Recommendation(
-                    user_id=current_user.id,
-                    movie_id=similar_movie.tmdb_id,
-                    score=match_score,
-                    algorithm_type="content_based",
-                    explanation=f"Recommandé car vous avez aimé '{movie.title}' ({rating.rating}⭐)"
-                )
-                
-                db.add(recommendation)
-                recommendations_set.add(similar_tmdb_id)
-                recommendations_count += 1
-        
-        except Exception as e:
-            print(f"[RECOMMENDATIONS] Erreur pour le film {movie.title}: {str(e)}")
-            continue
-    
-    # Compléter avec des films populaires si nécessaire
-    if recommendations_count < limit:
-        try:
-            popular_movies = await tmdb_service.get_popular_movies(limit=limit - recommendations_count)
-            
-            for movie_data in popular_movies:
                 tmdb_id = movie_data["id"]
                 
-                if tmdb_id in recommendations_set:
-                    continue
-                
-                already_rated = db.query(Rating).filter(
-                    Rating.user_id == current_user.id,
-                    Rating.movie_id == tmdb_id
-                ).first()
-                
-                if already_rated:
+                if tmdb_id in recommendations_set or tmdb_id in rated_movie_ids:
                     continue
                 
-                movie = tmdb_service.save_movie_to_db(db, movie_data)
-                
-                recommendation = Recommendation(
-                    user_id=current_user.id,
-                    movie_id=movie.tmdb_id,
-                    score=0.7,
-                    algorithm_type="popular",
-                    explanation="Film populaire recommandé"
-                )
-                
-                db.add(recommendation)
-                recommendations_count += 1
-                
-                if recommendations_count >= limit:
-                    break
+                candidates.append((movie_data, 0.7, "popular", "Film populaire recommandé"))
+                recommendations_set.add(tmdb_id)
+    
+    # Sauvegarder tous les films en une seule transaction
+    saved_ids = {
+        movie.id for movie in tmdb_service.save_movies_bulk(
+            db, [movie_data for movie_data, _, _, _ in candidates]
+        )
+    }
+    
+    recommendations_count = 0
+    for movie_data, score, algorithm_type, explanation in candidates:
+        if movie_data["id"] not in saved_ids:
+            continue
         
-        except Exception as e:
-            print(f"[RECOMMENDATIONS] Erreur lors de la récupération des films populaires: {str(e)}")
+        db.add(Recommendation(
+            user_id=current_user.id,
+            movie_id=movie_data["id"],
+            score=score,
+            algorithm_type=algorithm_type,
+            explanation=explanation
+        ))
+        recommendations_count += 1
     
     db.commit()
     
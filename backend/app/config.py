@@ -3,6 +3,7 @@ Configuration globale de l'application
 Gestion des variables d'environnement et paramètres
 """
 
+from typing import Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -24,15 +25,52 @@ class Settings(BaseSettings):
     tmdb_api_key: str
     tmdb_base_url: str = "https://api.themoviedb.org/3"
     tmdb_image_base_url: str = "https://image.tmdb.org/t/p"
+    tmdb_max_concurrency: int = 5  # Appels TMDB simultanés max par requête
+    tmdb_bundle_cache_ttl_seconds: int = 3600  # Durée de vie d'un bundle film en cache
+    tmdb_bundle_cache_size: int = 2000  # Nombre max de bundles films en cache
     
     # Spotify API
     spotify_client_id: str
     spotify_client_secret: str
+    spotify_base_url: str = "https://api.spotify.com/v1"
+    spotify_auth_url: str = "https://accounts.spotify.com/api/token"
+    spotify_token_refresh_margin_seconds: int = 300  # Rafraîchir le token 5 min avant expiration
+    spotify_token_cache_path: str = "/tmp/nexus_spotify_token.json"  # Token partagé entre workers
+    spotify_track_refresh_days: int = 7  # Au-delà, une piste est rafraîchie via /tracks?ids=
+    
+    # Google Books API
+    google_books_base_url: str = "https://www.googleapis.com/books/v1"
+    google_books_api_key: Optional[str] = None  # Optionnel pour Google Books
+    google_books_max_concurrency: int = 4  # Recherches Google Books simultanées max par requête
+    
+    # Appels aux API externes (TMDB, Spotify, Google Books)
+    upstream_timeout_seconds: float = 5.0  # Timeout d'un appel amont
+    circuit_failure_threshold: int = 5  # Échecs consécutifs avant ouverture du circuit
+    circuit_slow_call_seconds: float = 2.0  # Au-delà, un appel réussi compte comme un échec
+    circuit_reset_timeout_seconds: float = 30.0  # Durée d'ouverture avant la requête de test
+    upstream_stale_ttl_seconds: int = 86400  # Durée de conservation des réponses de repli
+    upstream_stale_cache_size: int = 5000  # Réponses de repli max par fournisseur
+    http_pool_max_connections: int = 100  # Connexions max du client HTTP partagé
+    http_pool_max_keepalive: int = 20  # Connexions keep-alive conservées
+    
+    # Recherche (/movies/search, /music/search, /books/search)
+    catalog_search_mode: str = "local_first"  # "upstream", "local_first" ou "local" (voir services/catalog_search.py)
+    catalog_search_strong_similarity: float = 0.6  # Similarité trigramme d'une correspondance solide (local_first)
     
     # Sécurité JWT
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    token_cache_size: int = 10000  # Tokens vérifiés gardés en cache (jusqu'à leur expiration)
+    user_cache_ttl_seconds: int = 30  # Durée de vie d'un utilisateur authentifié en cache
+    user_cache_size: int = 10000  # Nombre max d'utilisateurs en cache
+    
+    # Hachage des mots de passe (Argon2, voir app/devtools/login_benchmark.py)
+    argon2_time_cost: int = 3  # Nombre de passes
+    argon2_memory_cost: int = 65536  # Mémoire par hash (KiB)
+    argon2_parallelism: int = 4  # Voies parallèles par hash
+    password_hash_workers: int = 2  # Threads dédiés au hachage
+    password_hash_max_queue: int = 64  # Au-delà, les connexions sont refusées (503)
     
     # CORS
     cors_origins: list = [
@@ -47,6 +85,25 @@ class Settings(BaseSettings):
     collaborative_weight: float = 0.6  # Poids du filtrage collaboratif (60%)
     content_weight: float = 0.4  # Poids du filtrage basé contenu (40%)
     min_similarity_score: float = 0.3  # Score minimum de similarité
+    music_recommendations_ttl_minutes: int = 60  # Au-delà, le jeu enregistré est régénéré
+    book_neighbours_count: int = 30  # Voisins précalculés par livre noté
+    
+    # Préchauffage du catalogue TMDB (tâche de fond)
+    catalog_warmup_enabled: bool = False  # Activer dans un seul worker (ou utiliser la CLI)
+    catalog_warmup_pages: int = 2  # Pages crawlées par liste
+    catalog_warmup_interval_minutes: int = 360  # Intervalle entre deux passages
+    
+    # Enrichissement des genres musicaux (tâche de fond)
+    music_enrichment_enabled: bool = True  # Désactiver si plusieurs workers (ou utiliser la CLI)
+    music_enrichment_interval_seconds: int = 60  # Attente quand aucun artiste n'est en attente
+    music_enrichment_batch_delay_seconds: float = 0.5  # Pause entre deux lots (artistes, pistes)
+    audio_features_provider: str = "none"  # "none", "spotify" (accès à /audio-features requis) ou "fixture" (fichier JSON local)
+    audio_features_fixture_path: str = "fixtures/audio_features.json"  # {spotify_id: {feature: valeur}}
+    audio_feature_weight: float = 0.5  # Part de la similarité audio dans le score contenu
+    
+    # Voisins des livres (tâche de fond)
+    book_similarity_enabled: bool = True  # Désactiver si plusieurs workers (ou utiliser la CLI)
+    book_similarity_interval_minutes: int = 60  # Intervalle entre deux calculs des voisins
     
     class Config:
         env_file = ".env"
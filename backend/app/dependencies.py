@@ -44,8 +44,8 @@ async def get_current_user(
     # Décoder le token
     token_data = AuthService.decode_access_token(token)
     
-    # Récupérer l'utilisateur
-    user = AuthService.get_user_by_id(db, token_data.user_id)
+    # Récupérer l'utilisateur (cache de courte durée, voir AuthService.get_cached_user)
+    user = AuthService.get_cached_user(db, token_data.user_id)
     
     if user is None:
         raise HTTPException(
@@ -0,0 +1,3 @@
+"""
+Outils de développement - Non chargés par l'application principale
+"""
@@ -0,0 +1,101 @@
+"""
+Benchmark d'authentification - Coût par requête de get_current_user
+
+Compare, pour un même token Bearer réutilisé (cas du frontend) :
+- la vérification JWT seule (jwt.decode) et avec le cache des tokens,
+- la dépendance get_current_user complète, caches vides ou chauds.
+
+Lancement:
+    python -m app.devtools.auth_benchmark
+    python -m app.devtools.auth_benchmark --iterations 20000
+
+Les utilisateurs sont lus dans une base SQLite en mémoire (table users
+seule) : les durées « sans cache » n'incluent donc pas l'aller-retour
+réseau vers PostgreSQL.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.config import settings
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.services import auth_service
+from app.services.auth_service import AuthService
+
+
+def measure(label: str, iterations: int, fn: Callable[[], None], clear: Callable[[], None] = None) -> None:
+    """
+    Affiche la durée moyenne d'un appel
+
+    Args:
+        label: Libellé de la mesure
+        iterations: Nombre d'appels
+        fn: Appel mesuré
+        clear: Appelé avant chaque appel (vider les caches), hors mesure
+    """
+    elapsed = 0.0
+    for _ in range(iterations):
+        if clear:
+            clear()
+        started = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - started
+    print(f"{label:<45} {elapsed / iterations * 1e6:>9.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du coût de l'authentification par requête")
+    parser.add_argument("--iterations", type=int, default=5000, help="Appels par mesure")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    user = User(username="benchmark", email="benchmark@example.com", password_hash="-", is_active=True)
+    db.add(user)
+    db.commit()
+    token = AuthService.create_access_token(data={"user_id": user.id, "email": user.email})
+    db.close()
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    loop = asyncio.new_event_loop()
+
+    def clear_caches():
+        auth_service._token_cache.clear()
+        auth_service._user_cache.clear()
+
+    def current_user():
+        db = Session()
+        try:
+            loop.run_until_complete(get_current_user(credentials=credentials, db=db))
+        finally:
+            db.close()
+
+    measure("jwt.decode", args.iterations,
+            lambda: jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm]))
+    measure("decode_access_token (cache vide)", args.iterations,
+            lambda: AuthService.decode_access_token(token), auth_service._token_cache.clear)
+    measure("decode_access_token (cache chaud)", args.iterations,
+            lambda: AuthService.decode_access_token(token))
+    measure("get_current_user (caches vides)", args.iterations, current_user, clear_caches)
+    current_user()
+    measure("get_current_user (caches chauds)", args.iterations, current_user)
+
+    loop.close()
+    print(f"Cache des tokens: {AuthService.token_cache_stats()}")
+    print(f"Cache des utilisateurs: {AuthService.user_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Faux serveur amont - Remplace TMDB, Spotify et Google Books en local
+
+Sert des fixtures enregistrées ou générées (déterministes) pour les
+endpoints appelés par nos services, avec latence, taux d'erreur et
+réponses 429 configurables. Permet des tests de débit reproductibles
+sans consommer de quota ni dépendre du réseau.
+
+Lancement:
+    uvicorn app.devtools.fake_upstream:app --port 9000
+
+Configuration du backend (.env):
+    TMDB_BASE_URL=http://localhost:9000/tmdb/3
+    SPOTIFY_BASE_URL=http://localhost:9000/spotify/v1
+    SPOTIFY_AUTH_URL=http://localhost:9000/spotify/api/token
+    GOOGLE_BOOKS_BASE_URL=http://localhost:9000/books/v1
+
+Variables d'environnement du faux serveur:
+    FAKE_UPSTREAM_LATENCY_MS       Latence ajoutée à chaque réponse (défaut: 50)
+    FAKE_UPSTREAM_JITTER_MS        Variation aléatoire de la latence (défaut: 0)
+    FAKE_UPSTREAM_ERROR_RATE       Probabilité d'une erreur 503 (défaut: 0)
+    FAKE_UPSTREAM_RATE_LIMIT_RATE  Probabilité d'une réponse 429 (défaut: 0)
+    FAKE_UPSTREAM_RETRY_AFTER      Valeur de l'en-tête Retry-After (défaut: 1)
+    FAKE_UPSTREAM_FIXTURES_DIR     Dossier de réponses enregistrées (optionnel)
+    FAKE_UPSTREAM_SEED             Graine des données générées (défaut: 42)
+
+Les réglages sont modifiables à chaud via POST /_control (JSON).
+Une fixture enregistrée est servie si le fichier
+<FIXTURES_DIR>/<fournisseur>/<chemin>.json existe, par exemple
+fixtures/tmdb/movie/popular.json ou fixtures/spotify/search.json.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+# ============================================
+# Configuration
+# ============================================
+
+config: Dict[str, Any] = {
+    "latency_ms": float(os.getenv("FAKE_UPSTREAM_LATENCY_MS", "50")),
+    "jitter_ms": float(os.getenv("FAKE_UPSTREAM_JITTER_MS", "0")),
+    "error_rate": float(os.getenv("FAKE_UPSTREAM_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("FAKE_UPSTREAM_RATE_LIMIT_RATE", "0")),
+    "retry_after": int(os.getenv("FAKE_UPSTREAM_RETRY_AFTER", "1")),
+    "fixtures_dir": os.getenv("FAKE_UPSTREAM_FIXTURES_DIR"),
+    "seed": int(os.getenv("FAKE_UPSTREAM_SEED", "42")),
+}
+
+# Compteurs de requêtes servies (consultables via GET /_control)
+counters: Dict[str, int] = {"requests": 0, "errors": 0, "rate_limited": 0, "fixtures": 0}
+
+# Tirage des fautes injectées (indépendant des données générées)
+_fault_rng = random.Random()
+
+MOVIE_GENRE_IDS = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 53, 10752, 37]
+TV_GENRES = {10759: "Action & Adventure", 16: "Animation", 35: "Comedy", 80: "Crime", 18: "Drama", 9648: "Mystery"}
+MUSIC_GENRES = ["pop", "rock", "hip hop", "french pop", "indie", "electro", "jazz", "r&b", "metal", "folk"]
+BOOK_CATEGORIES = ["Fiction", "History", "Science", "Biography & Autobiography", "Fantasy", "Poetry"]
+WORDS = ["Nuit", "Ombre", "Lumière", "Voyage", "Silence", "Étoile", "Océan", "Mémoire", "Feu", "Secret",
+         "Horizon", "Rêve", "Tempête", "Jardin", "Miroir", "Retour", "Cœur", "Ville", "Hiver", "Promesse"]
+NAMES = ["Martin", "Bernard", "Dubois", "Laurent", "Moreau", "Lefebvre", "Garcia", "Roux", "Fournier", "Girard"]
+
+
+def _rng(*key: Any) -> random.Random:
+    """Générateur déterministe pour une clé donnée"""
+    digest = hashlib.sha256(f"{config['seed']}:{key}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _title(rng: random.Random, words: int = 3) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, words)))
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(1970, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def _ids(*key: Any, count: int = 20, upper: int = 900000) -> List[int]:
+    rng = _rng(*key)
+    return [rng.randint(1, upper) for _ in range(count)]
+
+
+def _spotify_id(*key: Any) -> str:
+    return hashlib.sha256(f"{config['seed']}:{key}".encode("utf-8")).hexdigest()[:22]
+
+
+# ============================================
+# Générateurs de données
+# ============================================
+
+def fake_movie(movie_id: int, details: bool = False) -> Dict[str, Any]:
+    rng = _rng("movie", movie_id)
+    title = _title(rng)
+    genre_ids = rng.sample(MOVIE_GENRE_IDS, rng.randint(1, 3))
+
+    movie = {
+        "id": movie_id,
+        "title": title,
+        "original_title": title,
+        "overview": f"{title} : " + " ".join(rng.choice(WORDS).lower() for _ in range(30)),
+        "release_date": _date(rng),
+        "poster_path": f"/poster{movie_id}.jpg",
+        "backdrop_path": f"/backdrop{movie_id}.jpg",
+        "vote_average": round(rng.uniform(3, 9), 1),
+        "vote_count": rng.randint(10, 30000),
+        "popularity": round(rng.uniform(1, 500), 3),
+        "original_language": rng.choice(["fr", "en", "es", "ja"]),
+        "genre_ids": genre_ids,
+    }
+
+    if details:
+        del movie["genre_ids"]
+        movie.update({
+            "genres": [{"id": genre_id, "name": f"Genre {genre_id}"} for genre_id in genre_ids],
+            "runtime": rng.randint(80, 180),
+            "budget": rng.randint(0, 200) * 1_000_000,
+            "revenue": rng.randint(0, 900) * 1_000_000,
+            "status": "Released",
+            "tagline": _title(rng, 5),
+        })
+
+    return movie
+
+
+def fake_tv_show(tv_id: int, details: bool = False) -> Dict[str, Any]:
+    rng = _rng("tv", tv_id)
+    name = _title(rng)
+    genre_ids = rng.sample(list(TV_GENRES), rng.randint(1, 2))
+
+    show = {
+        "id": tv_id,
+        "name": name,
+        "original_name": name,
+        "overview": f"{name} : " + " ".join(rng.choice(WORDS).lower() for _ in range(30)),
+        "first_air_date": _date(rng),
+        "poster_path": f"/tvposter{tv_id}.jpg",
+        "backdrop_path": f"/tvbackdrop{tv_id}.jpg",
+        "vote_average": round(rng.uniform(3, 9), 1),
+        "vote_count": rng.randint(10, 20000),
+        "popularity": round(rng.uniform(1, 500), 3),
+        "genre_ids": genre_ids,
+    }
+
+    if details:
+        del show["genre_ids"]
+        show.update({
+            "genres": [{"id": genre_id, "name": TV_GENRES[genre_id]} for genre_id in genre_ids],
+            "networks": [{"id": rng.randint(1, 300), "name": rng.choice(["Netflix", "HBO", "Arte", "Canal+"])}],
+            "last_air_date": _date(rng),
+            "number_of_seasons": rng.randint(1, 10),
+            "number_of_episodes": rng.randint(6, 200),
+            "status": rng.choice(["Ended", "Returning Series"]),
+        })
+
+    return show
+
+
+def fake_artist(artist_id: str) -> Dict[str, Any]:
+    rng = _rng("artist", artist_id)
+    return {
+        "id": artist_id,
+        "name": f"{rng.choice(WORDS)} {rng.choice(NAMES)}",
+        "genres": rng.sample(MUSIC_GENRES, rng.randint(1, 3)),
+        "popularity": rng.randint(0, 100),
+    }
+
+
+def fake_album(album_id: str) -> Dict[str, Any]:
+    rng = _rng("album", album_id)
+    artist = fake_artist(_spotify_id("album-artist", album_id, rng.randint(0, 200)))
+    return {
+        "id": album_id,
+        "name": _title(rng),
+        "artists": [{"id": artist["id"], "name": artist["name"]}],
+        "release_date": _date(rng),
+        "images": [{"url": f"https://fake.local/album/{album_id}.jpg", "height": 640, "width": 640}],
+    }
+
+
+def fake_audio_features(track_id: str) -> Dict[str, Any]:
+    rng = _rng("audio-features", track_id)
+    features = {key: round(rng.random(), 3) for key in (
+        "danceability", "energy", "valence", "acousticness", "instrumentalness", "liveness", "speechiness"
+    )}
+    features.update({
+        "id": track_id,
+        "tempo": round(rng.uniform(60, 180), 3),
+        "loudness": round(rng.uniform(-20, -2), 3),
+    })
+    return features
+
+
+def fake_track(track_id: str) -> Dict[str, Any]:
+    rng = _rng("track", track_id)
+    album = fake_album(_spotify_id("track-album", track_id))
+    artist = fake_artist(_spotify_id("track-artist", rng.randint(0, 500)))
+    return {
+        "id": track_id,
+        "name": _title(rng),
+        "artists": [{"id": artist["id"], "name": artist["name"]}],
+        "album": album,
+        "preview_url": f"https://fake.local/preview/{track_id}.mp3",
+        "duration_ms": rng.randint(120_000, 420_000),
+        "popularity": rng.randint(0, 100),
+    }
+
+
+def fake_volume(volume_id: str) -> Dict[str, Any]:
+    rng = _rng("volume", volume_id)
+    return {
+        "id": volume_id,
+        "volumeInfo": {
+            "title": _title(rng, 4),
+            "authors": [f"{rng.choice(WORDS)} {rng.choice(NAMES)}" for _ in range(rng.randint(1, 2))],
+            "description": " ".join(rng.choice(WORDS).lower() for _ in range(40)),
+            "publisher": rng.choice(["Gallimard", "Flammarion", "Seuil", "Actes Sud"]),
+            "publishedDate": _date(rng),
+            "pageCount": rng.randint(80, 900),
+            "categories": rng.sample(BOOK_CATEGORIES, 1),
+            "imageLinks": {"thumbnail": f"https://fake.local/books/{volume_id}.jpg"},
+            "language": "fr",
+            "industryIdentifiers": [{"type": "ISBN_13", "identifier": str(rng.randint(10**12, 10**13 - 1))}],
+            "averageRating": round(rng.uniform(1, 5), 1),
+            "ratingsCount": rng.randint(0, 5000),
+        },
+    }
+
+
+def _page(items: List[Dict[str, Any]], page: int) -> Dict[str, Any]:
+    return {"page": page, "results": items, "total_pages": 500, "total_results": 10000}
+
+
+def _tmdb_not_found() -> JSONResponse:
+    return JSONResponse(
+        {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."},
+        status_code=404,
+    )
+
+
+# ============================================
+# Application
+# ============================================
+
+app = FastAPI(title="Nexus Fake Upstream", docs_url="/docs")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Ajoute la latence, les erreurs et les 429 configurés, ou sert une fixture"""
+    if request.url.path.startswith("/_control"):
+        return await call_next(request)
+
+    counters["requests"] += 1
+
+    delay = config["latency_ms"] + _fault_rng.uniform(-1, 1) * config["jitter_ms"]
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+
+    if _fault_rng.random() < config["rate_limit_rate"]:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"status": 429, "message": "API rate limit exceeded"}},
+            status_code=429,
+            headers={"Retry-After": str(config["retry_after"])}
+        )
+
+    if _fault_rng.random() < config["error_rate"]:
+        counters["errors"] += 1
+        return JSONResponse({"error": {"status": 503, "message": "Injected failure"}}, status_code=503)
+
+    fixture = _load_fixture(request.url.path)
+    if fixture is not None:
+        counters["fixtures"] += 1
+        return JSONResponse(fixture)
+
+    return await call_next(request)
+
+
+def _load_fixture(path: str) -> Optional[Any]:
+    """Charge une réponse enregistrée correspondant au chemin, si elle existe"""
+    if not config["fixtures_dir"]:
+        return None
+
+    root = Path(config["fixtures_dir"]).resolve()
+    provider, _, rest = path.strip("/").partition("/")
+    # Retirer le préfixe de version (/tmdb/3, /spotify/v1, /books/v1)
+    rest = rest.split("/", 1)[1] if "/" in rest else rest
+    candidate = (root / provider / f"{rest}.json").resolve()
+
+    if root not in candidate.parents or not candidate.is_file():
+        return None
+
+    with open(candidate, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@app.get("/_control")
+async def get_control():
+    """Réglages et compteurs courants"""
+    return {"config": config, "counters": counters}
+
+
+@app.post("/_control")
+async def update_control(request: Request):
+    """Modifie les réglages à chaud (latence, taux d'erreur, ...)"""
+    updates = await request.json()
+
+    for key, value in updates.items():
+        if key in config:
+            config[key] = value
+
+    if updates.get("reset_counters"):
+        for key in counters:
+            counters[key] = 0
+
+    return {"config": config, "counters": counters}
+
+
+# ----- TMDB -----
+
+@app.get("/tmdb/3/movie/{list_name}")
+async def tmdb_movie_list_or_details(list_name: str, page: int = 1, append_to_response: Optional[str] = None):
+    if list_name in ("popular", "top_rated", "now_playing", "upcoming"):
+        return _page([fake_movie(movie_id) for movie_id in _ids("movie-list", list_name, page)], page)
+
+    if not list_name.isdecimal():
+        return _tmdb_not_found()
+
+    movie_id = int(list_name)
+    movie = fake_movie(movie_id, details=True)
+
+    appended = (append_to_response or "").split(",")
+    if "similar" in appended:
+        movie["similar"] = _page([fake_movie(i) for i in _ids("similar", movie_id)], 1)
+    if "credits" in appended:
+        rng = _rng("credits", movie_id)
+        movie["credits"] = {
+            "cast": [{"id": rng.randint(1, 10**6), "name": f"{rng.choice(WORDS)} {rng.choice(NAMES)}"} for _ in range(8)],
+            "crew": [{"id": rng.randint(1, 10**6), "name": rng.choice(NAMES), "job": "Director"}],
+        }
+    if "videos" in appended:
+        movie["videos"] = {"results": [{"key": _spotify_id("video", movie_id), "site": "YouTube", "type": "Trailer"}]}
+
+    return movie
+
+
+@app.get("/tmdb/3/movie/{movie_id}/similar")
+async def tmdb_similar_movies(movie_id: int, page: int = 1):
+    return _page([fake_movie(i) for i in _ids("similar", movie_id, page)], page)
+
+
+@app.get("/tmdb/3/search/movie")
+async def tmdb_search_movies(query: str = "", page: int = 1):
+    return _page([fake_movie(i) for i in _ids("search-movie", query.lower(), page)], page)
+
+
+@app.get("/tmdb/3/discover/movie")
+async def tmdb_discover_movies(request: Request, page: int = 1):
+    return _page([fake_movie(i) for i in _ids("discover", sorted(request.query_params.items()), page)], page)
+
+
+@app.get("/tmdb/3/tv/{list_name}")
+async def tmdb_tv_list_or_details(list_name: str, page: int = 1, append_to_response: Optional[str] = None):
+    if list_name in ("popular", "top_rated", "on_the_air"):
+        return _page([fake_tv_show(tv_id) for tv_id in _ids("tv-list", list_name, page)], page)
+
+    if not list_name.isdecimal():
+        return _tmdb_not_found()
+
+    tv_id = int(list_name)
+    show = fake_tv_show(tv_id, details=True)
+
+    if "similar" in (append_to_response or "").split(","):
+        show["similar"] = _page([fake_tv_show(i) for i in _ids("tv-similar", tv_id)], 1)
+
+    return show
+
+
+@app.get("/tmdb/3/search/tv")
+async def tmdb_search_tv(query: str = "", page: int = 1):
+    return _page([fake_tv_show(i) for i in _ids("search-tv", query.lower(), page)], page)
+
+
+# ----- Spotify -----
+
+@app.post("/spotify/api/token")
+async def spotify_token():
+    return {"access_token": _spotify_id("token", _fault_rng.random()), "token_type": "Bearer", "expires_in": 3600}
+
+
+@app.get("/spotify/v1/search")
+async def spotify_search(q: str = "", limit: int = 20, offset: int = 0):
+    items = [fake_track(_spotify_id("search", q.lower(), offset + i)) for i in range(limit)]
+    return {"tracks": {"items": items, "total": 1000, "limit": limit, "offset": offset}}
+
+
+@app.get("/spotify/v1/tracks")
+async def spotify_tracks(ids: str = ""):
+    return {"tracks": [fake_track(track_id) for track_id in ids.split(",")[:50] if track_id]}
+
+
+@app.get("/spotify/v1/tracks/{track_id}")
+async def spotify_track(track_id: str):
+    return fake_track(track_id)
+
+
+@app.get("/spotify/v1/artists")
+async def spotify_artists(ids: str = ""):
+    return {"artists": [fake_artist(artist_id) for artist_id in ids.split(",")[:50] if artist_id]}
+
+
+@app.get("/spotify/v1/audio-features")
+async def spotify_audio_features(ids: str = ""):
+    return {"audio_features": [fake_audio_features(track_id) for track_id in ids.split(",")[:100] if track_id]}
+
+
+@app.get("/spotify/v1/recommendations")
+async def spotify_recommendations(request: Request, limit: int = 20):
+    seed = sorted(request.query_params.items())
+    return {"tracks": [fake_track(_spotify_id("reco", seed, i)) for i in range(limit)]}
+
+
+@app.get("/spotify/v1/browse/new-releases")
+async def spotify_new_releases(limit: int = 20, offset: int = 0):
+    items = [fake_album(_spotify_id("new-release", offset + i)) for i in range(limit)]
+    return {"albums": {"items": items, "total": 100, "limit": limit, "offset": offset}}
+
+
+# ----- Google Books -----
+
+@app.get("/books/v1/volumes")
+async def books_search(q: str = "", maxResults: int = 10, startIndex: int = 0):
+    items = [fake_volume(_spotify_id("volume", q.lower(), startIndex + i)) for i in range(min(maxResults, 40))]
+    return {"kind": "books#volumes", "totalItems": 1000, "items": items}
+
+
+@app.get("/books/v1/volumes/{volume_id}")
+async def books_volume(volume_id: str):
+    return fake_volume(volume_id)
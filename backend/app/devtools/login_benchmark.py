@@ -0,0 +1,124 @@
+"""
+Benchmark de connexion - Débit et latence du hachage Argon2
+
+Mesure, pour chaque jeu de paramètres Argon2, la durée d'une vérification
+de mot de passe puis le débit de connexions simultanées à travers le pool
+de hachage (file bornée comprise). Sert à choisir ARGON2_TIME_COST,
+ARGON2_MEMORY_COST, ARGON2_PARALLELISM et PASSWORD_HASH_WORKERS selon le
+budget de latence de /auth/login.
+
+Lancement:
+    python -m app.devtools.login_benchmark
+    python -m app.devtools.login_benchmark --time-cost 2 3 --memory-cost 19456 65536 \\
+        --workers 2 4 --concurrency 32 --requests 200 --budget-ms 250
+
+Aucune base de données ni API externe n'est nécessaire.
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from typing import Dict, List
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.services.password_hashing import PasswordHashingPool
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentile (plus proche rang) d'une liste de durées"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_logins(context: CryptContext, password_hash: str, workers: int, concurrency: int, requests: int) -> Dict:
+    """
+    Simule des connexions simultanées à travers un pool de hachage
+
+    Args:
+        context: Contexte passlib avec les paramètres testés
+        password_hash: Hash vérifié à chaque connexion
+        workers: Threads du pool
+        concurrency: Connexions simultanées
+        requests: Nombre total de connexions
+
+    Returns:
+        Statistiques (débit, latences, refus, métriques du pool)
+    """
+    pool = PasswordHashingPool(workers=workers, max_queue=settings.password_hash_max_queue)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await pool.run(context.verify, "benchmark-password", password_hash)
+            except HTTPException:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+    stats = pool.stats()
+    pool.shutdown()
+
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else 0.0,
+        "rejected": rejected,
+        "peak_queued": stats["peak_queued"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du hachage Argon2 des connexions")
+    parser.add_argument("--time-cost", type=int, nargs="+", default=[settings.argon2_time_cost])
+    parser.add_argument("--memory-cost", type=int, nargs="+", default=[settings.argon2_memory_cost],
+                        help="Mémoire par hash (KiB)")
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[settings.argon2_parallelism])
+    parser.add_argument("--workers", type=int, nargs="+", default=[settings.password_hash_workers])
+    parser.add_argument("--concurrency", type=int, default=16, help="Connexions simultanées")
+    parser.add_argument("--requests", type=int, default=100, help="Connexions par configuration")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="Budget de latence p95 de /auth/login")
+    args = parser.parse_args()
+
+    print(f"{'t':>3} {'m (KiB)':>8} {'p':>3} {'workers':>7} {'verify ms':>9} "
+          f"{'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'refus':>6} {'file max':>8}  budget")
+
+    for time_cost, memory_cost, parallelism in itertools.product(args.time_cost, args.memory_cost, args.parallelism):
+        context = CryptContext(
+            schemes=["argon2"],
+            argon2__rounds=time_cost,
+            argon2__memory_cost=memory_cost,
+            argon2__parallelism=parallelism,
+        )
+        password_hash = context.hash("benchmark-password")
+
+        # Durée d'une vérification isolée (sans concurrence)
+        samples = []
+        for _ in range(5):
+            started = time.perf_counter()
+            context.verify("benchmark-password", password_hash)
+            samples.append(time.perf_counter() - started)
+        verify_ms = statistics.median(samples) * 1000
+
+        for workers in args.workers:
+            result = asyncio.run(run_logins(context, password_hash, workers, args.concurrency, args.requests))
+            within_budget = "ok" if result["p95_ms"] <= args.budget_ms and not result["rejected"] else "DÉPASSÉ"
+            print(f"{time_cost:>3} {memory_cost:>8} {parallelism:>3} {workers:>7} {verify_ms:>9.1f} "
+                  f"{result['throughput']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['rejected']:>6} {result['peak_queued']:>8}  {within_budget}")
+
+
+if __name__ == "__main__":
+    main()
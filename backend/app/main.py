@@ -3,16 +3,26 @@ Main FastAPI Application
 Point d'entrée de Nexus Recommendations Backend
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 # Importer les modèles (enregistrent les classes SQLAlchemy) avant
 # d'importer les routers qui peuvent déclencher des opérations DB.
 import app.models  # noqa: F401
 from app.api import api_router
+from app.services.genre_cache import genre_cache
+from app.services.music_index import track_index
+from app.services.autocomplete import autocomplete_index
+from app.services.catalog_crawler import CatalogCrawler
+from app.services.http_client import close_http_client
+from app.services.password_hashing import password_hashing_pool
+from app.services.auth_service import AuthService
+from app.services.music_enrichment import MusicEnrichmentService
+from app.services import book_recommendation_engine
 
 
 # Lifespan event pour initialiser la base de données
@@ -30,9 +40,73 @@ async def lifespan(app: FastAPI):
     # Créer les tables (optionnel, car init.sql le fait déjà)
     # Base.metadata.create_all(bind=engine)
     
+    # Charger le dictionnaire des genres en mémoire
+    db = SessionLocal()
+    try:
+        genre_cache.load(db)
+        print(f"🏷️  Genres loaded: {len(genre_cache.all(db))}")
+    except Exception as e:
+        print(f"⚠️  Could not preload genres (loaded lazily): {str(e)}")
+    finally:
+        db.close()
+    
+    # Construire l'index inversé des pistes (recommandations musicales)
+    db = SessionLocal()
+    try:
+        track_index.load(db)
+    except Exception as e:
+        print(f"⚠️  Could not build track index (built lazily): {str(e)}")
+    finally:
+        db.close()
+    
+    # Construire l'index de préfixes (autocomplétion)
+    db = SessionLocal()
+    try:
+        autocomplete_index.load(db)
+        print(f"🔎 Autocomplete entries: {len(autocomplete_index)}")
+    except Exception as e:
+        print(f"⚠️  Could not build autocomplete index (built lazily): {str(e)}")
+    finally:
+        db.close()
+    
+    # Préchauffage périodique du catalogue TMDB en tâche de fond
+    warmup_task = None
+    if settings.catalog_warmup_enabled:
+        warmup_task = asyncio.create_task(
+            CatalogCrawler().run_forever(
+                settings.catalog_warmup_pages,
+                settings.catalog_warmup_interval_minutes
+            )
+        )
+        print(f"🔥 Catalog warm-up: {settings.catalog_warmup_pages} pages every {settings.catalog_warmup_interval_minutes} min")
+    
+    # Enrichissement des genres des artistes Spotify en tâche de fond
+    enrichment_task = None
+    if settings.music_enrichment_enabled:
+        enrichment_task = asyncio.create_task(
+            MusicEnrichmentService().run_forever(settings.music_enrichment_interval_seconds)
+        )
+        print("🎵 Music genre enrichment: enabled")
+    
+    # Précalcul des voisins des livres en tâche de fond
+    book_similarity_task = None
+    if settings.book_similarity_enabled:
+        book_similarity_task = asyncio.create_task(
+            book_recommendation_engine.run_forever(settings.book_similarity_interval_minutes)
+        )
+        print(f"📚 Book neighbours: every {settings.book_similarity_interval_minutes} min")
+    
     yield
     
     # Shutdown
+    if warmup_task:
+        warmup_task.cancel()
+    if enrichment_task:
+        enrichment_task.cancel()
+    if book_similarity_task:
+        book_similarity_task.cancel()
+    await close_http_client()
+    password_hashing_pool.shutdown()
     print("👋 Shutting down Nexus Recommendations API...")
 
 
@@ -94,6 +168,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Autoriser toutes les méthodes HTTP
     allow_headers=["*"],  # Autoriser tous les headers
+    # En-têtes lisibles par le frontend
+    expose_headers=["X-Recommendations-Age", "X-Recommendations-Stale", "X-Next-Cursor"],
 )
 
 
@@ -124,7 +200,10 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.app_name,
-        "version": settings.app_version
+        "version": settings.app_version,
+        "password_hashing": password_hashing_pool.stats(),
+        "token_cache": AuthService.token_cache_stats(),
+        "user_cache": AuthService.user_cache_stats()
     }
 
 
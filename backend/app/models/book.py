@@ -2,8 +2,9 @@
 Modèles Book et BookRating - Gestion des livres via Google Books API
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, ARRAY, Text, DECIMAL, CheckConstraint, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, ARRAY, Text, DECIMAL, CheckConstraint, UniqueConstraint, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -28,6 +29,10 @@ class Book(Base):
     isbn_13 = Column(String(20))
     average_rating = Column(DECIMAL(3, 2))  # Note Google Books (ex: 4.5)
     ratings_count = Column(Integer)  # Nombre de notes Google Books
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', immutable_array_to_string(authors, ' ')), 'B')",
+        persisted=True
+    )))  # Recherche plein texte locale (voir services/catalog_search.py)
     
     # Métadonnées
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -36,6 +41,12 @@ class Book(Base):
     # Relations
     ratings = relationship("BookRating", back_populates="book", cascade="all, delete-orphan")
     
+    # Index GIN : plein texte (search_vector @@ tsquery) et trigrammes (title % terme)
+    __table_args__ = (
+        Index("idx_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_books_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+    
     def __repr__(self):
         return f"<Book(google_books_id='{self.google_books_id}', title='{self.title}')>"
 
@@ -2,8 +2,9 @@
 Modèles Movie, Genre, MovieGenre - Films et leurs genres
 """
 
-from sqlalchemy import Column, Integer, String, Text, Date, Numeric, DateTime, ForeignKey, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, Numeric, DateTime, ForeignKey, BigInteger, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -30,11 +31,23 @@ class Movie(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Recherche plein texte locale (colonne générée, voir services/catalog_search.py)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', coalesce(overview, '')), 'B')",
+        persisted=True
+    )))
+    
     # Relations
     genres = relationship("Genre", secondary="movie_genres", back_populates="movies")
     ratings = relationship("Rating", back_populates="movie", cascade="all, delete-orphan")
     recommendations = relationship("Recommendation", back_populates="movie", cascade="all, delete-orphan")
     
+    # Index GIN : plein texte (search_vector @@ tsquery) et trigrammes (title % terme)
+    __table_args__ = (
+        Index("idx_movies_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_movies_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+    
     def __repr__(self):
         return f"<Movie(id={self.id}, title='{self.title}')>"
 
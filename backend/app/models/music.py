@@ -1,9 +1,10 @@
 """
-Modèles Track, Artist et MusicRating - Gestion de la musique via Spotify
+Modèles Track, ArtistGenre et MusicRating - Gestion de la musique via Spotify
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, BigInteger, CheckConstraint, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, LargeBinary, Text, CheckConstraint, UniqueConstraint, Index, Computed
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR  # ARRAY PostgreSQL : opérateur && (overlap)
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -18,13 +19,19 @@ class Track(Base):
     spotify_id = Column(String(100), unique=True, nullable=False, index=True)
     title = Column(String(500), nullable=False, index=True)
     artist = Column(String(500), nullable=False, index=True)
+    artist_spotify_id = Column(String(100), index=True)  # Artiste principal (pour les genres)
     album = Column(String(500))
     release_year = Column(Integer)
     preview_url = Column(String(500))  # URL du preview 30s MP3
     image_url = Column(String(500))  # URL de la pochette d'album
     duration_ms = Column(BigInteger)
     popularity = Column(Integer)  # Score de popularité Spotify (0-100)
-    genres = Column(JSON, default=list)  # Liste des genres musicaux
+    genres = Column(ARRAY(Text), default=list)  # Genres de l'artiste (voir ArtistGenre)
+    audio_features = Column(LargeBinary)  # Vecteur float32 (voir services/audio_features.py)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', coalesce(artist, '')), 'A')",
+        persisted=True
+    )))  # Recherche plein texte locale (voir services/catalog_search.py)
     
     # Métadonnées
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -34,10 +41,36 @@ class Track(Base):
     ratings = relationship("MusicRating", back_populates="track", cascade="all, delete-orphan")
     recommendations = relationship("MusicRecommendation", back_populates="track", cascade="all, delete-orphan")
     
+    # Index GIN : recherche des pistes partageant un genre (genres && ARRAY[...])
+    __table_args__ = (
+        Index("idx_tracks_genres", "genres", postgresql_using="gin"),
+        Index("idx_tracks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_tracks_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("idx_tracks_artist_trgm", "artist", postgresql_using="gin", postgresql_ops={"artist": "gin_trgm_ops"}),
+    )
+    
     def __repr__(self):
         return f"<Track(spotify_id='{self.spotify_id}', title='{self.title}', artist='{self.artist}')>"
 
 
+class ArtistGenre(Base):
+    """
+    Genres d'un artiste Spotify, mis en cache localement
+
+    Spotify n'associe des genres qu'aux artistes : ils sont récupérés
+    par lots (/artists?ids=) puis recopiés dans tracks.genres.
+    """
+    __tablename__ = "artist_genres"
+    
+    spotify_id = Column(String(100), primary_key=True)
+    name = Column(String(500))
+    genres = Column(ARRAY(Text), default=list)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ArtistGenre(spotify_id='{self.spotify_id}', genres={self.genres})>"
+
+
 class MusicRating(Base):
     """
     Note attribuée par un utilisateur à une piste musicale
@@ -2,7 +2,7 @@
 Modèle Rating - Notes des utilisateurs sur les films
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -22,6 +22,8 @@ class Rating(Base):
     __table_args__ = (
         CheckConstraint('rating >= 1 AND rating <= 5', name='rating_range_check'),
         UniqueConstraint('user_id', 'movie_id', name='unique_user_movie_rating'),
+        # Pagination par curseur de GET /ratings (updated_at DESC, id DESC)
+        Index('idx_ratings_user_updated', 'user_id', 'updated_at', 'id'),
     )
     
     # Relations
@@ -60,4 +60,13 @@ class MusicRecommendation(Base, RecommendationMixin):
     
     # Relations
     user = relationship("User", back_populates="music_recommendations")
-    track = relationship("Track", back_populates="recommendations")
\ No newline at end of file
+    track = relationship("Track", back_populates="recommendations")
+
+
+class MusicRecommendationRun(Base):
+    """Date de la dernière génération des recommandations musicales d'un utilisateur
+    (enregistrée même quand la génération ne produit aucune recommandation)"""
+    __tablename__ = "music_recommendation_runs"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
@@ -53,4 +53,28 @@ class MovieSimilarity(Base):
     )
     
     def __repr__(self):
-        return f"<MovieSimilarity(movie1={self.movie_id_1}, movie2={self.movie_id_2}, score={self.similarity_score})>"
\ No newline at end of file
+        return f"<MovieSimilarity(movie1={self.movie_id_1}, movie2={self.movie_id_2}, score={self.similarity_score})>"
+
+class BookSimilarity(Base):
+    """
+    Voisins précalculés entre livres (filtrage collaboratif + contenu)
+    Score basé sur les notes communes, les auteurs et les catégories
+    """
+    __tablename__ = "book_similarity"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    book_id_1 = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    book_id_2 = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    similarity_score = Column(Numeric(5, 3), nullable=False, index=True)
+    common_ratings_count = Column(Integer, nullable=False, default=0)
+    calculated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Contraintes
+    __table_args__ = (
+        CheckConstraint('similarity_score >= 0 AND similarity_score <= 1', name='book_similarity_score_check'),
+        CheckConstraint('book_id_1 < book_id_2', name='book_order_check'),
+        UniqueConstraint('book_id_1', 'book_id_2', name='unique_book_pair'),
+    )
+    
+    def __repr__(self):
+        return f"<BookSimilarity(book1={self.book_id_1}, book2={self.book_id_2}, score={self.similarity_score})>"
\ No newline at end of file
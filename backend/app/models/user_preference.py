@@ -16,7 +16,9 @@ class UserMoviePreference(Base):
     favorite_genres = Column(JSON)  # {"Action": 15, "Drama": 10, ...}
     average_rating = Column(Numeric(3, 2))
     total_ratings = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)  # Somme des notes (tenue à jour par trigger)
     highly_rated_count = Column(Integer, default=0)  # Films notés 4-5
+    rating_distribution = Column(JSON)  # {"1": 2, "2": 0, ..., "5": 4}
     last_rating_date = Column(DateTime(timezone=True))
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
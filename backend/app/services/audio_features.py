@@ -0,0 +1,131 @@
+"""
+Caractéristiques audio - Vecteurs float32 compacts décrivant chaque piste
+
+Chaque piste porte un vecteur de FEATURE_KEYS normalisé dans [0, 1],
+stocké sous forme binaire (float32 contigus) dans tracks.audio_features.
+Un vecteur vide (b"") signifie que le fournisseur n'a rien renvoyé.
+
+Deux fournisseurs interchangeables (setting audio_features_provider):
+- "spotify": endpoint /audio-features?ids= par lots de 100 (Spotify
+  répond 403 aux applications qui n'ont pas accès à cet endpoint)
+- "fixture": fichier JSON local {spotify_id: {feature: valeur}} pour
+  les tests et les environnements sans accès à Spotify
+Par défaut ("none"), aucune caractéristique audio n'est récupérée.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from app.config import settings
+
+
+FEATURE_KEYS = [
+    "danceability",
+    "energy",
+    "valence",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "speechiness",
+    "tempo",
+    "loudness",
+]
+
+# Bornes de normalisation des caractéristiques non comprises dans [0, 1]
+_RANGES = {
+    "tempo": (40.0, 220.0),  # BPM
+    "loudness": (-60.0, 0.0),  # dB
+}
+
+TRACKS_PER_REQUEST = 100  # Maximum accepté par /audio-features?ids=
+
+
+def pack_features(features: Optional[Dict[str, Any]]) -> bytes:
+    """
+    Convertit les caractéristiques d'une piste en vecteur float32 binaire
+
+    Args:
+        features: Réponse Spotify pour une piste (ou None)
+
+    Returns:
+        Octets du vecteur normalisé (b"" si aucune donnée)
+    """
+    if not features:
+        return b""
+
+    values = []
+    for key in FEATURE_KEYS:
+        value = float(features.get(key) or 0.0)
+        low, high = _RANGES.get(key, (0.0, 1.0))
+        values.append(min(1.0, max(0.0, (value - low) / (high - low))))
+
+    return np.asarray(values, dtype=np.float32).tobytes()
+
+
+def unpack_features(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """
+    Relit un vecteur stocké par pack_features
+
+    Returns:
+        Vecteur float32, ou None si absent ou vide
+    """
+    if not data:
+        return None
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class SpotifyAudioFeatureProvider:
+    """Caractéristiques audio depuis l'API Spotify"""
+
+    def __init__(self, spotify_service=None):
+        # Import local : spotify_service importe l'index des pistes, qui importe ce module
+        from app.services.spotify_service import SpotifyService
+
+        self.spotify_service = spotify_service or SpotifyService()
+
+    async def get_features(self, spotify_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Args:
+            spotify_ids: IDs Spotify des pistes
+
+        Returns:
+            Dict {spotify_id: caractéristiques} pour les pistes trouvées
+        """
+        features = await self.spotify_service.get_audio_features(spotify_ids)
+        return {item["id"]: item for item in features}
+
+
+class FixtureAudioFeatureProvider:
+    """Caractéristiques audio depuis un fichier JSON local"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.audio_features_fixture_path
+        self._features: Optional[Dict[str, Dict[str, Any]]] = None
+
+    async def get_features(self, spotify_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Args:
+            spotify_ids: IDs Spotify des pistes
+
+        Returns:
+            Dict {spotify_id: caractéristiques} pour les pistes présentes
+        """
+        if self._features is None:
+            with open(self.path, encoding="utf-8") as f:
+                self._features = json.load(f)
+
+        return {
+            spotify_id: self._features[spotify_id]
+            for spotify_id in spotify_ids
+            if spotify_id in self._features
+        }
+
+
+def get_audio_feature_provider():
+    """Fournisseur configuré (audio_features_provider), ou None s'il est désactivé"""
+    if settings.audio_features_provider == "fixture":
+        return FixtureAudioFeatureProvider()
+    if settings.audio_features_provider == "spotify":
+        return SpotifyAudioFeatureProvider()
+    return None
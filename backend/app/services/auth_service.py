@@ -2,22 +2,63 @@
 Service d'authentification - JWT et hashing de mots de passe
 """
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.config import settings
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services.cache import TTLCache
+from app.services.password_hashing import password_hashing_pool
 
 
 # Configuration du hashing - utiliser Argon2 (supporte les mots de passe longs)
 # Argon2 est moderne et ne souffre pas de la limite de 72 octets de bcrypt.
 # On garde bcrypt_sha256 et bcrypt en fallback pour compatibilité.
-pwd_context = CryptContext(schemes=["argon2", "bcrypt_sha256", "bcrypt"], deprecated="auto")
+# Paramètres Argon2 réglables (voir app/devtools/login_benchmark.py) ; les
+# hashes existants restent vérifiables quels que soient leurs paramètres.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt_sha256", "bcrypt"],
+    deprecated="auto",
+    argon2__rounds=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
+
+
+# Utilisateurs authentifiés récemment (user_id -> colonnes), pour éviter une
+# requête SQL par appel authentifié. Le hash du mot de passe n'y est pas
+# conservé. Invalidé à chaque modification ou suppression d'un User via
+# l'ORM ; la durée de vie courte borne le retard des autres workers.
+_user_cache = TTLCache(
+    max_size=settings.user_cache_size,
+    ttl_seconds=settings.user_cache_ttl_seconds
+)
+_USER_CACHED_COLUMNS = tuple(
+    attribute.key for attribute in User.__mapper__.column_attrs if attribute.key != "password_hash"
+)
+
+
+# Tokens déjà vérifiés (sha256 du token -> TokenData), jusqu'à leur
+# expiration : le frontend réutilise le même token pour chaque requête.
+_token_cache = TTLCache(
+    max_size=settings.token_cache_size,
+    ttl_seconds=settings.access_token_expire_minutes * 60
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Retire du cache un utilisateur modifié, désactivé ou supprimé"""
+    _user_cache.delete(target.id)
 
 
 class AuthService:
@@ -47,6 +88,16 @@ class AuthService:
         # Verify using the same context. Argon2 doesn't require truncation.
         return pwd_context.verify(plain_password, hashed_password)
     
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash un mot de passe dans le pool dédié (sans bloquer la boucle asyncio)"""
+        return await password_hashing_pool.run(AuthService.hash_password, password)
+    
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Vérifie un mot de passe dans le pool dédié (sans bloquer la boucle asyncio)"""
+        return await password_hashing_pool.run(AuthService.verify_password, plain_password, hashed_password)
+    
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """
@@ -91,6 +142,12 @@ class AuthService:
             headers={"WWW-Authenticate": "Bearer"},
         )
         
+        # Signature déjà vérifiée pour ce token (entrée retirée à son expiration)
+        digest = hashlib.sha256(token.encode()).digest()
+        token_data = _token_cache.get(digest)
+        if token_data is not None:
+            return token_data
+        
         try:
             payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
             user_id: int = payload.get("user_id")
@@ -99,13 +156,19 @@ class AuthService:
             if user_id is None or email is None:
                 raise credentials_exception
             
-            return TokenData(user_id=user_id, email=email)
+            token_data = TokenData(user_id=user_id, email=email)
+            
+            expires_at = payload.get("exp")
+            if isinstance(expires_at, (int, float)):
+                _token_cache.set(digest, token_data, ttl=expires_at - time.time())
+            
+            return token_data
         
         except JWTError:
             raise credentials_exception
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         """
         Authentifie un utilisateur
         
@@ -122,7 +185,7 @@ class AuthService:
         if not user:
             return None
         
-        if not AuthService.verify_password(password, user.password_hash):
+        if not await AuthService.verify_password_async(password, user.password_hash):
             return None
         
         return user
@@ -141,9 +204,46 @@ class AuthService:
     def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
         """Récupère un utilisateur par ID"""
         return db.query(User).filter(User.id == user_id).first()
-    
+
+    @staticmethod
+    def get_cached_user(db: Session, user_id: int) -> Optional[User]:
+        """
+        Récupère un utilisateur par ID, depuis le cache si possible
+
+        L'instance renvoyée est rattachée à la session sans requête SQL
+        (les relations et le hash du mot de passe restent chargeables).
+
+        Args:
+            db: Session de base de données
+            user_id: ID de l'utilisateur
+
+        Returns:
+            User ou None s'il n'existe pas
+        """
+        values = _user_cache.get(user_id)
+
+        if values is None:
+            user = AuthService.get_user_by_id(db, user_id)
+            if user is not None:
+                _user_cache.set(user_id, {key: getattr(user, key) for key in _USER_CACHED_COLUMNS})
+            return user
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    @staticmethod
+    def token_cache_stats() -> dict:
+        """Statistiques du cache des tokens vérifiés"""
+        return _token_cache.stats()
+
+    @staticmethod
+    def user_cache_stats() -> dict:
+        """Statistiques du cache des utilisateurs authentifiés"""
+        return _user_cache.stats()
+
     @staticmethod
-    def create_user(db: Session, username: str, email: str, password: str) -> User:
+    async def create_user(db: Session, username: str, email: str, password: str) -> User:
         """
         Crée un nouvel utilisateur
         
@@ -174,7 +274,7 @@ class AuthService:
             )
         
         # Créer l'utilisateur
-        hashed_password = AuthService.hash_password(password)
+        hashed_password = await AuthService.hash_password_async(password)
         user = User(
             username=username,
             email=email,
@@ -0,0 +1,305 @@
+"""
+Autocomplétion - Index de préfixes en mémoire sur le catalogue local
+
+Titres de films, de pistes et de livres, artistes et auteurs sont
+normalisés (minuscules, sans accents ni ponctuation) puis rangés dans un
+tableau trié : les complétions d'un préfixe forment une plage contiguë
+trouvée par dichotomie. Chaque mot du libellé ouvre une clé, pour que
+"wars" complète "Star Wars".
+
+Les préfixes courts (plages trop larges pour être parcourues) gardent en
+cache leurs meilleures entrées par popularité, mises à jour à chaque ajout.
+Quelques entrées de réserve absorbent les retraits ; une liste épuisée
+n'est reconstruite qu'à sa prochaine lecture.
+"""
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.movie import Movie
+from app.models.music import Track
+
+
+KINDS = ("movie", "track", "artist", "book", "author")
+MAX_WORD_KEYS = 4  # Mots du libellé pouvant ouvrir une complétion
+CACHED_PREFIX_LENGTH = 3  # Préfixes dont les meilleures entrées sont en cache
+TOP_SIZE = 20  # Entrées servies par préfixe en cache (limite max des réponses)
+TOP_SPARE = 10  # Entrées de réserve par préfixe en cache
+WEIGHT_EPSILON = 0.05  # Écart de poids (log) en dessous duquel une mise à jour est ignorée
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Forme normalisée d'un libellé ou d'une saisie
+
+    Args:
+        text: Texte brut
+
+    Returns:
+        Texte en minuscules, sans accents, mots séparés par un espace
+    """
+    if not text:
+        return ""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_ALNUM.sub(" ", text.lower()).split())
+
+
+def popularity_weight(value: Any) -> float:
+    """Poids d'une entrée (échelle logarithmique, les sources n'ont pas la même échelle)"""
+    return math.log1p(max(0.0, float(value or 0)))
+
+
+class PrefixIndex:
+    """
+    Index de préfixes partagé par tout le processus
+
+    Chargé au démarrage depuis le catalogue local, puis complété à chaque
+    sauvegarde de films, pistes ou livres.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str, Any]] = []  # (clé, type, ref) triés
+        self._entries: Dict[Tuple[str, Any], Tuple[str, float, Tuple[str, ...]]] = {}  # (type, ref) -> (libellé, poids, clés)
+        self._top: Dict[Tuple[str, str], List[Tuple[float, Any]]] = {}  # (type, préfixe) -> [(-poids, ref)] triés
+        self._truncated: set = set()  # (type, préfixe) dont des entrées ne sont pas en cache
+        self._stale: set = set()  # (type, préfixe) à reconstruire à la prochaine lecture
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @staticmethod
+    def _keys_for(label: str) -> Tuple[str, ...]:
+        """Clés d'un libellé : le libellé normalisé à partir de chacun de ses premiers mots"""
+        words = normalize(label).split()
+        return tuple(dict.fromkeys(" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_KEYS))))
+
+    @staticmethod
+    def _prefixes(keys: Iterable[str]) -> set:
+        """Préfixes en cache couverts par un ensemble de clés"""
+        return {key[:length] for key in keys for length in range(1, min(len(key), CACHED_PREFIX_LENGTH) + 1)}
+
+    def load(self, db: Session) -> None:
+        """
+        (Re)construit l'index depuis les tables movies, tracks et books
+
+        Args:
+            db: Session de base de données
+        """
+        entries = {}
+
+        def collect(kind: str, ref: Any, label: Optional[str], weight: float, aggregate: bool = False) -> None:
+            if not label:
+                return
+            current = entries.get((kind, ref))
+            if aggregate and current is not None:
+                weight = max(weight, current[1])
+            entries[(kind, ref)] = (label, weight)
+
+        for movie_id, title, popularity in db.query(Movie.id, Movie.title, Movie.popularity):
+            collect("movie", movie_id, title, popularity_weight(popularity))
+
+        for spotify_id, title, artist, popularity in db.query(Track.spotify_id, Track.title, Track.artist, Track.popularity):
+            weight = popularity_weight(popularity)
+            collect("track", spotify_id, title, weight)
+            collect("artist", artist, artist, weight, aggregate=True)
+
+        for google_books_id, title, authors, ratings_count in db.query(
+            Book.google_books_id, Book.title, Book.authors, Book.ratings_count
+        ):
+            weight = popularity_weight(ratings_count)
+            collect("book", google_books_id, title, weight)
+            for author in authors or []:
+                collect("author", author, author, weight, aggregate=True)
+
+        # Construction en une fois (un tri) plutôt qu'insertion par insertion
+        keys = []
+        indexed = {}
+        top = {}
+        for (kind, ref), (label, weight) in entries.items():
+            entry_keys = self._keys_for(label)
+            if not entry_keys:
+                continue
+            indexed[(kind, ref)] = (label, weight, entry_keys)
+            keys.extend((key, kind, ref) for key in entry_keys)
+            for prefix in self._prefixes(entry_keys):
+                top.setdefault((kind, prefix), []).append((-weight, ref))
+
+        truncated = {prefix for prefix, ranked in top.items() if len(ranked) > TOP_SIZE + TOP_SPARE}
+        top = {prefix: heapq.nsmallest(TOP_SIZE + TOP_SPARE, ranked) for prefix, ranked in top.items()}
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._entries = indexed
+            self._top = top
+            self._truncated = truncated
+            self._stale = set()
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Construit l'index s'il ne l'a pas encore été"""
+        if not self.loaded:
+            self.load(db)
+
+    def add(self, kind: str, ref: Any, label: Optional[str], popularity: Any = None, aggregate: bool = False) -> None:
+        """
+        Ajoute ou met à jour une entrée
+
+        Sans effet tant que l'index n'est pas chargé : le chargement
+        lira l'entrée depuis la base.
+
+        Args:
+            kind: Type d'entrée (voir KINDS)
+            ref: Identifiant renvoyé au client (ID TMDB, Spotify, Google Books, ou nom)
+            label: Libellé affiché
+            popularity: Popularité brute de la source
+            aggregate: Conserver le poids maximum (artistes, auteurs)
+        """
+        if not self.loaded or not label:
+            return
+
+        weight = popularity_weight(popularity)
+        entry_keys = self._keys_for(label)
+
+        with self._lock:
+            current = self._entries.get((kind, ref))
+            if current is not None:
+                if aggregate:
+                    weight = max(weight, current[1])
+                # Popularité à peine changée (TMDB la fait varier en continu) : rien à faire
+                if current[0] == label and abs(current[1] - weight) < WEIGHT_EPSILON:
+                    return
+                self._remove(kind, ref, current)
+
+            if not entry_keys:
+                return
+
+            self._entries[(kind, ref)] = (label, weight, entry_keys)
+            for key in entry_keys:
+                insort(self._keys, (key, kind, ref))
+            for prefix in self._prefixes(entry_keys):
+                ranked = self._top.setdefault((kind, prefix), [])
+                if (kind, prefix) in self._truncated and ranked and (-weight, ref) > ranked[-1]:
+                    continue  # Sous la dernière entrée en cache : reste hors cache
+                insort(ranked, (-weight, ref))
+                if len(ranked) > TOP_SIZE + TOP_SPARE:
+                    del ranked[TOP_SIZE + TOP_SPARE:]
+                    self._truncated.add((kind, prefix))
+
+    def _remove(self, kind: str, ref: Any, entry: Tuple[str, float, Tuple[str, ...]]) -> None:
+        """Retire une entrée du tableau et des caches (appelé sous verrou)"""
+        _, weight, entry_keys = entry
+        del self._entries[(kind, ref)]
+
+        for key in entry_keys:
+            position = bisect_left(self._keys, (key, kind, ref))
+            if position < len(self._keys) and self._keys[position] == (key, kind, ref):
+                del self._keys[position]
+
+        for prefix in self._prefixes(entry_keys):
+            ranked = self._top.get((kind, prefix))
+            if not ranked or (-weight, ref) not in ranked:
+                continue
+            ranked.remove((-weight, ref))
+            if len(ranked) < TOP_SIZE and (kind, prefix) in self._truncated:
+                # Réserve épuisée : des entrées hors cache peuvent y entrer
+                self._stale.add((kind, prefix))
+
+    def _top_entries(self, kind: str, prefix: str) -> List[Tuple[float, Any]]:
+        """Meilleures entrées en cache d'un préfixe, reconstruites si épuisées (appelé sous verrou)"""
+        if (kind, prefix) in self._stale:
+            self._stale.discard((kind, prefix))
+            ranked = [(-score, match) for score, _, match in self._scan(prefix, (kind,), TOP_SIZE + TOP_SPARE + 1)]
+            if len(ranked) > TOP_SIZE + TOP_SPARE:
+                del ranked[TOP_SIZE + TOP_SPARE:]
+            else:
+                self._truncated.discard((kind, prefix))
+            self._top[(kind, prefix)] = ranked
+        return self._top.get((kind, prefix), [])
+
+    def add_movies(self, movies: Iterable[Movie]) -> None:
+        """Indexe des films sauvegardés"""
+        for movie in movies:
+            self.add("movie", movie.id, movie.title, movie.popularity)
+
+    def add_tracks(self, tracks: Iterable[Track]) -> None:
+        """Indexe des pistes sauvegardées et leurs artistes"""
+        for track in tracks:
+            self.add("track", track.spotify_id, track.title, track.popularity)
+            self.add("artist", track.artist, track.artist, track.popularity, aggregate=True)
+
+    def add_books(self, books: Iterable[Book]) -> None:
+        """Indexe des livres sauvegardés et leurs auteurs"""
+        for book in books:
+            self.add("book", book.google_books_id, book.title, book.ratings_count)
+            for author in book.authors or []:
+                self.add("author", author, author, book.ratings_count, aggregate=True)
+
+    def _scan(self, prefix: str, kinds: Sequence[str], limit: int) -> List[Tuple[float, str, Any]]:
+        """
+        Parcourt la plage des clés commençant par prefix (appelé sous verrou)
+
+        Returns:
+            Les limit meilleures entrées [(poids, type, ref)], par poids décroissant
+        """
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\uffff",), lo)
+
+        matches = {}
+        for _, kind, ref in self._keys[lo:hi]:
+            if kind in kinds:
+                matches[(kind, ref)] = self._entries[(kind, ref)][1]
+
+        best = heapq.nsmallest(limit, matches.items(), key=lambda item: (-item[1], item[0][0], str(item[0][1])))
+        return [(weight, kind, ref) for (kind, ref), weight in best]
+
+    def complete(self, text: str, kinds: Sequence[str] = KINDS, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Meilleures complétions d'une saisie
+
+        Args:
+            text: Saisie de l'utilisateur
+            kinds: Types d'entrées recherchés
+            limit: Nombre maximum de complétions (au plus TOP_SIZE)
+
+        Returns:
+            Liste de {"type", "id", "text", "score"} par popularité décroissante
+        """
+        prefix = normalize(text)
+        if not prefix:
+            return []
+
+        limit = min(limit, TOP_SIZE)
+
+        with self._lock:
+            if len(prefix) <= CACHED_PREFIX_LENGTH:
+                candidates = heapq.nsmallest(limit, (
+                    (negative_weight, kind, ref)
+                    for kind in kinds
+                    for negative_weight, ref in self._top_entries(kind, prefix)[:TOP_SIZE]
+                ), key=lambda item: (item[0], item[1], str(item[2])))
+                best = [(-negative_weight, kind, ref) for negative_weight, kind, ref in candidates]
+            else:
+                best = self._scan(prefix, kinds, limit)
+
+            return [
+                {"type": kind, "id": ref, "text": self._entries[(kind, ref)][0], "score": round(weight, 3)}
+                for weight, kind, ref in best
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Instance globale partagée par les routes et les services
+autocomplete_index = PrefixIndex()
@@ -0,0 +1,315 @@
+"""
+Moteur de Recommandation de Livres
+Filtrage collaboratif item-item sur book_ratings + similarité de contenu
+(auteurs, catégories), avec voisins précalculés dans book_similarity
+
+Les voisins sont recalculés périodiquement (tâche de fond démarrée depuis
+le lifespan) ou en CLI:
+    python -m app.services.book_recommendation_engine
+    python -m app.services.book_recommendation_engine --loop
+"""
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.book import Book, BookRating
+from app.models.similarity import BookSimilarity
+
+
+AUTHOR_BONUS = 0.3  # Bonus de similarité pour deux livres d'un même auteur
+MIN_COMMON_RATINGS = 2  # Notes communes minimum pour une similarité collaborative
+
+
+class BookRecommendationEngine:
+    """
+    Moteur de recommandation de livres hybride
+
+    Algorithmes:
+    1. Filtrage collaboratif (Item-Based): cosinus ajusté entre livres sur
+       les notes centrées par utilisateur (les biais de notation s'annulent)
+    2. Filtrage basé contenu: Jaccard sur les catégories + bonus même auteur
+    3. Hybride: les deux scores sont pondérés puis les meilleurs voisins de
+       chaque livre noté sont enregistrés dans book_similarity
+
+    Les recommandations d'un utilisateur se lisent ensuite en une requête
+    sur les voisins de ses livres bien notés.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.collaborative_weight = settings.collaborative_weight
+        self.content_weight = settings.content_weight
+        self.min_similarity = settings.min_similarity_score
+        self.neighbours_count = settings.book_neighbours_count
+
+    def compute_similarities(self) -> int:
+        """
+        Recalcule tous les voisins des livres notés et remplace book_similarity
+
+        Returns:
+            Nombre de paires enregistrées
+        """
+        ratings = self.db.query(BookRating.user_id, BookRating.book_id, BookRating.rating).all()
+        rated_book_ids = sorted({book_id for _, book_id, _ in ratings})
+
+        collaborative = self._collaborative_similarities(ratings)
+        content = self._content_similarities(rated_book_ids)
+
+        # Meilleurs voisins de chaque livre noté, paires rangées (id_1 < id_2)
+        pairs: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        for book_id in rated_book_ids:
+            neighbours = []
+            for other_id in collaborative.get(book_id, {}).keys() | content.get(book_id, {}).keys():
+                collab_score, common = collaborative.get(book_id, {}).get(other_id, (0.0, 0))
+                content_score = content.get(book_id, {}).get(other_id, 0.0)
+
+                if common >= MIN_COMMON_RATINGS:
+                    score = self.collaborative_weight * collab_score + self.content_weight * content_score
+                else:
+                    # Pas assez de lecteurs communs : contenu seul
+                    score = content_score
+
+                if score >= self.min_similarity:
+                    neighbours.append((other_id, score, common))
+
+            neighbours.sort(key=lambda x: (-x[1], x[0]))
+            for other_id, score, common in neighbours[:self.neighbours_count]:
+                key = (min(book_id, other_id), max(book_id, other_id))
+                pairs[key] = max(pairs.get(key, (0.0, 0)), (score, common))
+
+        rows = [
+            {
+                "book_id_1": book_id_1,
+                "book_id_2": book_id_2,
+                "similarity_score": round(min(1.0, score), 3),
+                "common_ratings_count": common,
+            }
+            for (book_id_1, book_id_2), (score, common) in sorted(pairs.items())
+        ]
+
+        # Remplacement complet dans une seule transaction
+        self.db.query(BookSimilarity).delete(synchronize_session=False)
+        if rows:
+            self.db.execute(pg_insert(BookSimilarity).values(rows))
+        self.db.commit()
+
+        return len(rows)
+
+    def _collaborative_similarities(
+        self,
+        ratings: List[Tuple[int, int, int]]
+    ) -> Dict[int, Dict[int, Tuple[float, int]]]:
+        """
+        Cosinus ajusté entre livres (matrice creuse livres x utilisateurs)
+
+        Args:
+            ratings: Liste de (user_id, book_id, rating)
+
+        Returns:
+            Dict {book_id: {autre_book_id: (similarité, notes communes)}}
+        """
+        if not ratings:
+            return {}
+
+        user_ids = sorted({user_id for user_id, _, _ in ratings})
+        book_ids = sorted({book_id for _, book_id, _ in ratings})
+        user_pos = {user_id: i for i, user_id in enumerate(user_ids)}
+        book_pos = {book_id: i for i, book_id in enumerate(book_ids)}
+
+        rows = np.array([book_pos[book_id] for _, book_id, _ in ratings])
+        cols = np.array([user_pos[user_id] for user_id, _, _ in ratings])
+        values = np.array([rating for _, _, rating in ratings], dtype=np.float64)
+
+        # Centrer les notes sur la moyenne de chaque utilisateur
+        user_sums = np.bincount(cols, weights=values, minlength=len(user_ids))
+        user_counts = np.bincount(cols, minlength=len(user_ids))
+        values = values - (user_sums / user_counts)[cols]
+
+        shape = (len(book_ids), len(user_ids))
+        centred = csr_matrix((values, (rows, cols)), shape=shape)
+        rated = csr_matrix((np.ones(len(ratings)), (rows, cols)), shape=shape)
+
+        norms = np.sqrt(np.asarray(centred.multiply(centred).sum(axis=1)).ravel())
+        inverse_norms = np.where(norms > 0, 1.0 / np.where(norms > 0, norms, 1.0), 0.0)
+
+        dot = (centred @ centred.T).tocoo()
+        common = (rated @ rated.T).todok()
+
+        similarities: Dict[int, Dict[int, Tuple[float, int]]] = defaultdict(dict)
+        for i, j, value in zip(dot.row, dot.col, dot.data):
+            if i == j:
+                continue
+            similarity = value * inverse_norms[i] * inverse_norms[j]
+            if similarity <= 0:
+                continue
+            similarities[book_ids[i]][book_ids[j]] = (float(min(1.0, similarity)), int(common[i, j]))
+
+        return similarities
+
+    def _content_similarities(self, book_ids: List[int]) -> Dict[int, Dict[int, float]]:
+        """
+        Jaccard sur les catégories + bonus même auteur, via index inversé
+
+        Seuls les livres notés servent de référence ; les candidats
+        couvrent tout le catalogue local.
+
+        Args:
+            book_ids: Livres de référence
+
+        Returns:
+            Dict {book_id: {autre_book_id: similarité}}
+        """
+        if not book_ids:
+            return {}
+
+        books = self.db.query(Book.id, Book.authors, Book.categories).all()
+
+        categories_by_book = {}
+        authors_by_book = {}
+        books_by_category = defaultdict(set)
+        books_by_author = defaultdict(set)
+        for book_id, authors, categories in books:
+            categories_by_book[book_id] = frozenset(categories or [])
+            authors_by_book[book_id] = frozenset(authors or [])
+            for category in categories_by_book[book_id]:
+                books_by_category[category].add(book_id)
+            for author in authors_by_book[book_id]:
+                books_by_author[author].add(book_id)
+
+        similarities: Dict[int, Dict[int, float]] = {}
+        for book_id in book_ids:
+            categories = categories_by_book.get(book_id, frozenset())
+
+            # Nombre de catégories communes avec chaque candidat
+            shared = Counter()
+            for category in categories:
+                shared.update(books_by_category[category])
+
+            same_author = set()
+            for author in authors_by_book.get(book_id, frozenset()):
+                same_author |= books_by_author[author]
+
+            scores = {}
+            for other_id in shared.keys() | same_author:
+                if other_id == book_id:
+                    continue
+
+                common = shared.get(other_id, 0)
+                union = len(categories) + len(categories_by_book[other_id]) - common
+                category_similarity = common / union if union > 0 else 0
+
+                author_bonus = AUTHOR_BONUS if other_id in same_author else 0
+                scores[other_id] = min(1.0, category_similarity + author_bonus)
+
+            similarities[book_id] = scores
+
+        return similarities
+
+    def recommend(self, user_id: int, limit: int) -> List[Book]:
+        """
+        Recommandations locales à partir des voisins précalculés
+
+        Args:
+            user_id: ID de l'utilisateur
+            limit: Nombre maximum de livres
+
+        Returns:
+            Livres non notés triés par score décroissant (vide en cold start)
+        """
+        user_ratings = dict(
+            self.db.query(BookRating.book_id, BookRating.rating).filter(
+                BookRating.user_id == user_id
+            ).all()
+        )
+        liked = {book_id: rating for book_id, rating in user_ratings.items() if rating >= 4}
+
+        if not liked:
+            return []
+
+        neighbours = self.db.query(
+            BookSimilarity.book_id_1,
+            BookSimilarity.book_id_2,
+            BookSimilarity.similarity_score
+        ).filter(
+            or_(
+                BookSimilarity.book_id_1.in_(liked.keys()),
+                BookSimilarity.book_id_2.in_(liked.keys())
+            )
+        ).all()
+
+        # Score = somme des similarités pondérées par la note donnée
+        scores = defaultdict(float)
+        for book_id_1, book_id_2, similarity in neighbours:
+            for source_id, candidate_id in ((book_id_1, book_id_2), (book_id_2, book_id_1)):
+                if source_id in liked and candidate_id not in user_ratings:
+                    scores[candidate_id] += float(similarity) * liked[source_id] / 5.0
+
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:limit]
+        if not ranked:
+            return []
+
+        books_by_id = {
+            book.id: book
+            for book in self.db.query(Book).filter(Book.id.in_([book_id for book_id, _ in ranked])).all()
+        }
+        return [books_by_id[book_id] for book_id, _ in ranked if book_id in books_by_id]
+
+
+def refresh_book_similarities() -> int:
+    """Recalcule les voisins dans une session dédiée"""
+    db = SessionLocal()
+    try:
+        return BookRecommendationEngine(db).compute_similarities()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_forever(interval_minutes: int) -> None:
+    """
+    Recalcule les voisins périodiquement (jusqu'à annulation de la tâche)
+
+    Args:
+        interval_minutes: Intervalle entre deux calculs
+    """
+    while True:
+        try:
+            pairs = await asyncio.to_thread(refresh_book_similarities)
+            print(f"[BOOK RECOMMENDATIONS] {pairs} paires de livres similaires calculées")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BOOK RECOMMENDATIONS] Erreur lors du calcul des similarités: {str(e)}")
+
+        await asyncio.sleep(interval_minutes * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcule les livres similaires (book_similarity)")
+    parser.add_argument("--loop", action="store_true",
+                        help="Relancer périodiquement (book_similarity_interval_minutes)")
+    args = parser.parse_args()
+
+    # Importer les modèles pour enregistrer les mappers SQLAlchemy
+    import app.models  # noqa: F401
+
+    if args.loop:
+        asyncio.run(run_forever(settings.book_similarity_interval_minutes))
+    else:
+        pairs = refresh_book_similarities()
+        print(f"[BOOK RECOMMENDATIONS] {pairs} paires de livres similaires calculées")
+
+
+if __name__ == "__main__":
+    main()
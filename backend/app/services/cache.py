@@ -0,0 +1,92 @@
+"""
+Cache mémoire - LRU borné avec expiration par entrée
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Cache LRU borné en taille, avec une durée de vie par entrée
+
+    Partagé au sein d'un processus (thread-safe). Chaque worker uvicorn
+    possède donc son propre cache.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Récupère une valeur non expirée
+
+        Args:
+            key: Clé de l'entrée
+            default: Valeur retournée si absente ou expirée
+
+        Returns:
+            Valeur en cache ou default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Ajoute ou remplace une entrée
+
+        Args:
+            key: Clé de l'entrée
+            value: Valeur à stocker
+            ttl: Durée de vie en secondes (défaut: ttl_seconds du cache)
+        """
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Supprime une entrée (sans erreur si absente)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques d'utilisation du cache
+
+        Returns:
+            Dict avec taille, hits, misses et taux de succès
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,171 @@
+"""
+Préchauffage du catalogue - Crawl des listes TMDB vers la base locale
+
+Utilisable comme tâche de fond (démarrée depuis le lifespan) ou en CLI:
+    python -m app.services.catalog_crawler --pages 3
+    python -m app.services.catalog_crawler --pages 3 --loop
+"""
+
+import argparse
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.tmdb_service import TMDBService
+
+
+class CatalogCrawler:
+    """
+    Crawl les premières pages des listes TMDB (populaires, mieux notés,
+    à l'affiche) ainsi que les détails des films et séries référencés,
+    puis les persiste en masse dans movies / tv_shows.
+
+    Le premier utilisateur après un déploiement ne paie ainsi plus le
+    coût de persistance du catalogue.
+    """
+
+    def __init__(self, tmdb_service: Optional[TMDBService] = None):
+        self.tmdb_service = tmdb_service or TMDBService()
+        self.semaphore = asyncio.Semaphore(settings.tmdb_max_concurrency)
+
+    async def _bounded(self, fetch: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Exécute un appel TMDB en respectant la limite de concurrence"""
+        async with self.semaphore:
+            return await fetch(*args)
+
+    async def _gather(self, calls: List[Awaitable[Any]], label: str) -> List[Any]:
+        """
+        Exécute des appels en parallèle en ignorant les erreurs
+
+        Returns:
+            Résultats des appels réussis
+        """
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        successes = []
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"[CATALOG] Erreur {label}: {str(result)}")
+            else:
+                successes.append(result)
+        return successes
+
+    async def crawl(self, pages: int) -> Dict[str, int]:
+        """
+        Effectue un passage complet du crawler
+
+        Args:
+            pages: Nombre de pages crawlées par liste
+
+        Returns:
+            Statistiques {"movies": n, "tv_shows": n}
+        """
+        tmdb = self.tmdb_service
+
+        # 1. Listes de films (get_popular_movies renvoie directement la liste)
+        movie_pages = await self._gather(
+            [
+                self._bounded(fetch, page)
+                for page in range(1, pages + 1)
+                for fetch in (
+                    tmdb.get_popular_movies,
+                    tmdb.get_top_rated_movies,
+                    tmdb.get_now_playing_movies
+                )
+            ],
+            "listes films"
+        )
+
+        # 2. Listes de séries
+        tv_pages = await self._gather(
+            [
+                self._bounded(fetch, page)
+                for page in range(1, pages + 1)
+                for fetch in (tmdb.get_popular_tv_shows, tmdb.get_top_rated_tv_shows)
+            ],
+            "listes séries"
+        )
+
+        movies_listed = [
+            movie_data
+            for page in movie_pages
+            for movie_data in (page if isinstance(page, list) else page.get("results", []))
+        ]
+        tv_listed = [tv_data for page in tv_pages for tv_data in page.get("results", [])]
+
+        # Persister les listes d'abord : le catalogue est utilisable même si
+        # une partie des appels de détails échoue ensuite
+        await asyncio.to_thread(self._persist, movies_listed, tv_listed)
+
+        # 3. Détails des films et séries référencés
+        movie_ids = list(dict.fromkeys(movie_data["id"] for movie_data in movies_listed))
+        tv_ids = list(dict.fromkeys(tv_data["id"] for tv_data in tv_listed))
+
+        movie_details = await self._gather(
+            [self._bounded(tmdb.get_movie_details, movie_id) for movie_id in movie_ids],
+            "détails film"
+        )
+        tv_details = await self._gather(
+            [self._bounded(tmdb.get_tv_show_details, tv_id) for tv_id in tv_ids],
+            "détails série"
+        )
+
+        await asyncio.to_thread(self._persist, movie_details, tv_details)
+
+        return {"movies": len(movie_ids), "tv_shows": len(tv_ids)}
+
+    def _persist(self, movies_data: List[Dict[str, Any]], tv_shows_data: List[Dict[str, Any]]) -> None:
+        """Persiste films et séries en masse dans une session dédiée"""
+        db = SessionLocal()
+        try:
+            self.tmdb_service.save_movies_bulk(db, movies_data)
+            self.tmdb_service.save_tv_shows_bulk(db, tv_shows_data)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run_forever(self, pages: int, interval_minutes: int) -> None:
+        """
+        Relance le crawler périodiquement (jusqu'à annulation de la tâche)
+
+        Args:
+            pages: Nombre de pages crawlées par liste
+            interval_minutes: Intervalle entre deux passages
+        """
+        while True:
+            try:
+                stats = await self.crawl(pages)
+                print(f"[CATALOG] Catalogue préchauffé: {stats['movies']} films, {stats['tv_shows']} séries")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[CATALOG] Erreur lors du préchauffage: {str(e)}")
+
+            await asyncio.sleep(interval_minutes * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Préchauffe le catalogue local depuis TMDB")
+    parser.add_argument("--pages", type=int, default=settings.catalog_warmup_pages,
+                        help="Nombre de pages crawlées par liste")
+    parser.add_argument("--loop", action="store_true",
+                        help="Relancer périodiquement (catalog_warmup_interval_minutes)")
+    args = parser.parse_args()
+
+    # Importer les modèles pour enregistrer les mappers SQLAlchemy
+    import app.models  # noqa: F401
+
+    crawler = CatalogCrawler()
+
+    if args.loop:
+        asyncio.run(crawler.run_forever(args.pages, settings.catalog_warmup_interval_minutes))
+    else:
+        stats = asyncio.run(crawler.crawl(args.pages))
+        print(f"[CATALOG] Catalogue préchauffé: {stats['movies']} films, {stats['tv_shows']} séries")
+
+
+if __name__ == "__main__":
+    main()
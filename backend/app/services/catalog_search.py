@@ -0,0 +1,149 @@
+"""
+Recherche locale dans le catalogue - Plein texte (tsvector) et trigrammes (pg_trgm)
+
+Les colonnes générées search_vector (index GIN) couvrent les mots exacts,
+les index trigrammes sur les titres et artistes rattrapent les fautes de
+frappe. Voir database/migrate_catalog_search.sql.
+
+Modes des routes /search (paramètre mode, défaut: catalog_search_mode):
+- "upstream": toujours l'API externe
+- "local_first": catalogue local si la page demandée est remplie de
+  correspondances solides (mots exacts, ou titre très proche), sinon
+  l'API externe : des correspondances floues ne suffisent pas
+- "local": catalogue local uniquement
+
+Si la recherche locale échoue (migration non appliquée, erreur SQL), la
+transaction est annulée et les routes passent à l'API externe.
+"""
+
+from typing import NamedTuple, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.models.book import Book
+from app.models.movie import Movie
+from app.models.music import Track
+
+
+SEARCH_MODES = ("upstream", "local_first", "local")
+SEARCH_MODE_PATTERN = "^(upstream|local_first|local)$"
+
+
+class LocalResults(NamedTuple):
+    """Page de résultats du catalogue local"""
+    items: list
+    total: int  # Nombre total de correspondances
+    strong: int  # Correspondances solides dans la page (voir _search)
+
+
+def resolve_mode(mode: Optional[str]) -> str:
+    """Mode demandé, ou celui configuré par défaut"""
+    return mode or settings.catalog_search_mode
+
+
+def _search(
+    db: Session,
+    model,
+    query: str,
+    fuzzy_columns: list,
+    popularity,
+    limit: int,
+    offset: int,
+    *options
+) -> Optional[LocalResults]:
+    """
+    Recherche plein texte + trigrammes sur une table du catalogue
+
+    Une correspondance est solide si elle contient les mots recherchés
+    (tsvector) ou si sa similarité trigramme atteint
+    catalog_search_strong_similarity ; les autres correspondances
+    trigrammes (seuil pg_trgm 0.3) restent servies mais ne suffisent pas
+    à éviter l'appel externe.
+
+    Args:
+        db: Session de base de données
+        model: Modèle interrogé (doit avoir une colonne search_vector)
+        query: Terme de recherche
+        fuzzy_columns: Colonnes indexées en trigrammes
+        popularity: Colonne de départage à pertinence égale
+        limit: Nombre de résultats
+        offset: Index de départ
+        options: Options de chargement (ex: selectinload)
+
+    Returns:
+        LocalResults, ou None si la recherche a échoué
+    """
+    tsquery = func.websearch_to_tsquery("simple", query)
+    word_match = model.search_vector.op("@@")(tsquery)
+    matches = or_(word_match, *[column.op("%")(query) for column in fuzzy_columns])
+    similarity = func.greatest(*[func.similarity(column, query) for column in fuzzy_columns])
+    rank = func.ts_rank(model.search_vector, tsquery) + similarity
+    strong = or_(word_match, similarity >= settings.catalog_search_strong_similarity)
+
+    try:
+        total = db.query(func.count(model.id)).filter(matches).scalar()
+        if not total or offset >= total:
+            return LocalResults([], total or 0, 0)
+
+        rows = db.query(model, strong).options(*options).filter(matches).order_by(
+            rank.desc(), popularity.desc().nullslast(), model.id
+        ).offset(offset).limit(limit).all()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"[CATALOG SEARCH] Recherche locale {model.__tablename__} indisponible: {str(e)}")
+        return None
+
+    return LocalResults([item for item, _ in rows], total, sum(1 for _, is_strong in rows if is_strong))
+
+
+def search_movies(db: Session, query: str, limit: int = 20, offset: int = 0) -> Optional[LocalResults]:
+    """
+    Films du catalogue local (titre, résumé)
+
+    Returns:
+        LocalResults de films, ou None si la recherche a échoué
+    """
+    return _search(
+        db, Movie, query, [Movie.title], Movie.popularity, limit, offset,
+        selectinload(Movie.genres)
+    )
+
+
+def search_tracks(db: Session, query: str, limit: int = 20, offset: int = 0) -> Optional[LocalResults]:
+    """
+    Pistes du catalogue local (titre, artiste)
+
+    Returns:
+        LocalResults de pistes, ou None si la recherche a échoué
+    """
+    return _search(db, Track, query, [Track.title, Track.artist], Track.popularity, limit, offset)
+
+
+def search_books(db: Session, query: str, limit: int = 20, offset: int = 0) -> Optional[LocalResults]:
+    """
+    Livres du catalogue local (titre, auteurs)
+
+    Returns:
+        LocalResults de livres, ou None si la recherche a échoué
+    """
+    return _search(db, Book, query, [Book.title], Book.ratings_count, limit, offset)
+
+
+def is_sufficient(mode: str, results: Optional[LocalResults], limit: int) -> bool:
+    """
+    Les résultats locaux suffisent-ils à répondre sans appel externe ?
+
+    Args:
+        mode: Mode de recherche résolu
+        results: Résultats locaux de la page demandée (None si échec)
+        limit: Taille de la page demandée
+
+    Returns:
+        False si la recherche locale a échoué ; sinon True en mode "local",
+        ou si la page ne contient que des correspondances solides
+    """
+    if results is None:
+        return False
+    return mode == "local" or results.strong >= limit
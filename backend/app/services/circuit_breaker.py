@@ -0,0 +1,267 @@
+"""
+Circuit breaker - Protection contre les fournisseurs amont lents ou en panne
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+import httpx
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+
+class CircuitCall:
+    """
+    Appel amont autorisé par un disjoncteur (voir CircuitBreaker.acquire)
+
+    À utiliser comme context manager autour de l'appel : si l'appel se
+    termine sans que success() ou failure() ait été enregistré, l'issue
+    est déduite à la sortie du bloc. Une annulation (client parti,
+    recherches abandonnées) libère la requête de test sans compter
+    d'échec ; toute autre exception compte comme un échec. La requête de
+    test d'un circuit semi-ouvert ne peut donc jamais rester bloquée.
+    """
+
+    def __init__(self, breaker: "CircuitBreaker", is_probe: bool):
+        self.breaker = breaker
+        self.is_probe = is_probe
+        self.recorded = False
+
+    def success(self, duration: float) -> None:
+        """Enregistre un appel réussi (voir CircuitBreaker.record_success)"""
+        self.recorded = True
+        self.breaker.record_success(duration)
+
+    def failure(self) -> None:
+        """Enregistre un échec (voir CircuitBreaker.record_failure)"""
+        self.recorded = True
+        self.breaker.record_failure()
+
+    def __enter__(self) -> "CircuitCall":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if not self.recorded:
+            if exc_type is None or issubclass(exc_type, asyncio.CancelledError):
+                self.breaker.release_probe(self.is_probe)
+            else:
+                self.failure()
+        return False
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par fournisseur (TMDB, Spotify, Google Books)
+
+    États:
+    - closed: les appels passent normalement
+    - open: après N échecs consécutifs (erreurs, timeouts ou appels trop
+      lents), les appels échouent immédiatement pendant reset_timeout
+    - half_open: une seule requête de test est autorisée ; succès -> closed,
+      échec -> open
+
+    Un cache des dernières réponses réussies (stale) permet de continuer
+    à servir des données pendant que le circuit est ouvert.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 2.0,
+        reset_timeout_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.stale_responses = TTLCache(
+            max_size=settings.upstream_stale_cache_size,
+            ttl_seconds=settings.upstream_stale_ttl_seconds
+        )
+
+    def acquire(self) -> Optional[CircuitCall]:
+        """
+        Autorise (ou non) un appel amont
+
+        Usage:
+            call = breaker.acquire()
+            if call is None:
+                return breaker.fallback(cache_key)
+            with call:
+                ...  # appel, puis call.success(durée) ou call.failure()
+
+        Returns:
+            CircuitCall si le circuit est fermé, ou si c'est la requête de
+            test d'un circuit semi-ouvert ; None sinon
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return CircuitCall(self, is_probe=False)
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout_seconds:
+                    return None
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            # Semi-ouvert : une seule requête de test à la fois
+            if self._probe_in_flight:
+                return None
+            self._probe_in_flight = True
+            return CircuitCall(self, is_probe=True)
+
+    def release_probe(self, is_probe: bool) -> None:
+        """
+        Libère la requête de test sans enregistrer d'issue (appel annulé)
+
+        Args:
+            is_probe: L'appel était la requête de test du circuit semi-ouvert
+        """
+        with self._lock:
+            if is_probe and self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self, duration: float) -> None:
+        """
+        Enregistre un appel réussi
+
+        Args:
+            duration: Durée de l'appel en secondes (un appel trop lent
+                compte comme un échec)
+        """
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"[CIRCUIT] {self.name}: circuit refermé")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Enregistre un échec (erreur, timeout, 5xx, 429 ou appel lent)"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"[CIRCUIT] {self.name}: circuit ouvert après {self.consecutive_failures} échecs")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def open_error(self) -> HTTPException:
+        """Erreur renvoyée immédiatement quand le circuit est ouvert"""
+        retry_after = self.reset_timeout_seconds
+        if self.opened_at is not None:
+            retry_after = max(1, self.reset_timeout_seconds - (time.monotonic() - self.opened_at))
+
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{self.name} is temporarily unavailable (circuit open)",
+            headers={"Retry-After": str(int(retry_after))}
+        )
+
+    def remember(self, key: Hashable, data: Any) -> None:
+        """Conserve la dernière réponse réussie pour un éventuel repli"""
+        self.stale_responses.set(key, data)
+
+    def fallback(self, key: Hashable, error: Optional[HTTPException] = None) -> Any:
+        """
+        Réponse de repli quand l'amont est indisponible
+
+        Args:
+            key: Clé de la requête (voir request_key)
+            error: Erreur à lever si aucune réponse en cache
+                (défaut: erreur "circuit ouvert")
+
+        Returns:
+            Dernière réponse réussie connue pour cette requête
+        """
+        data = self.stale_responses.get(key)
+        if data is not None:
+            print(f"[CIRCUIT] {self.name}: réponse en cache servie pour {key[0]}")
+            return data
+
+        raise error or self.open_error()
+
+    def stats(self) -> Dict[str, Any]:
+        """État courant du disjoncteur"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "stale_cache": self.stale_responses.stats()
+        }
+
+
+def request_key(endpoint: str, params: Optional[Dict] = None) -> tuple:
+    """
+    Clé de cache d'une requête amont (sans les identifiants d'API)
+
+    Args:
+        endpoint: Endpoint appelé
+        params: Paramètres de la requête
+    """
+    items = tuple(sorted(
+        (k, str(v)) for k, v in (params or {}).items()
+        if k not in ("api_key", "key")
+    ))
+    return (endpoint, items)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Indique si une erreur httpx traduit une défaillance du fournisseur
+
+    Timeouts, erreurs réseau, 5xx et 429 comptent comme des échecs ;
+    les autres 4xx (404, requête invalide) sont de notre fait.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(error, httpx.HTTPError)
+
+
+# Un disjoncteur par fournisseur, partagé par tout le processus
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Retourne le disjoncteur d'un fournisseur (créé au premier appel)
+
+    Args:
+        name: Nom du fournisseur ("TMDB", "Spotify", "Google Books")
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.circuit_failure_threshold,
+                slow_call_seconds=settings.circuit_slow_call_seconds,
+                reset_timeout_seconds=settings.circuit_reset_timeout_seconds
+            )
+        return _breakers[name]
+
+
+def circuit_breakers_stats() -> Dict[str, Dict[str, Any]]:
+    """État de tous les disjoncteurs (pour le monitoring)"""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
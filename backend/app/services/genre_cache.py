@@ -0,0 +1,110 @@
+"""
+Cache des genres - Dictionnaire id -> nom des genres TMDB en mémoire
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+
+from app.models.movie import Genre
+from app.services.cache import TTLCache
+
+
+# Durée pendant laquelle un ID absent de la table genres n'est pas recherché à nouveau
+UNKNOWN_GENRE_TTL_SECONDS = 60
+
+
+class GenreCache:
+    """
+    Dictionnaire des genres partagé par tout le processus
+
+    Les genres sont initialisés une fois dans init.sql et ne changent
+    presque jamais : on les charge au démarrage puis on complète le cache
+    quand un nouveau genre est inséré, au lieu d'interroger la table
+    genres à chaque vérification d'ID ou lecture de nom.
+    """
+
+    def __init__(self):
+        self._names_by_id: Dict[int, str] = {}
+        self._unknown_ids = TTLCache(max_size=1024, ttl_seconds=UNKNOWN_GENRE_TTL_SECONDS)
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """
+        (Re)charge tous les genres depuis la base de données
+
+        Args:
+            db: Session de base de données
+        """
+        rows = db.query(Genre.id, Genre.name).all()
+
+        with self._lock:
+            self._names_by_id = {genre_id: name for genre_id, name in rows}
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Charge le cache s'il ne l'a pas encore été"""
+        if not self.loaded:
+            self.load(db)
+
+    def register(self, genres: Dict[int, str]) -> None:
+        """
+        Ajoute des genres venant d'être insérés en base
+
+        Args:
+            genres: Dict {genre_id: name}
+        """
+        with self._lock:
+            self._names_by_id.update(genres)
+        for genre_id in genres:
+            self._unknown_ids.delete(genre_id)
+
+    def get_name(self, genre_id: int) -> Optional[str]:
+        """Retourne le nom d'un genre (None si inconnu)"""
+        return self._names_by_id.get(genre_id)
+
+    def known_ids(self, db: Session, genre_ids: Iterable[int]) -> Set[int]:
+        """
+        Filtre les IDs de genres existants en base
+
+        Les IDs inconnus sont cherchés en base (genre inséré par un autre
+        worker depuis le dernier chargement) ; ceux qui n'y sont pas ne
+        sont plus cherchés pendant UNKNOWN_GENRE_TTL_SECONDS.
+
+        Args:
+            db: Session de base de données
+            genre_ids: IDs à vérifier
+
+        Returns:
+            Sous-ensemble des IDs connus
+        """
+        self.ensure_loaded(db)
+        genre_ids = set(genre_ids)
+
+        missing = {
+            genre_id for genre_id in genre_ids - self._names_by_id.keys()
+            if self._unknown_ids.get(genre_id) is None
+        }
+        if missing:
+            found = dict(db.query(Genre.id, Genre.name).filter(Genre.id.in_(missing)).all())
+            if found:
+                self.register(found)
+            for genre_id in missing - found.keys():
+                self._unknown_ids.set(genre_id, True)
+
+        return genre_ids & self._names_by_id.keys()
+
+    def all(self, db: Session) -> List[Tuple[int, str]]:
+        """
+        Liste tous les genres triés par nom
+
+        Returns:
+            Liste de (genre_id, name)
+        """
+        self.ensure_loaded(db)
+        return sorted(self._names_by_id.items(), key=lambda item: item[1])
+
+
+# Instance globale partagée par les routes et les services
+genre_cache = GenreCache()
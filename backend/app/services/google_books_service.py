@@ -2,13 +2,18 @@
 Service Google Books - Interaction avec l'API Google Books
 """
 
+import time
 import httpx
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException, status
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.book import Book
+from app.services.autocomplete import autocomplete_index
+from app.services.circuit_breaker import get_circuit_breaker, request_key, is_upstream_failure
 
 
 class GoogleBooksService:
@@ -18,13 +23,16 @@ class GoogleBooksService:
     """
     
     def __init__(self):
-        self.base_url = "https://www.googleapis.com/books/v1"
-        self.api_key = settings.google_books_api_key if hasattr(settings, 'google_books_api_key') else None
+        self.base_url = settings.google_books_base_url
+        self.api_key = settings.google_books_api_key
     
     async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Fait une requête à l'API Google Books
         
+        Passe par le disjoncteur Google Books : si l'API est en panne ou trop
+        lente, la dernière réponse connue est servie, sinon une 503 immédiate.
+        
         Args:
             endpoint: Endpoint de l'API (ex: "/volumes")
             params: Paramètres de la requête
@@ -35,22 +43,43 @@ class GoogleBooksService:
         if params is None:
             params = {}
         
+        breaker = get_circuit_breaker("Google Books")
+        cache_key = request_key(endpoint, params)
+        
+        # Circuit ouvert : pas d'appel, réponse en cache ou échec immédiat
+        call = breaker.acquire()
+        if call is None:
+            return breaker.fallback(cache_key)
+        
         # Ajouter la clé API si disponible (optionnel pour Google Books)
         if self.api_key:
             params["key"] = self.api_key
         
         url = f"{self.base_url}{endpoint}"
+        started = time.monotonic()
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"Google Books API error: {str(e)}"
-                )
+        # Annulation ou erreur imprévue : issue enregistrée par call à la sortie
+        with call:
+            async with httpx.AsyncClient() as client:
+                try:
+                    response = await client.get(url, params=params, timeout=settings.upstream_timeout_seconds)
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    error = HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=f"Google Books API error: {str(e)}"
+                    )
+                    if not is_upstream_failure(e):
+                        call.success(time.monotonic() - started)
+                        raise error
+                    call.failure()
+                    return breaker.fallback(cache_key, error)
+            
+            data = response.json()
+            call.success(time.monotonic() - started)
+        
+        breaker.remember(cache_key, data)
+        return data
     
     async def search_books(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
         """
@@ -125,56 +154,159 @@ class GoogleBooksService:
         }
         return await self._make_request("/volumes", params)
     
-    def save_book_to_db(self, db: Session, book_data: Dict[str, Any]) -> Book:
+    @staticmethod
+    def valid_volume_id(book_data: Any) -> Optional[str]:
         """
-        Sauvegarde un livre depuis Google Books dans la base de données
+        ID Google Books d'un volume que save_books_bulk acceptera
         
         Args:
-            db: Session de base de données
-            book_data: Données du livre depuis Google Books
+            book_data: Volume depuis Google Books
+        
+        Returns:
+            google_books_id, ou None si le volume sera écarté
+        """
+        row = GoogleBooksService._book_row(book_data)
+        return row["google_books_id"] if row is not None else None
+    
+    @staticmethod
+    def _book_row(book_data: Any) -> Optional[Dict[str, Any]]:
+        """
+        Valide un volume Google Books et le convertit en ligne de la table books
+        
+        Les valeurs incohérentes (types inattendus, nombres hors bornes) sont
+        ignorées et les chaînes tronquées à la taille des colonnes.
+        
+        Args:
+            book_data: Volume depuis Google Books
         
         Returns:
-            Book créé ou existant
+            Dictionnaire colonne -> valeur, ou None si le volume est inexploitable
         """
-        google_books_id = book_data["id"]
-        volume_info = book_data.get("volumeInfo", {})
+        if not isinstance(book_data, dict):
+            return None
+        
+        google_books_id = book_data.get("id")
+        volume_info = book_data.get("volumeInfo") or {}
+        if not isinstance(google_books_id, str) or not google_books_id or len(google_books_id) > 100:
+            return None
+        if not isinstance(volume_info, dict):
+            return None
+        
+        def text(value: Any, max_length: Optional[int] = None) -> Optional[str]:
+            return value[:max_length] if isinstance(value, str) and value else None
         
-        # Vérifier si le livre existe déjà
-        existing_book = db.query(Book).filter(Book.google_books_id == google_books_id).first()
+        def texts(values: Any) -> List[str]:
+            return [value for value in values if isinstance(value, str)] if isinstance(values, list) else []
         
-        if existing_book:
-            return existing_book
+        def number(value: Any, minimum: float, maximum: Optional[float] = None) -> Optional[float]:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None
+            if value < minimum or (maximum is not None and value > maximum):
+                return None
+            return value
         
-        # Extraire les ISBNs
+        # Extraire l'ISBN-13
         isbn_13 = None
-        for identifier in volume_info.get("industryIdentifiers", []):
-            if identifier.get("type") == "ISBN_13":
-                isbn_13 = identifier.get("identifier")
+        for identifier in volume_info.get("industryIdentifiers") or []:
+            if isinstance(identifier, dict) and identifier.get("type") == "ISBN_13":
+                isbn_13 = text(identifier.get("identifier"), 20)
                 break
         
         # Extraire l'image
-        image_links = volume_info.get("imageLinks", {})
+        image_links = volume_info.get("imageLinks")
+        image_links = image_links if isinstance(image_links, dict) else {}
         image_url = image_links.get("thumbnail") or image_links.get("smallThumbnail")
         
-        # Créer le livre
-        book = Book(
-            google_books_id=google_books_id,
-            title=volume_info.get("title", "Titre inconnu"),
-            authors=volume_info.get("authors", []),
-            description=volume_info.get("description"),
-            publisher=volume_info.get("publisher"),
-            published_date=volume_info.get("publishedDate"),
-            page_count=volume_info.get("pageCount"),
-            categories=volume_info.get("categories", []),
-            image_url=image_url,
-            language=volume_info.get("language"),
-            isbn_13=isbn_13,
-            average_rating=volume_info.get("averageRating"),
-            ratings_count=volume_info.get("ratingsCount")
-        )
+        page_count = number(volume_info.get("pageCount"), 1)
+        ratings_count = number(volume_info.get("ratingsCount"), 0)
+        
+        return {
+            "google_books_id": google_books_id,
+            "title": text(volume_info.get("title"), 500) or "Titre inconnu",
+            "authors": texts(volume_info.get("authors")),
+            "description": text(volume_info.get("description")),
+            "publisher": text(volume_info.get("publisher"), 300),
+            "published_date": text(volume_info.get("publishedDate"), 50),
+            "page_count": int(page_count) if page_count is not None else None,
+            "categories": texts(volume_info.get("categories")),
+            "image_url": text(image_url, 500),
+            "language": text(volume_info.get("language"), 10),
+            "isbn_13": isbn_13,
+            "average_rating": number(volume_info.get("averageRating"), 0, 5),
+            "ratings_count": int(ratings_count) if ratings_count is not None else None,
+        }
+    
+    def save_books_bulk(self, db: Session, books_data: List[Dict[str, Any]]) -> List[Book]:
+        """
+        Sauvegarde une page de volumes Google Books en une seule transaction
+        
+        Les volumes inexploitables sont écartés avant l'écriture. Les autres
+        sont insérés via INSERT ... ON CONFLICT (google_books_id) : les livres
+        existants sont complétés avec les valeurs non nulles reçues.
         
-        db.add(book)
+        Args:
+            db: Session de base de données
+            books_data: Volumes depuis Google Books (recherche, détails)
+        
+        Returns:
+            Livres persistés, dans l'ordre de books_data
+        """
+        # Dédupliquer par ID (ON CONFLICT ne peut pas toucher deux fois la même ligne)
+        rows_by_id = {}
+        for book_data in books_data:
+            row = self._book_row(book_data)
+            if row is not None:
+                rows_by_id[row["google_books_id"]] = row
+        
+        if not rows_by_id:
+            return []
+        
+        google_books_ids = sorted(rows_by_id)
+        rows = [rows_by_id[google_books_id] for google_books_id in google_books_ids]
+        
+        stmt = pg_insert(Book).values(rows)
+        set_ = {
+            column: func.coalesce(stmt.excluded[column], Book.__table__.c[column])
+            for column in rows[0]
+            if column != "google_books_id"
+        }
+        # Une liste vide reçue n'efface pas les auteurs/catégories connus
+        for column in ("authors", "categories"):
+            set_[column] = case(
+                (func.cardinality(stmt.excluded[column]) > 0, stmt.excluded[column]),
+                else_=Book.__table__.c[column]
+            )
+        stmt = stmt.on_conflict_do_update(index_elements=[Book.google_books_id], set_=set_)
+        db.execute(stmt)
         db.commit()
-        db.refresh(book)
         
-        return book
+        books_by_id = {
+            book.google_books_id: book
+            for book in db.query(Book).filter(Book.google_books_id.in_(google_books_ids)).all()
+        }
+        autocomplete_index.add_books(books_by_id.values())
+        
+        ordered_ids = dict.fromkeys(
+            book_data["id"] for book_data in books_data
+            if isinstance(book_data, dict) and book_data.get("id") in rows_by_id
+        )
+        return [books_by_id[google_books_id] for google_books_id in ordered_ids if google_books_id in books_by_id]
+    
+    def save_book_to_db(self, db: Session, book_data: Dict[str, Any]) -> Book:
+        """
+        Sauvegarde un livre depuis Google Books dans la base de données
+        
+        Args:
+            db: Session de base de données
+            book_data: Données du livre depuis Google Books
+        
+        Returns:
+            Book créé ou mis à jour
+        """
+        books = self.save_books_bulk(db, [book_data])
+        if not books:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Réponse Google Books invalide"
+            )
+        return books[0]
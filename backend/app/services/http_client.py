@@ -0,0 +1,44 @@
+"""
+Client HTTP partagé - Pool de connexions réutilisé par les services externes
+"""
+
+from typing import Optional
+import httpx
+
+from app.config import settings
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Retourne le client HTTP du processus (créé au premier appel)
+
+    Les connexions keep-alive sont réutilisées d'une requête à l'autre
+    au lieu d'ouvrir une connexion TLS par appel.
+
+    Returns:
+        Client httpx asynchrone partagé
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=settings.upstream_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_max_keepalive
+            )
+        )
+
+    return _client
+
+
+async def close_http_client() -> None:
+    """Ferme le client partagé (arrêt de l'application)"""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,393 @@
+"""
+Enrichissement musical - Genres des artistes Spotify recopiés dans les pistes
+
+Spotify n'associe des genres qu'aux artistes. Les artistes inconnus sont
+récupérés par lots de 50 (/artists?ids=), mis en cache dans artist_genres,
+puis leurs genres sont recopiés en masse dans tracks.genres.
+Les caractéristiques audio des pistes sont ensuite récupérées par lots
+de 100 si un fournisseur est configuré (voir app/services/audio_features.py),
+et les pistes périmées sont rafraîchies par lots de 50 (/tracks?ids=).
+Une étape qui échoue est journalisée sans empêcher les suivantes.
+
+Utilisable comme tâche de fond (démarrée depuis le lifespan) ou en CLI:
+    python -m app.services.music_enrichment
+    python -m app.services.music_enrichment --loop
+"""
+
+import argparse
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.music import Track, ArtistGenre
+from app.services.audio_features import (
+    TRACKS_PER_REQUEST,
+    get_audio_feature_provider,
+    pack_features,
+    unpack_features,
+)
+from app.services.music_index import track_index
+from app.services.spotify_service import SpotifyService
+
+
+ARTISTS_PER_REQUEST = 50  # Maximum accepté par /artists?ids=
+TRACKS_PER_HYDRATION = 50  # Maximum accepté par /tracks?ids=
+
+
+class MusicEnrichmentService:
+    """
+    Récupère les genres des artistes encore inconnus et les propage aux
+    pistes, puis les caractéristiques audio des pistes qui n'en ont pas
+    """
+
+    def __init__(self, spotify_service: Optional[SpotifyService] = None, audio_feature_provider=None):
+        self.spotify_service = spotify_service or SpotifyService()
+        self.audio_feature_provider = audio_feature_provider or get_audio_feature_provider()  # None : étape désactivée
+
+    @staticmethod
+    def pending_artist_ids(db: Session, limit: int) -> List[str]:
+        """
+        Artistes référencés par des pistes mais absents de artist_genres
+
+        Args:
+            db: Session de base de données
+            limit: Nombre maximum d'IDs retournés
+
+        Returns:
+            IDs Spotify des artistes à enrichir
+        """
+        rows = db.query(Track.artist_spotify_id).outerjoin(
+            ArtistGenre, ArtistGenre.spotify_id == Track.artist_spotify_id
+        ).filter(
+            Track.artist_spotify_id.isnot(None),
+            ArtistGenre.spotify_id.is_(None)
+        ).distinct().limit(limit).all()
+
+        return [artist_id for (artist_id,) in rows]
+
+    @staticmethod
+    def save_artists(db: Session, artist_ids: List[str], artists_data: List[Dict]) -> None:
+        """
+        Met en cache les genres d'un lot d'artistes (un seul INSERT)
+
+        Les IDs demandés mais absents de la réponse sont enregistrés sans
+        genre pour ne pas être redemandés à chaque passage.
+
+        Args:
+            db: Session de base de données
+            artist_ids: IDs demandés
+            artists_data: Artistes renvoyés par Spotify
+        """
+        by_id = {artist["id"]: artist for artist in artists_data}
+        rows = [
+            {
+                "spotify_id": artist_id,
+                "name": by_id.get(artist_id, {}).get("name"),
+                "genres": by_id.get(artist_id, {}).get("genres", []),
+            }
+            for artist_id in dict.fromkeys(artist_ids)
+        ]
+        if not rows:
+            return
+
+        stmt = pg_insert(ArtistGenre).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ArtistGenre.spotify_id],
+            set_={
+                "name": stmt.excluded.name,
+                "genres": stmt.excluded.genres,
+                "fetched_at": stmt.excluded.fetched_at,
+            }
+        )
+        db.execute(stmt)
+        db.commit()
+
+    @staticmethod
+    def backfill_track_genres(db: Session, artist_ids: Optional[List[str]] = None) -> int:
+        """
+        Recopie les genres des artistes dans les pistes (un seul UPDATE ... FROM)
+
+        Args:
+            db: Session de base de données
+            artist_ids: Limiter aux pistes de ces artistes (défaut: toutes)
+
+        Returns:
+            Nombre de pistes mises à jour
+        """
+        stmt = update(Track).where(
+            Track.artist_spotify_id == ArtistGenre.spotify_id,
+            Track.genres.is_distinct_from(ArtistGenre.genres)
+        ).values(genres=ArtistGenre.genres)
+
+        if artist_ids is not None:
+            stmt = stmt.where(Track.artist_spotify_id.in_(artist_ids))
+
+        result = db.execute(stmt.execution_options(synchronize_session=False))
+        db.commit()
+        return result.rowcount
+
+    async def enrich_batch(self, artist_ids: List[str]) -> int:
+        """
+        Enrichit un lot d'au plus 50 artistes
+
+        Args:
+            artist_ids: IDs Spotify des artistes
+
+        Returns:
+            Nombre de pistes mises à jour
+        """
+        artists_data = await self.spotify_service.get_artists(artist_ids)
+        return await asyncio.to_thread(self._persist, artist_ids, artists_data)
+
+    def _persist(self, artist_ids: List[str], artists_data: List[Dict]) -> int:
+        """Cache les artistes et met à jour leurs pistes dans une session dédiée"""
+        db = SessionLocal()
+        try:
+            self.save_artists(db, artist_ids, artists_data)
+            updated = self.backfill_track_genres(db, artist_ids)
+            track_index.refresh(db, artist_ids)
+            return updated
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def pending_feature_tracks(db: Session, limit: int) -> List[Tuple[int, str]]:
+        """
+        Pistes dont les caractéristiques audio n'ont pas encore été demandées
+
+        Args:
+            db: Session de base de données
+            limit: Nombre maximum de pistes retournées
+
+        Returns:
+            Liste de (track_id, spotify_id)
+        """
+        return db.query(Track.id, Track.spotify_id).filter(
+            Track.audio_features.is_(None)
+        ).order_by(Track.id).limit(limit).all()
+
+    @staticmethod
+    def save_audio_features(db: Session, packed: Dict[int, bytes]) -> None:
+        """
+        Enregistre les vecteurs audio d'un lot de pistes (UPDATE groupé par clé primaire)
+
+        Args:
+            db: Session de base de données
+            packed: Dict {track_id: vecteur float32 binaire}
+        """
+        if not packed:
+            return
+
+        db.execute(
+            update(Track),
+            [{"id": track_id, "audio_features": data} for track_id, data in packed.items()]
+        )
+        db.commit()
+
+    async def enrich_features_batch(self, tracks: List[Tuple[int, str]]) -> int:
+        """
+        Récupère les caractéristiques audio d'un lot d'au plus 100 pistes
+
+        Les pistes sans réponse reçoivent un vecteur vide pour ne pas être
+        redemandées à chaque passage.
+
+        Args:
+            tracks: Liste de (track_id, spotify_id)
+
+        Returns:
+            Nombre de pistes ayant un vecteur
+        """
+        features = await self.audio_feature_provider.get_features([spotify_id for _, spotify_id in tracks])
+        packed = {
+            track_id: pack_features(features.get(spotify_id))
+            for track_id, spotify_id in tracks
+        }
+
+        await asyncio.to_thread(self._persist_features, packed)
+        return sum(1 for data in packed.values() if data)
+
+    def _persist_features(self, packed: Dict[int, bytes]) -> None:
+        """Enregistre les vecteurs dans une session dédiée et met à jour l'index"""
+        db = SessionLocal()
+        try:
+            self.save_audio_features(db, packed)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        track_index.set_features({track_id: unpack_features(data) for track_id, data in packed.items()})
+
+    def _pending(self, query: Callable[[Session, int], List[Any]], limit: int) -> List[Any]:
+        """Éléments à enrichir, lus dans une session dédiée"""
+        db = SessionLocal()
+        try:
+            return query(db, limit)
+        finally:
+            db.close()
+
+    async def _drain(
+        self,
+        query: Callable[[Session, int], List[Any]],
+        batch_size: int,
+        enrich: Callable[[List[Any]], Awaitable[int]]
+    ) -> Tuple[int, int]:
+        """
+        Traite les éléments en attente lot par lot
+
+        En cas de rate limit (429), attend le délai Retry-After indiqué par
+        Spotify puis reprend le même lot.
+
+        Returns:
+            (éléments traités, total renvoyé par enrich)
+        """
+        processed, total = 0, 0
+
+        while True:
+            batch = await asyncio.to_thread(self._pending, query, batch_size)
+            if not batch:
+                return processed, total
+
+            try:
+                total += await enrich(batch)
+            except HTTPException as e:
+                retry_after = (e.headers or {}).get("Retry-After")
+                if retry_after is None:
+                    raise
+                print(f"[ENRICHMENT] Rate limit Spotify, reprise dans {retry_after}s")
+                await asyncio.sleep(float(retry_after))
+                continue
+
+            processed += len(batch)
+            await asyncio.sleep(settings.music_enrichment_batch_delay_seconds)
+
+    async def refresh_tracks_batch(self, spotify_ids: List[str]) -> int:
+        """
+        Rafraîchit un lot d'au plus 50 pistes périmées
+
+        Args:
+            spotify_ids: IDs Spotify des pistes
+
+        Returns:
+            Nombre de pistes rafraîchies
+        """
+        tracks_data = await self.spotify_service.get_tracks(spotify_ids)
+        return await asyncio.to_thread(self._persist_tracks, spotify_ids, tracks_data)
+
+    def _persist_tracks(self, spotify_ids: List[str], tracks_data: List[Dict]) -> int:
+        """Enregistre les pistes rafraîchies dans une session dédiée"""
+        db = SessionLocal()
+        try:
+            return self.spotify_service.save_refreshed_tracks(db, spotify_ids, tracks_data)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def refresh_stale_tracks(self) -> int:
+        """
+        Rafraîchit depuis Spotify les pistes périmées, par lots de 50
+
+        Returns:
+            Nombre de pistes rafraîchies
+        """
+        _, refreshed = await self._drain(
+            self.spotify_service.stale_track_ids, TRACKS_PER_HYDRATION, self.refresh_tracks_batch
+        )
+        return refreshed
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        Enrichit tous les artistes puis toutes les pistes en attente,
+        et rafraîchit les pistes périmées
+
+        Returns:
+            Statistiques {"artists": n, "tracks": n, "audio_features": n, "refreshed": n}
+        """
+        artists, tracks = await self._step(
+            "genres des artistes",
+            lambda: self._drain(self.pending_artist_ids, ARTISTS_PER_REQUEST, self.enrich_batch),
+            (0, 0)
+        )
+
+        audio_features = 0
+        if self.audio_feature_provider is not None:
+            _, audio_features = await self._step(
+                "caractéristiques audio",
+                lambda: self._drain(self.pending_feature_tracks, TRACKS_PER_REQUEST, self.enrich_features_batch),
+                (0, 0)
+            )
+
+        refreshed = await self._step("pistes périmées", self.refresh_stale_tracks, 0)
+        return {"artists": artists, "tracks": tracks, "audio_features": audio_features, "refreshed": refreshed}
+
+    @staticmethod
+    async def _step(label: str, run: Callable[[], Awaitable[Any]], default: Any) -> Any:
+        """
+        Exécute une étape de run_once sans interrompre les suivantes
+
+        Une erreur non récupérable (ex: 403 de Spotify) est journalisée ;
+        l'étape sera retentée au prochain passage.
+
+        Returns:
+            Résultat de l'étape, ou default en cas d'erreur
+        """
+        try:
+            return await run()
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"[ENRICHMENT] Étape {label} interrompue: {detail}")
+            return default
+
+    async def run_forever(self, interval_seconds: int) -> None:
+        """
+        Relance l'enrichissement périodiquement (jusqu'à annulation de la tâche)
+
+        Args:
+            interval_seconds: Intervalle entre deux passages
+        """
+        while True:
+            try:
+                stats = await self.run_once()
+                if stats["artists"] or stats["audio_features"] or stats["refreshed"]:
+                    print(f"[ENRICHMENT] {stats['artists']} artistes enrichis, {stats['tracks']} pistes mises à jour, "
+                          f"{stats['audio_features']} vecteurs audio, {stats['refreshed']} pistes rafraîchies")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ENRICHMENT] Erreur lors de l'enrichissement: {str(e)}")
+
+            await asyncio.sleep(interval_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Récupère les genres et caractéristiques audio des pistes")
+    parser.add_argument("--loop", action="store_true",
+                        help="Relancer périodiquement (music_enrichment_interval_seconds)")
+    args = parser.parse_args()
+
+    # Importer les modèles pour enregistrer les mappers SQLAlchemy
+    import app.models  # noqa: F401
+
+    service = MusicEnrichmentService()
+
+    if args.loop:
+        asyncio.run(service.run_forever(settings.music_enrichment_interval_seconds))
+    else:
+        stats = asyncio.run(service.run_once())
+        print(f"[ENRICHMENT] {stats['artists']} artistes enrichis, {stats['tracks']} pistes mises à jour, "
+              f"{stats['audio_features']} vecteurs audio, {stats['refreshed']} pistes rafraîchies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Index des pistes - Index inversé genre -> pistes et artiste -> pistes en mémoire,
+et matrice des caractéristiques audio pour la recherche des plus proches voisins
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.music import Track
+from app.services.audio_features import unpack_features
+
+
+ARTIST_BONUS = 0.3  # Bonus de similarité pour deux pistes du même artiste
+
+
+class TrackIndex:
+    """
+    Index inversé des pistes partagé par tout le processus
+
+    Les pistes similaires sont calculées sur les listes de pistes par
+    genre et par artiste, sans requête par candidat. L'index est chargé
+    au démarrage puis complété à chaque insertion de piste.
+    """
+
+    def __init__(self):
+        self._genres_by_track: Dict[int, FrozenSet[str]] = {}
+        self._artist_by_track: Dict[int, str] = {}
+        self._tracks_by_genre: Dict[str, Set[int]] = {}
+        self._tracks_by_artist: Dict[str, Set[int]] = {}
+        self._features: Dict[int, np.ndarray] = {}
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray, Dict[int, int]]] = None
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """
+        (Re)construit l'index depuis la table tracks
+
+        Args:
+            db: Session de base de données
+        """
+        rows = db.query(Track.id, Track.artist, Track.genres, Track.audio_features).all()
+
+        with self._lock:
+            self._genres_by_track = {}
+            self._artist_by_track = {}
+            self._tracks_by_genre = {}
+            self._tracks_by_artist = {}
+            self._features = {}
+            self._matrix = None
+            for track_id, artist, genres, audio_features in rows:
+                self._add(track_id, artist, genres)
+                vector = unpack_features(audio_features)
+                if vector is not None:
+                    self._features[track_id] = vector
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Construit l'index s'il ne l'a pas encore été"""
+        if not self.loaded:
+            self.load(db)
+
+    def add(self, track_id: int, artist: str, genres: Optional[Iterable[str]]) -> None:
+        """
+        Ajoute ou met à jour une piste (après insertion ou enrichissement)
+
+        Sans effet tant que l'index n'est pas chargé : le chargement
+        lira la piste depuis la base.
+
+        Args:
+            track_id: ID local de la piste
+            artist: Nom de l'artiste
+            genres: Genres de la piste
+        """
+        if not self.loaded:
+            return
+
+        with self._lock:
+            self._add(track_id, artist, genres)
+
+    def refresh(self, db: Session, artist_spotify_ids: List[str]) -> None:
+        """
+        Relit les pistes d'artistes dont les genres viennent de changer
+
+        Args:
+            db: Session de base de données
+            artist_spotify_ids: IDs Spotify des artistes enrichis
+        """
+        if not self.loaded or not artist_spotify_ids:
+            return
+
+        rows = db.query(Track.id, Track.artist, Track.genres).filter(
+            Track.artist_spotify_id.in_(artist_spotify_ids)
+        ).all()
+
+        with self._lock:
+            for track_id, artist, genres in rows:
+                self._add(track_id, artist, genres)
+
+    def load_neighbourhood(self, db: Session, track_id: int) -> None:
+        """
+        Indexe une piste inconnue et ses candidats sans tout recharger
+
+        Cas d'une piste insérée par un autre worker : ses candidats
+        (genre commun ou même artiste) sont lus via l'index GIN sur
+        tracks.genres.
+
+        Args:
+            db: Session de base de données
+            track_id: ID local de la piste
+        """
+        self.ensure_loaded(db)
+
+        track = db.query(Track.id, Track.artist, Track.genres).filter(Track.id == track_id).first()
+        if track is None:
+            return
+
+        candidates = db.query(Track.id, Track.artist, Track.genres).filter(
+            or_(
+                Track.genres.overlap(track.genres or []),
+                Track.artist == track.artist
+            )
+        ).all()
+
+        with self._lock:
+            for candidate_id, artist, genres in candidates:
+                self._add(candidate_id, artist, genres)
+
+    def set_features(self, features: Dict[int, Optional[np.ndarray]]) -> None:
+        """
+        Met à jour les vecteurs audio de plusieurs pistes
+
+        Args:
+            features: Dict {track_id: vecteur float32 ou None}
+        """
+        if not self.loaded:
+            return
+
+        with self._lock:
+            for track_id, vector in features.items():
+                if vector is None:
+                    self._features.pop(track_id, None)
+                else:
+                    self._features[track_id] = vector
+            self._matrix = None
+
+    def _add(self, track_id: int, artist: str, genres: Optional[Iterable[str]]) -> None:
+        """Indexe une piste (appelé sous verrou)"""
+        self._remove(track_id)
+
+        genres = frozenset(genres or [])
+        self._genres_by_track[track_id] = genres
+        self._artist_by_track[track_id] = artist
+        self._tracks_by_artist.setdefault(artist, set()).add(track_id)
+        for genre in genres:
+            self._tracks_by_genre.setdefault(genre, set()).add(track_id)
+
+    def _remove(self, track_id: int) -> None:
+        """Retire une piste des listes où elle figure (appelé sous verrou)"""
+        for genre in self._genres_by_track.pop(track_id, ()):
+            self._tracks_by_genre[genre].discard(track_id)
+
+        artist = self._artist_by_track.pop(track_id, None)
+        if artist is not None:
+            self._tracks_by_artist[artist].discard(track_id)
+
+    def _feature_matrix(self) -> Tuple[np.ndarray, np.ndarray, Dict[int, int]]:
+        """
+        Matrice des vecteurs audio centrés et normalisés (appelé sous verrou)
+
+        Reconstruite uniquement après une modification des vecteurs.
+
+        Returns:
+            (IDs des pistes, matrice N x d, position de chaque piste)
+        """
+        if self._matrix is None:
+            track_ids = np.fromiter(self._features.keys(), dtype=np.int64, count=len(self._features))
+            if len(track_ids) == 0:
+                self._matrix = (track_ids, np.zeros((0, 0), dtype=np.float32), {})
+            else:
+                matrix = np.vstack(list(self._features.values()))
+                # Centrer : la similarité cosinus devient une corrélation
+                matrix = matrix - matrix.mean(axis=0)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms > 0, norms, 1.0)
+                positions = {int(track_id): i for i, track_id in enumerate(track_ids)}
+                self._matrix = (track_ids, matrix.astype(np.float32), positions)
+
+        return self._matrix
+
+    def nearest_by_features(
+        self,
+        track_ids: List[int],
+        min_similarity: float,
+        k: int = 20
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Plus proches voisins audio de plusieurs pistes (un seul produit matriciel)
+
+        Args:
+            track_ids: Pistes de référence
+            min_similarity: Similarité cosinus minimum retenue
+            k: Nombre de voisins par piste
+
+        Returns:
+            Dict {track_id: [(voisin_id, similarité), ...]} pour les pistes
+            de référence ayant un vecteur audio
+        """
+        with self._lock:
+            all_ids, matrix, positions = self._feature_matrix()
+            rows = [positions[track_id] for track_id in track_ids if track_id in positions]
+            if not rows or len(all_ids) < 2:
+                return {}
+
+            similarities = matrix[rows] @ matrix.T
+            similarities[np.arange(len(rows)), rows] = -np.inf  # Exclure la piste elle-même
+
+        k = min(k, len(all_ids) - 1)
+        neighbours = {}
+        for row, position in zip(similarities, rows):
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            neighbours[int(all_ids[position])] = [
+                (int(all_ids[i]), float(row[i])) for i in top if row[i] >= min_similarity
+            ]
+        return neighbours
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self._genres_by_track
+
+    def similar_tracks(self, track_id: int, min_similarity: float, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Pistes similaires : Jaccard sur les genres + bonus même artiste
+
+        Args:
+            track_id: ID local de la piste de référence
+            min_similarity: Score minimum retenu
+            limit: Nombre maximum de pistes retournées
+
+        Returns:
+            Liste de (track_id, similarity_score) triée par score décroissant
+        """
+        with self._lock:
+            genres = self._genres_by_track.get(track_id)
+            if not genres:
+                return []
+
+            artist = self._artist_by_track[track_id]
+
+            # Nombre de genres communs avec chaque candidat
+            common = Counter()
+            for genre in genres:
+                common.update(self._tracks_by_genre[genre])
+
+            same_artist = self._tracks_by_artist.get(artist, set())
+
+            similarities = []
+            for candidate_id in common.keys() | same_artist:
+                if candidate_id == track_id:
+                    continue
+
+                shared = common.get(candidate_id, 0)
+                union = len(genres) + len(self._genres_by_track[candidate_id]) - shared
+                genre_similarity = shared / union if union > 0 else 0
+
+                artist_bonus = ARTIST_BONUS if candidate_id in same_artist else 0
+                similarity = min(1.0, genre_similarity + artist_bonus)
+
+                if similarity >= min_similarity:
+                    similarities.append((candidate_id, similarity))
+
+        similarities.sort(key=lambda x: (-x[1], x[0]))
+        return similarities[:limit]
+
+
+# Instance globale partagée par les routes et les services
+track_index = TrackIndex()
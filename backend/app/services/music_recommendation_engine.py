@@ -7,13 +7,15 @@ import numpy as np
 from typing import List, Dict, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sklearn.metrics.pairwise import cosine_similarity
 from collections import defaultdict
 
 from app.config import settings
 from app.models.user import User
 from app.models.music import Track, MusicRating
-from app.models.recommendation import MusicRecommendation
+from app.models.recommendation import MusicRecommendation, MusicRecommendationRun
+from app.services.music_index import track_index
 
 
 class MusicRecommendationEngine:
@@ -33,6 +35,7 @@ class MusicRecommendationEngine:
         self.min_ratings = settings.min_ratings_for_recommendations
         self.recommendations_count = settings.recommendations_count
         self.min_similarity = settings.min_similarity_score
+        self.audio_weight = settings.audio_feature_weight
     
     def generate_recommendations(self, user_id: int) -> List[MusicRecommendation]:
         """
@@ -83,7 +86,7 @@ class MusicRecommendationEngine:
                     break
         
         # Sauvegarder en BDD
-        self._save_recommendations(recommendations)
+        self._save_recommendations(user_id, recommendations)
         
         return recommendations
     
@@ -129,6 +132,7 @@ class MusicRecommendationEngine:
         """
         Filtrage basé sur le contenu
         Recommande des pistes similaires à celles que l'utilisateur a aimées
+        (genres et artiste, plus proximité des caractéristiques audio)
         
         Returns:
             Dict {track_id: score}
@@ -144,13 +148,23 @@ class MusicRecommendationEngine:
         if not liked_tracks:
             return {}
         
-        # 2. Calculer la similarité basée sur les genres et artistes
+        # 2. Voisins audio de toutes les pistes aimées (kNN vectorisé)
+        audio_neighbours = track_index.nearest_by_features(
+            [rating.track_id for rating in liked_tracks],
+            self.min_similarity
+        )
+        
+        # 3. Combiner similarité genres/artiste et similarité audio
         scores = defaultdict(float)
         
         for rating in liked_tracks:
-            similar_tracks = self._find_similar_tracks(rating.track_id)
+            similarities = defaultdict(float)
+            for similar_track_id, similarity_score in self._find_similar_tracks(rating.track_id):
+                similarities[similar_track_id] += (1 - self.audio_weight) * similarity_score
+            for similar_track_id, similarity_score in audio_neighbours.get(rating.track_id, []):
+                similarities[similar_track_id] += self.audio_weight * similarity_score
             
-            for similar_track_id, similarity_score in similar_tracks:
+            for similar_track_id, similarity_score in similarities.items():
                 # Pondérer par la note donnée
                 normalized_rating = rating.rating / 5.0
                 scores[similar_track_id] += similarity_score * normalized_rating
@@ -215,49 +229,19 @@ class MusicRecommendationEngine:
         """
         Trouve des pistes similaires basées sur les genres et l'artiste
         
+        Calculé sur l'index inversé en mémoire (genre -> pistes,
+        artiste -> pistes), sans requête par candidat.
+        
         Returns:
             Liste de (track_id, similarity_score)
         """
-        # Récupérer les informations de la piste
-        track = self.db.query(Track).filter(Track.id == track_id).first()
-        
-        if not track or not track.genres:
-            return []
-        
-        # Trouver des pistes avec des genres similaires et/ou même artiste
-        similar_tracks_query = self.db.query(
-            Track.id,
-            func.count(func.unnest(Track.genres)).label('common_genres')
-        ).filter(
-            and_(
-                Track.id != track_id,
-                Track.genres.overlap(track.genres)  # Postgres specific
-            )
-        ).group_by(Track.id).all()
+        track_index.ensure_loaded(self.db)
         
-        # Calculer le score de similarité (Jaccard pour genres + bonus artiste)
-        similarities = []
-        total_genres = len(track.genres)
-        
-        for similar_track_id, common_genres_count in similar_tracks_query:
-            similar_track = self.db.query(Track).filter(Track.id == similar_track_id).first()
-            
-            # Similarité de Jaccard pour les genres
-            union = total_genres + len(similar_track.genres) - common_genres_count
-            genre_similarity = common_genres_count / union if union > 0 else 0
-            
-            # Bonus si même artiste
-            artist_bonus = 0.3 if similar_track.artist == track.artist else 0
-            
-            # Score final
-            similarity = min(1.0, genre_similarity + artist_bonus)
-            
-            if similarity >= self.min_similarity:
-                similarities.append((similar_track_id, similarity))
+        # Piste insérée par un autre worker depuis le chargement de l'index
+        if track_id not in track_index:
+            track_index.load_neighbourhood(self.db, track_id)
         
-        # Trier par similarité décroissante
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:20]  # Top 20 pistes similaires
+        return track_index.similar_tracks(track_id, self.min_similarity, limit=20)
     
     def _combine_scores(
         self,
@@ -348,19 +332,26 @@ class MusicRecommendationEngine:
             )
             recommendations.append(recommendation)
         
-        self._save_recommendations(recommendations)
+        self._save_recommendations(user_id, recommendations)
         return recommendations
     
-    def _save_recommendations(self, recommendations: List[MusicRecommendation]):
-        """Sauvegarde les recommandations en base de données"""
-        if not recommendations:
-            return
-        
-        user_id = recommendations[0].user_id
-        
-        # Supprimer les anciennes recommandations
-        self.db.query(MusicRecommendation).filter(MusicRecommendation.user_id == user_id).delete()
+    def _save_recommendations(self, user_id: int, recommendations: List[MusicRecommendation]):
+        """
+        Sauvegarde les recommandations en base de données
         
-        # Ajouter les nouvelles
-        self.db.add_all(recommendations)
+        La date de génération est enregistrée même sans résultat (les
+        anciennes recommandations sont alors conservées) : le jeu reste
+        frais jusqu'à la prochaine note ou la fin de sa durée de vie.
+        """
+        if recommendations:
+            # Remplacer les anciennes recommandations
+            self.db.query(MusicRecommendation).filter(MusicRecommendation.user_id == user_id).delete()
+            self.db.add_all(recommendations)
+        
+        self.db.execute(
+            pg_insert(MusicRecommendationRun).values(user_id=user_id).on_conflict_do_update(
+                index_elements=[MusicRecommendationRun.user_id],
+                set_={"generated_at": func.now()}
+            )
+        )
         self.db.commit()
\ No newline at end of file
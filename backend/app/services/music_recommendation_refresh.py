@@ -0,0 +1,92 @@
+"""
+Rafraîchissement des recommandations musicales - Régénération en arrière-plan
+"""
+
+import threading
+from typing import Optional, Set, Tuple
+from fastapi import BackgroundTasks
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.music import MusicRating
+from app.models.recommendation import MusicRecommendationRun
+from app.services.music_recommendation_engine import MusicRecommendationEngine
+
+
+# Utilisateurs dont la régénération est déjà planifiée (par processus)
+_pending_users: Set[int] = set()
+_pending_lock = threading.Lock()
+
+
+def recommendations_state(db: Session, user_id: int) -> Tuple[Optional[float], bool]:
+    """
+    Âge et fraîcheur du jeu de recommandations enregistré
+
+    Le jeu est périmé si une note a été ajoutée ou modifiée après sa
+    génération, ou s'il dépasse la durée de vie configurée. La date de
+    génération vient de music_recommendation_runs, écrite même quand la
+    génération n'a rien produit.
+
+    Args:
+        db: Session de base de données
+        user_id: ID de l'utilisateur
+
+    Returns:
+        (âge en secondes ou None si jamais généré, périmé ?)
+    """
+    run = db.query(
+        MusicRecommendationRun.generated_at,
+        # Calculé par PostgreSQL pour rester sur la même horloge que generated_at
+        func.extract("epoch", func.now() - MusicRecommendationRun.generated_at)
+    ).filter(MusicRecommendationRun.user_id == user_id).first()
+
+    if run is None:
+        return None, True
+
+    generated_at, age = run
+
+    last_rating_at = db.query(
+        func.max(func.coalesce(MusicRating.updated_at, MusicRating.created_at))
+    ).filter(MusicRating.user_id == user_id).scalar()
+
+    age = max(0.0, float(age))
+    is_stale = (
+        age > settings.music_recommendations_ttl_minutes * 60
+        or (last_rating_at is not None and last_rating_at > generated_at)
+    )
+    return age, is_stale
+
+
+def schedule_regeneration(background_tasks: BackgroundTasks, user_id: int) -> None:
+    """
+    Planifie la régénération des recommandations après la réponse
+
+    Une seule régénération à la fois par utilisateur : les demandes
+    suivantes sont ignorées tant que la première n'est pas terminée.
+
+    Args:
+        background_tasks: Tâches de fond de la requête en cours
+        user_id: ID de l'utilisateur
+    """
+    with _pending_lock:
+        if user_id in _pending_users:
+            return
+        _pending_users.add(user_id)
+
+    background_tasks.add_task(_regenerate, user_id)
+
+
+def _regenerate(user_id: int) -> None:
+    """Régénère les recommandations dans une session dédiée (thread de fond)"""
+    db = SessionLocal()
+    try:
+        MusicRecommendationEngine(db).generate_recommendations(user_id)
+    except Exception as e:
+        db.rollback()
+        print(f"[MUSIC RECOMMENDATIONS] Échec de la régénération pour l'utilisateur {user_id}: {str(e)}")
+    finally:
+        db.close()
+        with _pending_lock:
+            _pending_users.discard(user_id)
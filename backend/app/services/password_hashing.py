@@ -0,0 +1,125 @@
+"""
+Pool de hachage des mots de passe - Argon2 hors de la boucle asyncio
+
+Argon2 occupe le CPU plusieurs dizaines de millisecondes par appel : exécuté
+dans une route async, il bloque toutes les autres requêtes du worker. Les
+calculs passent donc par un ThreadPoolExecutor dédié (argon2-cffi libère
+le GIL), avec une file d'attente bornée : au-delà, la requête est refusée
+(503 + Retry-After) plutôt que d'accumuler de la latence.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+
+class PasswordHashingPool:
+    """
+    Exécuteur borné pour les calculs de hachage, avec métriques de file
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.workers = workers or settings.password_hash_workers
+        self.max_queue = max_queue if max_queue is not None else settings.password_hash_max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Métriques
+        self._pending = 0  # Soumis et non terminés (en cours + en file)
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Crée l'exécuteur au premier usage"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Exécute un calcul de hachage dans le pool
+
+        Args:
+            fn: Fonction bloquante (hash ou verify)
+            args: Arguments de fn
+
+        Returns:
+            Résultat de fn
+
+        Raises:
+            HTTPException: 503 si la file d'attente est pleine
+        """
+        with self._lock:
+            if self._pending - self.workers >= self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+            self._peak_queued = max(self._peak_queued, self._pending - self.workers)
+
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self._completed += 1
+                    self._wait_seconds += started_at - submitted_at
+                    self._run_seconds += finished_at - started_at
+
+        # Le calcul est décompté à sa fin (ou à son retrait de la file), pas
+        # quand la requête qui l'attend est annulée : la file reste exacte
+        try:
+            future = self._get_executor().submit(task)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future=None) -> None:
+        """Retire un calcul terminé ou annulé du décompte de la file"""
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Métriques du pool (file d'attente, temps d'attente et de calcul moyens)"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self._pending, self.workers),
+                "queued": max(0, self._pending - self.workers),
+                "peak_queued": self._peak_queued,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else 0.0,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 2) if completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Arrête l'exécuteur (à l'arrêt de l'application)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instance partagée par tout le processus
+password_hashing_pool = PasswordHashingPool()
@@ -2,14 +2,22 @@
 Service Spotify - Interaction avec l'API Spotify
 """
 
-import base64
+import time
 import httpx
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.music import Track
+from app.models.music import Track, ArtistGenre
+from app.services.autocomplete import autocomplete_index
+from app.services.circuit_breaker import get_circuit_breaker, request_key, is_upstream_failure
+from app.services.http_client import get_http_client
+from app.services.music_index import track_index
+from app.services.spotify_token import spotify_token_manager
 
 
 class SpotifyService:
@@ -19,57 +27,15 @@ class SpotifyService:
     """
     
     def __init__(self):
-        self.base_url = "https://api.spotify.com/v1"
-        self.auth_url = "https://accounts.spotify.com/api/token"
-        self.client_id = settings.spotify_client_id
-        self.client_secret = settings.spotify_client_secret
-        self._access_token = None
-    
-    async def _get_access_token(self) -> str:
-        """
-        Obtient un access token via Client Credentials Flow
-        
-        Returns:
-            Access token Spotify
-        """
-        if not self.client_id or not self.client_secret:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Spotify credentials are not configured. Set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in backend/.env"
-            )
-        
-        # Encode client_id:client_secret en Base64
-        auth_bytes = f"{self.client_id}:{self.client_secret}".encode("ascii")
-        auth_b64 = base64.b64encode(auth_bytes).decode("ascii")
-        
-        headers = {
-            "Authorization": f"Basic {auth_b64}",
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-        
-        data = {"grant_type": "client_credentials"}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.auth_url,
-                    headers=headers,
-                    data=data,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                self._access_token = response.json()["access_token"]
-                return self._access_token
-            except httpx.HTTPError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"Spotify authentication failed: {str(e)}"
-                )
+        self.base_url = settings.spotify_base_url
     
     async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Fait une requête à l'API Spotify
         
+        Passe par le disjoncteur Spotify : si l'API est en panne ou trop lente,
+        la dernière réponse connue est servie, sinon une 503 immédiate.
+        
         Args:
             endpoint: Endpoint de l'API (ex: "/search")
             params: Paramètres de la requête
@@ -77,33 +43,38 @@ class SpotifyService:
         Returns:
             Réponse JSON de l'API
         """
-        if not self._access_token:
-            await self._get_access_token()
-        
         if params is None:
             params = {}
         
+        breaker = get_circuit_breaker("Spotify")
+        cache_key = request_key(endpoint, params)
+        
+        # Circuit ouvert : pas d'appel, réponse en cache ou échec immédiat
+        call = breaker.acquire()
+        if call is None:
+            return breaker.fallback(cache_key)
+        
         url = f"{self.base_url}{endpoint}"
-        headers = {"Authorization": f"Bearer {self._access_token}"}
+        client = get_http_client()
+        started = time.monotonic()
         
-        async with httpx.AsyncClient() as client:
+        # Annulation ou erreur imprévue (dont l'échec d'obtention du token) :
+        # issue enregistrée par call à la sortie
+        with call:
+            token = await spotify_token_manager.get_token()
+            headers = {"Authorization": f"Bearer {token}"}
+            
             try:
-                response = await client.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    timeout=10.0
-                )
+                response = await client.get(url, params=params, headers=headers)
                 
-                # Si token expiré, en obtenir un nouveau
+                # Token révoqué avant son expiration : en obtenir un nouveau
                 if response.status_code == 401:
-                    self._access_token = await self._get_access_token()
-                    headers["Authorization"] = f"Bearer {self._access_token}"
+                    token = await spotify_token_manager.invalidate(token)
+                    headers["Authorization"] = f"Bearer {token}"
                     response = await client.get(url, params=params, headers=headers)
                 
                 response.raise_for_status()
-                return response.json()
-                
+            
             except httpx.HTTPError as e:
                 # Log l'erreur complète
                 error_msg = f"Spotify API error: {str(e)}"
@@ -117,10 +88,27 @@ class SpotifyService:
                 
                 print(f"[SPOTIFY ERROR] {error_msg}")
                 
-                raise HTTPException(
+                # Transmettre le délai demandé par Spotify en cas de rate limit
+                headers = None
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+                    headers = {"Retry-After": e.response.headers.get("Retry-After", "1")}
+                
+                error = HTTPException(
                     status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=error_msg
+                    detail=error_msg,
+                    headers=headers
                 )
+                if not is_upstream_failure(e):
+                    call.success(time.monotonic() - started)
+                    raise error
+                call.failure()
+                return breaker.fallback(cache_key, error)
+            
+            data = response.json()
+            call.success(time.monotonic() - started)
+        
+        breaker.remember(cache_key, data)
+        return data
     
     async def search_tracks(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
         """
@@ -155,6 +143,66 @@ class SpotifyService:
         """
         return await self._make_request(f"/tracks/{track_id}")
     
+    async def get_tracks(self, track_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Récupère plusieurs pistes
+        
+        Un appel /tracks?ids= par lot de 50 (maximum autorisé par Spotify).
+        
+        Args:
+            track_ids: IDs Spotify des pistes
+        
+        Returns:
+            Liste des pistes trouvées
+        """
+        tracks = []
+        for start in range(0, len(track_ids), 50):
+            batch = track_ids[start:start + 50]
+            response = await self._make_request("/tracks", {"ids": ",".join(batch), "market": "FR"})
+            # Spotify renvoie null pour un ID inconnu
+            tracks.extend(track for track in response.get("tracks", []) if track)
+        return tracks
+    
+    async def get_artists(self, artist_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Récupère plusieurs artistes (avec leurs genres)
+        
+        Un appel /artists?ids= par lot de 50 (maximum autorisé par Spotify).
+        
+        Args:
+            artist_ids: IDs Spotify des artistes
+        
+        Returns:
+            Liste des artistes trouvés
+        """
+        artists = []
+        for start in range(0, len(artist_ids), 50):
+            batch = artist_ids[start:start + 50]
+            response = await self._make_request("/artists", {"ids": ",".join(batch)})
+            # Spotify renvoie null pour un ID inconnu
+            artists.extend(artist for artist in response.get("artists", []) if artist)
+        return artists
+    
+    async def get_audio_features(self, track_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Récupère les caractéristiques audio de plusieurs pistes
+        
+        Un appel /audio-features?ids= par lot de 100 (maximum autorisé par Spotify).
+        
+        Args:
+            track_ids: IDs Spotify des pistes
+        
+        Returns:
+            Liste des caractéristiques trouvées (tempo, energy, valence...)
+        """
+        features = []
+        for start in range(0, len(track_ids), 100):
+            batch = track_ids[start:start + 100]
+            response = await self._make_request("/audio-features", {"ids": ",".join(batch)})
+            # Spotify renvoie null pour une piste sans analyse
+            features.extend(item for item in response.get("audio_features", []) if item)
+        return features
+    
     async def get_recommendations(
         self,
         seed_tracks: Optional[List[str]] = None,
@@ -224,6 +272,99 @@ class SpotifyService:
         }
         return await self._make_request("/browse/new-releases", params)
     
+    @staticmethod
+    def _track_row(track_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convertit les données Spotify d'une piste en ligne de la table tracks
+        
+        Args:
+            track_data: Données de la piste depuis Spotify
+        
+        Returns:
+            Dictionnaire colonne -> valeur
+        """
+        album = track_data.get("album") or {}
+        artists = track_data.get("artists") or []
+        
+        return {
+            "spotify_id": track_data["id"],
+            "title": track_data["name"],
+            "artist": artists[0]["name"] if artists else "Unknown Artist",
+            "artist_spotify_id": artists[0].get("id") if artists else None,
+            "album": album.get("name"),
+            "release_year": int(album["release_date"][:4]) if album.get("release_date") else None,
+            "preview_url": track_data.get("preview_url"),
+            "image_url": album["images"][0].get("url") if album.get("images") else None,
+            "duration_ms": track_data.get("duration_ms"),
+            "popularity": track_data.get("popularity"),
+        }
+    
+    def save_tracks_bulk(self, db: Session, tracks_data: List[Dict[str, Any]]) -> List[Track]:
+        """
+        Sauvegarde une page de pistes Spotify en une seule transaction
+        
+        Utilise INSERT ... ON CONFLICT (spotify_id) : les pistes existantes
+        sont complétées avec les valeurs non nulles reçues, les autres sont
+        créées avec les genres déjà connus de leur artiste. Les genres des
+        pistes existantes restent gérés par l'enrichissement.
+        
+        Args:
+            db: Session de base de données
+            tracks_data: Pistes depuis Spotify (recherche, détails, /tracks)
+        
+        Returns:
+            Pistes persistées, dans l'ordre de tracks_data
+        """
+        # Dédupliquer par ID (ON CONFLICT ne peut pas toucher deux fois la même ligne)
+        rows_by_id = {}
+        for track_data in tracks_data:
+            if not track_data or not track_data.get("id") or not track_data.get("name"):
+                continue
+            rows_by_id[track_data["id"]] = self._track_row(track_data)
+        
+        if not rows_by_id:
+            return []
+        
+        # Genres déjà connus des artistes (sinon complétés par l'enrichissement)
+        artist_ids = {row["artist_spotify_id"] for row in rows_by_id.values() if row["artist_spotify_id"]}
+        known_genres = dict(
+            db.query(ArtistGenre.spotify_id, ArtistGenre.genres).filter(
+                ArtistGenre.spotify_id.in_(artist_ids)
+            ).all()
+        ) if artist_ids else {}
+        
+        spotify_ids = sorted(rows_by_id)
+        rows = [
+            {**rows_by_id[spotify_id], "genres": known_genres.get(rows_by_id[spotify_id]["artist_spotify_id"]) or []}
+            for spotify_id in spotify_ids
+        ]
+        
+        stmt = pg_insert(Track).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Track.spotify_id],
+            set_={
+                column: func.coalesce(stmt.excluded[column], Track.__table__.c[column])
+                for column in rows_by_id[spotify_ids[0]]
+                if column != "spotify_id"
+            }
+        )
+        db.execute(stmt)
+        db.commit()
+        
+        tracks_by_id = {
+            track.spotify_id: track
+            for track in db.query(Track).filter(Track.spotify_id.in_(spotify_ids)).all()
+        }
+        
+        for track in tracks_by_id.values():
+            track_index.add(track.id, track.artist, track.genres)
+        autocomplete_index.add_tracks(tracks_by_id.values())
+        
+        ordered_ids = dict.fromkeys(
+            track_data["id"] for track_data in tracks_data if track_data and track_data.get("id") in rows_by_id
+        )
+        return [tracks_by_id[spotify_id] for spotify_id in ordered_ids if spotify_id in tracks_by_id]
+    
     def save_track_to_db(self, db: Session, track_data: Dict[str, Any]) -> Track:
         """
         Sauvegarde une piste Spotify dans la base de données
@@ -233,35 +374,58 @@ class SpotifyService:
             track_data: Données de la piste depuis Spotify
         
         Returns:
-            Track créé ou existant
+            Track créé ou mis à jour
         """
-        spotify_id = track_data["id"]
-        
-        # Vérifier si la piste existe déjà
-        existing_track = db.query(Track).filter(Track.spotify_id == spotify_id).first()
-        
-        if existing_track:
-            return existing_track
-        
-        # Extraire les données de la piste
-        album = track_data.get("album", {})
-        artists = track_data.get("artists", [])
-        
-        track = Track(
-            spotify_id=spotify_id,
-            title=track_data["name"],
-            artist=artists[0]["name"] if artists else "Unknown Artist",
-            album=album.get("name"),
-            release_year=int(album.get("release_date", "0")[:4]) if album.get("release_date") else None,
-            preview_url=track_data.get("preview_url"),
-            image_url=album.get("images", [{}])[0].get("url") if album.get("images") else None,
-            duration_ms=track_data.get("duration_ms"),
-            popularity=track_data.get("popularity"),
-            genres=[]  # Les genres nécessitent un appel API supplémentaire à /artists/{id}
-        )
+        tracks = self.save_tracks_bulk(db, [track_data])
+        if not tracks:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Réponse Spotify invalide"
+            )
+        return tracks[0]
+    
+    @staticmethod
+    def stale_track_ids(db: Session, limit: int = 50) -> List[str]:
+        """
+        Pistes les plus anciennement mises à jour (au-delà de spotify_track_refresh_days)
+        
+        Args:
+            db: Session de base de données
+            limit: Nombre maximum d'IDs retournés
+        
+        Returns:
+            IDs Spotify des pistes à rafraîchir via get_tracks
+        """
+        threshold = datetime.now(timezone.utc) - timedelta(days=settings.spotify_track_refresh_days)
+        last_update = func.coalesce(Track.updated_at, Track.created_at)
         
-        db.add(track)
+        return [
+            spotify_id for (spotify_id,) in db.query(Track.spotify_id).filter(
+                last_update < threshold
+            ).order_by(last_update).limit(limit).all()
+        ]
+    
+    def save_refreshed_tracks(self, db: Session, stale_ids: List[str], tracks_data: List[Dict[str, Any]]) -> int:
+        """
+        Sauvegarde un lot de pistes rafraîchies et les marque comme vérifiées
+        
+        Toutes les pistes demandées sont marquées, y compris celles inconnues
+        de Spotify (ex: albums des nouveautés), pour ne pas être redemandées
+        en boucle : ON CONFLICT DO UPDATE n'applique pas onupdate.
+        
+        Args:
+            db: Session de base de données
+            stale_ids: IDs demandés (voir stale_track_ids)
+            tracks_data: Pistes renvoyées par get_tracks
+        
+        Returns:
+            Nombre de pistes rafraîchies
+        """
+        refreshed = self.save_tracks_bulk(db, tracks_data)
+        
+        db.query(Track).filter(Track.spotify_id.in_(stale_ids)).update(
+            {Track.updated_at: func.now()}, synchronize_session=False
+        )
         db.commit()
-        db.refresh(track)
         
-        return track
\ No newline at end of file
+        return len(refreshed)
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Gestion du token Spotify - Rafraîchissement anticipé et partage entre workers
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import Optional, Dict, Any
+import httpx
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.services.http_client import get_http_client
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+
+class SpotifyTokenManager:
+    """
+    Token Spotify (Client Credentials Flow) partagé par tout le processus
+
+    - Le token est rafraîchi avant son expiration (marge configurable),
+      pas après un 401
+    - Un asyncio.Lock garantit un seul rafraîchissement à la fois dans
+      le processus
+    - Le token est partagé entre workers via un fichier local : le premier
+      worker qui rafraîchit l'écrit, les autres le relisent
+    """
+
+    def __init__(self, token_path: Optional[str] = None):
+        self.token_path = token_path or settings.spotify_token_cache_path
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, expires_at: float) -> bool:
+        """Le token reste-t-il valide au-delà de la marge de rafraîchissement ?"""
+        return expires_at - settings.spotify_token_refresh_margin_seconds > time.time()
+
+    async def get_token(self) -> str:
+        """
+        Retourne un access token valide
+
+        Returns:
+            Access token Spotify
+        """
+        if self._access_token and self._is_fresh(self._expires_at):
+            return self._access_token
+
+        async with self._lock:
+            # Un autre appel a pu rafraîchir pendant l'attente du verrou
+            if self._access_token and self._is_fresh(self._expires_at):
+                return self._access_token
+
+            await self._refresh(stale_token=None)
+            return self._access_token
+
+    async def invalidate(self, token: str) -> str:
+        """
+        Force le renouvellement d'un token refusé par Spotify (401)
+
+        Args:
+            token: Token refusé
+
+        Returns:
+            Nouveau token (ou celui déjà obtenu par un appel concurrent)
+        """
+        async with self._lock:
+            if self._access_token != token and self._access_token and self._is_fresh(self._expires_at):
+                return self._access_token
+
+            await self._refresh(stale_token=token)
+            return self._access_token
+
+    async def _refresh(self, stale_token: Optional[str]) -> None:
+        """
+        Recharge le token depuis le fichier partagé, ou le demande à Spotify
+
+        Args:
+            stale_token: Token à ne pas réutiliser (refusé par Spotify)
+        """
+        lock_file = await self._acquire_file_lock_async()
+        try:
+            shared = await asyncio.to_thread(self._read_shared_token)
+            if shared and shared["access_token"] != stale_token and self._is_fresh(shared["expires_at"]):
+                self._access_token = shared["access_token"]
+                self._expires_at = shared["expires_at"]
+                return
+
+            token_data = await self._request_token()
+            self._access_token = token_data["access_token"]
+            self._expires_at = time.time() + token_data.get("expires_in", 3600)
+            await asyncio.to_thread(self._write_shared_token)
+            print(f"[SPOTIFY] Nouveau token, expire dans {token_data.get('expires_in', 3600)}s")
+        finally:
+            await asyncio.to_thread(self._release_file_lock, lock_file)
+
+    async def _request_token(self) -> Dict[str, Any]:
+        """
+        Demande un nouveau token à Spotify
+
+        Returns:
+            Réponse JSON (access_token, expires_in)
+        """
+        if not settings.spotify_client_id or not settings.spotify_client_secret:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Spotify credentials are not configured. Set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in backend/.env"
+            )
+
+        # Encode client_id:client_secret en Base64
+        auth_bytes = f"{settings.spotify_client_id}:{settings.spotify_client_secret}".encode("ascii")
+        auth_b64 = base64.b64encode(auth_bytes).decode("ascii")
+
+        headers = {
+            "Authorization": f"Basic {auth_b64}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+
+        try:
+            response = await get_http_client().post(
+                settings.spotify_auth_url,
+                headers=headers,
+                data={"grant_type": "client_credentials"}
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Spotify authentication failed: {str(e)}"
+            )
+
+    async def _acquire_file_lock_async(self):
+        """
+        Prend le verrou inter-processus dans un thread, sans le perdre si
+        l'appel est annulé pendant l'attente (le thread finit par l'obtenir :
+        il est alors libéré dès son obtention)
+        """
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire_file_lock))
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(self._release_abandoned_file_lock)
+            raise
+
+    @classmethod
+    def _release_abandoned_file_lock(cls, acquiring: "asyncio.Future") -> None:
+        """Libère un verrou obtenu après l'annulation de son demandeur"""
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            cls._release_file_lock(acquiring.result())
+
+    def _acquire_file_lock(self):
+        """Verrou exclusif inter-processus pendant le rafraîchissement"""
+        if fcntl is None:
+            return None
+
+        try:
+            lock_file = open(f"{self.token_path}.lock", "w")
+        except OSError:
+            return None
+
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    @staticmethod
+    def _release_file_lock(lock_file) -> None:
+        """Libère le verrou pris par _acquire_file_lock"""
+        if lock_file is None:
+            return
+
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    def _read_shared_token(self) -> Optional[Dict[str, Any]]:
+        """Lit le token partagé (None si absent ou illisible)"""
+        try:
+            with open(self.token_path) as f:
+                data = json.load(f)
+            return {"access_token": data["access_token"], "expires_at": float(data["expires_at"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_shared_token(self) -> None:
+        """Écrit le token partagé de façon atomique (lisible par le seul propriétaire)"""
+        tmp_path = f"{self.token_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": self._access_token, "expires_at": self._expires_at}, f)
+            os.replace(tmp_path, self.token_path)
+        except OSError as e:
+            print(f"[SPOTIFY] Token non partagé ({str(e)})")
+
+
+# Instance partagée par tout le processus
+spotify_token_manager = SpotifyTokenManager()
@@ -2,14 +2,32 @@
 Service TMDB - Interaction avec l'API The Movie Database
 """
 
+import asyncio
+import time
 import httpx
 from typing import Optional, List, Dict, Any
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, selectinload
 
 from app.config import settings
 from app.models.movie import Movie, Genre, MovieGenre
 from app.models.tv_show import TVShow
+from app.services import catalog_search
+from app.services.autocomplete import autocomplete_index
+from app.services.cache import TTLCache
+from app.services.circuit_breaker import get_circuit_breaker, request_key, is_upstream_failure
+from app.services.genre_cache import genre_cache
+
+
+# Cache des bundles films (détails + similaires + crédits + vidéos),
+# partagé par toutes les instances du service dans le processus
+_movie_bundle_cache = TTLCache(
+    max_size=settings.tmdb_bundle_cache_size,
+    ttl_seconds=settings.tmdb_bundle_cache_ttl_seconds
+)
+_movie_bundle_inflight: Dict[int, "asyncio.Future"] = {}
 
 
 class TMDBService:
@@ -27,6 +45,9 @@ class TMDBService:
         """
         Fait une requête à l'API TMDB
         
+        Passe par le disjoncteur TMDB : si l'API est en panne ou trop lente,
+        la dernière réponse connue est servie, sinon une 503 immédiate.
+        
         Args:
             endpoint: Endpoint de l'API (ex: "/movie/popular")
             params: Paramètres de la requête
@@ -45,35 +66,62 @@ class TMDBService:
                         "Set TMDB_API_KEY in backend/.env or your environment and restart the service."),
             )
 
+        breaker = get_circuit_breaker("TMDB")
+        cache_key = request_key(endpoint, params)
+        
+        # Circuit ouvert : pas d'appel, réponse en cache ou échec immédiat
+        call = breaker.acquire()
+        if call is None:
+            return breaker.fallback(cache_key)
+        
         params["api_key"] = self.api_key
         params["language"] = "fr-FR"  # Langue française
         
         url = f"{self.base_url}{endpoint}"
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                # If the provided API key looks like a JWT (v4 access token), use
-                # it as a Bearer token in the Authorization header. Otherwise,
-                # pass it as the `api_key` query parameter (v3 key).
-                headers = None
-                if self.api_key.strip().startswith("eyJ"):
-                    headers = {"Authorization": f"Bearer {self.api_key}"}
+        started = time.monotonic()
+        
+        # Annulation ou erreur imprévue : issue enregistrée par call à la sortie
+        with call:
+            async with httpx.AsyncClient() as client:
+                try:
+                    # If the provided API key looks like a JWT (v4 access token), use
+                    # it as a Bearer token in the Authorization header. Otherwise,
+                    # pass it as the `api_key` query parameter (v3 key).
+                    headers = None
+                    if self.api_key.strip().startswith("eyJ"):
+                        headers = {"Authorization": f"Bearer {self.api_key}"}
 
-                response = await client.get(url, params=params, headers=headers, timeout=10.0)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                # Return a clearer 503 with TMDB response summary
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=(f"TMDB API returned {e.response.status_code}: "
-                            f"{e.response.text[:200]}"),
-                )
-            except httpx.HTTPError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"TMDB API error: {str(e)}"
-                )
+                    response = await client.get(
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=settings.upstream_timeout_seconds
+                    )
+                    response.raise_for_status()
+                except httpx.HTTPStatusError as e:
+                    # Return a clearer 503 with TMDB response summary
+                    error = HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=(f"TMDB API returned {e.response.status_code}: "
+                                f"{e.response.text[:200]}"),
+                    )
+                    if not is_upstream_failure(e):
+                        call.success(time.monotonic() - started)
+                        raise error
+                    call.failure()
+                    return breaker.fallback(cache_key, error)
+                except httpx.HTTPError as e:
+                    call.failure()
+                    return breaker.fallback(cache_key, HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=f"TMDB API error: {str(e)}"
+                    ))
+            
+            data = response.json()
+            call.success(time.monotonic() - started)
+        
+        breaker.remember(cache_key, data)
+        return data
     
     async def search_movies(self, query: str, page: int = 1) -> Dict[str, Any]:
         """
@@ -88,17 +136,46 @@ class TMDBService:
         """
         return await self._make_request("/search/movie", {"query": query, "page": page})
     
+    async def get_movie_bundle(self, movie_id: int) -> Dict[str, Any]:
+        """
+        Récupère un film avec ses films similaires, crédits et vidéos
+        
+        Un seul appel TMDB (append_to_response), mis en cache comme un tout.
+        Les appels simultanés pour un même film partagent la même requête.
+        
+        Args:
+            movie_id: ID TMDB du film
+        
+        Returns:
+            Détails du film + clés "similar", "credits" et "videos"
+        """
+        bundle = _movie_bundle_cache.get(movie_id)
+        if bundle is not None:
+            return bundle
+        
+        pending = _movie_bundle_inflight.get(movie_id)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._make_request(f"/movie/{movie_id}", {"append_to_response": "similar,credits,videos"})
+            )
+            _movie_bundle_inflight[movie_id] = pending
+            pending.add_done_callback(lambda _: _movie_bundle_inflight.pop(movie_id, None))
+        
+        bundle = await asyncio.shield(pending)
+        _movie_bundle_cache.set(movie_id, bundle)
+        return bundle
+    
     async def get_movie_details(self, movie_id: int) -> Dict[str, Any]:
         """
-        Récupère les détails d'un film
+        Récupère les détails d'un film (avec similaires, crédits et vidéos)
         
         Args:
             movie_id: ID TMDB du film
         
         Returns:
-            Détails du film
+            Détails du film (copie modifiable du bundle en cache)
         """
-        return await self._make_request(f"/movie/{movie_id}")
+        return dict(await self.get_movie_bundle(movie_id))
     
     async def get_popular_movies(self, page: int = 1, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -149,8 +226,8 @@ class TMDBService:
         Returns:
             Liste de films similaires
         """
-        response = await self._make_request(f"/movie/{movie_id}/similar", {"page": 1})
-        return response.get("results", [])[:limit]
+        bundle = await self.get_movie_bundle(movie_id)
+        return bundle.get("similar", {}).get("results", [])[:limit]
     
     # TV Shows Methods
     
@@ -274,6 +351,135 @@ class TMDBService:
             return None
         return f"{self.image_base_url}/{size}{backdrop_path}"
     
+    @staticmethod
+    def _movie_row(movie_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convertit les données TMDB d'un film en ligne de la table movies
+        
+        Args:
+            movie_data: Données du film depuis TMDB
+        
+        Returns:
+            Dictionnaire colonne -> valeur
+        """
+        return {
+            "id": movie_data["id"],
+            "title": movie_data.get("title"),
+            "original_title": movie_data.get("original_title"),
+            "overview": movie_data.get("overview"),
+            # TMDB renvoie "" pour les dates inconnues, refusé par une colonne DATE
+            "release_date": movie_data.get("release_date") or None,
+            "poster_path": movie_data.get("poster_path"),
+            "backdrop_path": movie_data.get("backdrop_path"),
+            "vote_average": movie_data.get("vote_average"),
+            "vote_count": movie_data.get("vote_count"),
+            "popularity": movie_data.get("popularity"),
+            "original_language": movie_data.get("original_language"),
+            "runtime": movie_data.get("runtime"),
+            "budget": movie_data.get("budget"),
+            "revenue": movie_data.get("revenue"),
+            "status": movie_data.get("status"),
+            "tagline": movie_data.get("tagline")
+        }
+    
+    def save_movies_bulk(self, db: Session, movies_data: List[Dict[str, Any]]) -> List[Movie]:
+        """
+        Sauvegarde une page de films TMDB en une seule transaction
+        
+        Utilise INSERT ... ON CONFLICT : les films existants sont complétés
+        avec les valeurs non nulles reçues, les autres sont créés. Les lignes
+        sont insérées dans l'ordre des IDs, ce qui rend l'opération sûre face
+        à des requêtes concurrentes insérant les mêmes films.
+        
+        Args:
+            db: Session de base de données
+            movies_data: Films depuis TMDB (listes, recherche ou détails)
+        
+        Returns:
+            Films persistés, dans l'ordre de movies_data
+        """
+        # Dédupliquer par ID (ON CONFLICT ne peut pas toucher deux fois la même ligne)
+        rows_by_id = {}
+        for movie_data in movies_data:
+            if movie_data.get("id") is None or not movie_data.get("title"):
+                continue
+            rows_by_id[movie_data["id"]] = self._movie_row(movie_data)
+        
+        if not rows_by_id:
+            return []
+        
+        movie_ids = sorted(rows_by_id)
+        
+        stmt = pg_insert(Movie).values([rows_by_id[movie_id] for movie_id in movie_ids])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Movie.id],
+            set_={
+                column: func.coalesce(stmt.excluded[column], Movie.__table__.c[column])
+                for column in rows_by_id[movie_ids[0]]
+                if column != "id"
+            }
+        )
+        db.execute(stmt)
+        
+        # Genres : format complet ("genres") depuis les détails,
+        # ou simples IDs ("genre_ids") depuis la recherche/discover
+        new_genres = {}
+        movie_genre_pairs = set()
+        listed_genre_ids = set()
+        
+        for movie_data in movies_data:
+            movie_id = movie_data.get("id")
+            if movie_id not in rows_by_id:
+                continue
+            
+            if "genres" in movie_data:
+                for genre_data in movie_data["genres"]:
+                    new_genres[genre_data["id"]] = genre_data["name"]
+                    movie_genre_pairs.add((movie_id, genre_data["id"]))
+            elif "genre_ids" in movie_data:
+                for genre_id in movie_data["genre_ids"]:
+                    listed_genre_ids.add(genre_id)
+                    movie_genre_pairs.add((movie_id, genre_id))
+        
+        # Insérer uniquement les genres absents du cache
+        missing_genres = {
+            genre_id: name for genre_id, name in new_genres.items()
+            if genre_cache.get_name(genre_id) is None
+        }
+        if missing_genres:
+            db.execute(
+                pg_insert(Genre).values(
+                    [{"id": genre_id, "name": name} for genre_id, name in sorted(missing_genres.items())]
+                ).on_conflict_do_nothing()
+            )
+        
+        # Les genre_ids doivent déjà exister (initialisés dans init.sql)
+        known_genre_ids = set(new_genres) | genre_cache.known_ids(db, listed_genre_ids - set(new_genres))
+        
+        movie_genre_rows = [
+            {"movie_id": movie_id, "genre_id": genre_id}
+            for movie_id, genre_id in sorted(movie_genre_pairs)
+            if genre_id in known_genre_ids
+        ]
+        if movie_genre_rows:
+            db.execute(pg_insert(MovieGenre).values(movie_genre_rows).on_conflict_do_nothing())
+        
+        db.commit()
+        
+        if missing_genres:
+            genre_cache.register(missing_genres)
+        
+        movies_by_id = {
+            movie.id: movie
+            for movie in db.query(Movie).filter(Movie.id.in_(movie_ids)).all()
+        }
+        autocomplete_index.add_movies(movies_by_id.values())
+        
+        ordered_ids = dict.fromkeys(
+            movie_data["id"] for movie_data in movies_data if movie_data.get("id") in rows_by_id
+        )
+        return [movies_by_id[movie_id] for movie_id in ordered_ids if movie_id in movies_by_id]
+    
     def save_movie_to_db(self, db: Session, movie_data: Dict[str, Any]) -> Movie:
         """
         Sauvegarde un film depuis TMDB dans la base de données
@@ -285,66 +491,219 @@ class TMDBService:
         Returns:
             Movie créé ou existant
         """
-        movie_id = movie_data["id"]
-        
-        # Vérifier si le film existe déjà
-        existing_movie = db.query(Movie).filter(Movie.id == movie_id).first()
-        
-        if existing_movie:
-            return existing_movie
-        
-        # Créer le film
-        movie = Movie(
-            id=movie_id,
-            title=movie_data.get("title"),
-            original_title=movie_data.get("original_title"),
-            overview=movie_data.get("overview"),
-            release_date=movie_data.get("release_date"),
-            poster_path=movie_data.get("poster_path"),
-            backdrop_path=movie_data.get("backdrop_path"),
-            vote_average=movie_data.get("vote_average"),
-            vote_count=movie_data.get("vote_count"),
-            popularity=movie_data.get("popularity"),
-            original_language=movie_data.get("original_language"),
-            runtime=movie_data.get("runtime"),
-            budget=movie_data.get("budget"),
-            revenue=movie_data.get("revenue"),
-            status=movie_data.get("status"),
-            tagline=movie_data.get("tagline")
-        )
+        movies = self.save_movies_bulk(db, [movie_data])
+        if not movies:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Réponse TMDB invalide"
+            )
+        return movies[0]
+    
+    @staticmethod
+    def _movie_to_tmdb(movie: Movie) -> Dict[str, Any]:
+        """
+        Convertit un film de la BDD au format de réponse TMDB
         
-        db.add(movie)
-        
-        # Ajouter les genres
-        if "genres" in movie_data:
-            for genre_data in movie_data["genres"]:
-                genre_id = genre_data["id"]
-                
-                # Vérifier si le genre existe
-                genre = db.query(Genre).filter(Genre.id == genre_id).first()
-                
-                if not genre:
-                    genre = Genre(id=genre_id, name=genre_data["name"])
-                    db.add(genre)
-                
-                # Créer la relation
-                movie_genre = MovieGenre(movie_id=movie_id, genre_id=genre_id)
-                db.add(movie_genre)
-        
-        # Gérer les genres depuis genre_ids (recherche/discover)
-        elif "genre_ids" in movie_data:
-            for genre_id in movie_data["genre_ids"]:
-                # Le genre doit déjà exister (initialisé dans init.sql)
-                genre = db.query(Genre).filter(Genre.id == genre_id).first()
-                
-                if genre:
-                    movie_genre = MovieGenre(movie_id=movie_id, genre_id=genre_id)
-                    db.add(movie_genre)
+        Args:
+            movie: Film stocké localement
+        
+        Returns:
+            Dict avec les mêmes clés qu'un résultat TMDB
+        """
+        return {
+            "id": movie.id,
+            "title": movie.title,
+            "original_title": movie.original_title,
+            "overview": movie.overview,
+            "release_date": movie.release_date.isoformat() if movie.release_date else None,
+            "poster_path": movie.poster_path,
+            "backdrop_path": movie.backdrop_path,
+            "vote_average": float(movie.vote_average) if movie.vote_average is not None else None,
+            "vote_count": movie.vote_count,
+            "popularity": float(movie.popularity) if movie.popularity is not None else None,
+            "original_language": movie.original_language,
+            "genre_ids": [genre.id for genre in movie.genres],
+        }
+    
+    def get_local_movies(
+        self,
+        db: Session,
+        order_by: str = "popularity",
+        page: int = 1,
+        per_page: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Liste de films depuis le catalogue local (repli quand TMDB est indisponible)
+        
+        Args:
+            db: Session de base de données
+            order_by: "popularity", "vote_average" ou "release_date"
+            page: Numéro de page
+            per_page: Nombre de films par page
+        
+        Returns:
+            Page au format TMDB (page, results, total_results, total_pages)
+        """
+        column = getattr(Movie, order_by)
+        query = db.query(Movie).filter(column.isnot(None))
+        if order_by == "vote_average":
+            # Comme TMDB : ignorer les films avec trop peu de votes
+            query = query.filter(Movie.vote_count >= 100)
+        
+        total = query.count()
+        movies = query.options(selectinload(Movie.genres)).order_by(
+            column.desc(), Movie.id
+        ).offset((page - 1) * per_page).limit(per_page).all()
+        
+        return {
+            "page": page,
+            "results": [self._movie_to_tmdb(movie) for movie in movies],
+            "total_results": total,
+            "total_pages": max(1, -(-total // per_page)),
+            "source": "local"
+        }
+    
+    def local_search_page(self, results: "catalog_search.LocalResults", page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """
+        Page de recherche depuis le catalogue local (voir catalog_search.search_movies)
+        
+        Args:
+            results: Résultats locaux de la page demandée
+            page: Numéro de page
+            per_page: Nombre de films par page
+        
+        Returns:
+            Page au format TMDB (page, results, total_results, total_pages)
+        """
+        return {
+            "page": page,
+            "results": [self._movie_to_tmdb(movie) for movie in results.items],
+            "total_results": results.total,
+            "total_pages": max(1, -(-results.total // per_page)),
+            "source": "local"
+        }
+    
+    def get_local_movie_details(self, db: Session, movie_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Détails d'un film depuis le catalogue local (repli quand TMDB est indisponible)
+        
+        Args:
+            db: Session de base de données
+            movie_id: ID TMDB du film
+        
+        Returns:
+            Détails au format TMDB, ou None si le film n'est pas en BDD
+        """
+        movie = db.query(Movie).options(selectinload(Movie.genres)).filter(Movie.id == movie_id).first()
+        if movie is None:
+            return None
+        
+        movie_data = self._movie_to_tmdb(movie)
+        movie_data.update({
+            "genres": [{"id": genre.id, "name": genre.name} for genre in movie.genres],
+            "runtime": movie.runtime,
+            "budget": movie.budget,
+            "revenue": movie.revenue,
+            "status": movie.status,
+            "tagline": movie.tagline,
+            "source": "local"
+        })
+        return movie_data
+    
+    @staticmethod
+    def _tv_show_row(tv_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convertit les données TMDB d'une série en ligne de la table tv_shows
+        
+        Seuls les champs présents dans tv_data sont renseignés : une entrée
+        de liste (sans genres ni saisons) n'écrase pas les détails déjà connus.
+        
+        Args:
+            tv_data: Données de la série depuis TMDB
+        
+        Returns:
+            Dictionnaire colonne -> valeur
+        """
+        row = {
+            "id": tv_data["id"],
+            "title": tv_data.get("name")  # TMDB uses 'name' for TV shows
+        }
+        
+        simple_fields = {
+            "original_name": "original_title",
+            "poster_path": "poster_path",
+            "backdrop_path": "backdrop_path",
+            "vote_average": "vote_average",
+            "vote_count": "vote_count",
+            "popularity": "popularity",
+            "number_of_seasons": "number_of_seasons",
+            "number_of_episodes": "number_of_episodes",
+            "status": "status"
+        }
+        for tmdb_key, column in simple_fields.items():
+            if tmdb_key in tv_data:
+                row[column] = tv_data[tmdb_key]
+        
+        if "overview" in tv_data:
+            row["overview"] = (tv_data["overview"] or "")[:2000]
+        
+        # TMDB renvoie "" pour les dates inconnues, refusé par une colonne DATE
+        for date_key in ("first_air_date", "last_air_date"):
+            if date_key in tv_data:
+                row[date_key] = tv_data[date_key] or None
+        
+        if "genres" in tv_data:
+            row["genres"] = [{"id": g["id"], "name": g["name"]} for g in tv_data["genres"]]
+        if "networks" in tv_data:
+            row["networks"] = [{"id": n["id"], "name": n["name"]} for n in tv_data["networks"]]
+        
+        return row
+    
+    def save_tv_shows_bulk(self, db: Session, tv_shows_data: List[Dict[str, Any]]) -> List[TVShow]:
+        """
+        Sauvegarde une page de séries TMDB en une seule transaction
+        
+        Args:
+            db: Session de base de données
+            tv_shows_data: Séries depuis TMDB (listes ou détails)
+        
+        Returns:
+            Séries persistées, dans l'ordre de tv_shows_data
+        """
+        rows_by_id = {}
+        for tv_data in tv_shows_data:
+            if tv_data.get("id") is None or not tv_data.get("name"):
+                continue
+            rows_by_id[tv_data["id"]] = self._tv_show_row(tv_data)
+        
+        if not rows_by_id:
+            return []
+        
+        # Un INSERT par jeu de colonnes (listes vs détails), lignes triées par ID
+        rows_by_columns = {}
+        for tv_id in sorted(rows_by_id):
+            row = rows_by_id[tv_id]
+            rows_by_columns.setdefault(tuple(sorted(row)), []).append(row)
+        
+        for columns, rows in rows_by_columns.items():
+            stmt = pg_insert(TVShow).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TVShow.id],
+                set_={column: stmt.excluded[column] for column in columns if column != "id"}
+            )
+            db.execute(stmt)
         
         db.commit()
-        db.refresh(movie)
         
-        return movie
+        shows_by_id = {
+            show.id: show
+            for show in db.query(TVShow).filter(TVShow.id.in_(list(rows_by_id))).all()
+        }
+        
+        ordered_ids = dict.fromkeys(
+            tv_data["id"] for tv_data in tv_shows_data if tv_data.get("id") in rows_by_id
+        )
+        return [shows_by_id[tv_id] for tv_id in ordered_ids if tv_id in shows_by_id]
     
     def save_tv_show_to_db(self, db: Session, tv_data: Dict[str, Any]) -> TVShow:
         """
@@ -0,0 +1,104 @@
+"""
+Tests du cache des utilisateurs authentifiés (base SQLite en mémoire,
+table users seule) et du cache des tokens vérifiés
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.models.user import User
+from app.services import auth_service, cache
+from app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def Session():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    auth_service._user_cache.clear()
+    yield sessionmaker(bind=engine)
+    auth_service._user_cache.clear()
+
+
+@pytest.fixture
+def user_id(Session):
+    db = Session()
+    user = User(username="alice", email="alice@example.com", password_hash="hash-alice", is_active=True)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def test_orm_update_evicts_cached_user(Session, user_id):
+    db = Session()
+    AuthService.get_cached_user(db, user_id)
+    assert auth_service._user_cache.get(user_id) is not None
+    db.close()
+
+    db = Session()
+    user = db.get(User, user_id)
+    user.is_active = False
+    db.commit()
+    db.close()
+
+    assert auth_service._user_cache.get(user_id) is None
+    db = Session()
+    assert AuthService.get_cached_user(db, user_id).is_active is False
+    db.close()
+
+
+def test_cached_user_lazy_loads_password_hash(Session, user_id):
+    db = Session()
+    AuthService.get_cached_user(db, user_id)
+    db.close()
+
+    db = Session()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    user = AuthService.get_cached_user(db, user_id)
+    assert user.username == "alice"
+    assert statements == []
+
+    assert user.password_hash == "hash-alice"
+    assert len(statements) == 1
+    db.close()
+
+
+def test_verified_token_is_cached_until_exp(monkeypatch):
+    auth_service._token_cache.clear()
+    token = AuthService.create_access_token({"user_id": 1, "email": "alice@example.com"}, timedelta(seconds=60))
+    digest = hashlib.sha256(token.encode()).digest()
+
+    assert AuthService.decode_access_token(token).user_id == 1
+    assert auth_service._token_cache.get(digest) is not None
+
+    now = time.monotonic()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now + 55))
+    assert auth_service._token_cache.get(digest) is not None
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now + 61))
+    assert auth_service._token_cache.get(digest) is None
+    auth_service._token_cache.clear()
+
+
+def test_invalid_tokens_are_not_cached():
+    auth_service._token_cache.clear()
+    expired = AuthService.create_access_token({"user_id": 1, "email": "alice@example.com"}, timedelta(seconds=-1))
+    missing_claims = AuthService.create_access_token({"sub": "alice"})
+
+    for token in ("not-a-jwt", expired, missing_claims):
+        with pytest.raises(HTTPException) as error:
+            AuthService.decode_access_token(token)
+        assert error.value.status_code == 401
+
+    assert auth_service._token_cache.stats()["size"] == 0
@@ -0,0 +1,73 @@
+"""
+Tests de l'index d'autocomplétion : les listes en cache des préfixes
+courts (réserve, troncature, reconstruction) donnent le même classement
+qu'un tri complet
+"""
+
+import math
+import random
+from unittest.mock import MagicMock
+
+from app.services.autocomplete import (
+    TOP_SIZE,
+    WEIGHT_EPSILON,
+    PrefixIndex,
+    normalize,
+    popularity_weight,
+)
+
+
+WORDS = ["star", "stone", "stop", "wars", "war", "wave", "sun", "summer", "sea", "!!"]
+KINDS = ("movie", "track")
+
+
+def brute_force(model, text, kinds, limit):
+    prefix = normalize(text)
+    matches = [
+        (weight, kind, ref)
+        for (kind, ref), (label, weight) in model.items()
+        if kind in kinds and any(key.startswith(prefix) for key in PrefixIndex._keys_for(label))
+    ]
+    matches.sort(key=lambda item: (-item[0], item[1], str(item[2])))
+    return [(kind, ref) for _, kind, ref in matches[:limit]]
+
+
+def test_cached_prefixes_match_brute_force_ranking():
+    rng = random.Random(44)
+    index = PrefixIndex()
+    index.load(MagicMock())
+    model = {}
+
+    for step in range(3000):
+        kind, ref = rng.choice(KINDS), rng.randrange(120)
+        current = model.get((kind, ref))
+
+        if current is not None and rng.random() < 0.4:
+            # Mise à jour de popularité seule (parfois sous le seuil)
+            label = current[0]
+            popularity = rng.uniform(0, 10000) if rng.random() < 0.5 else None
+            weight = popularity_weight(popularity) if popularity is not None else current[1] + WEIGHT_EPSILON / 2
+            popularity = popularity if popularity is not None else math.expm1(weight)
+        else:
+            # Ajout, ou nouveau libellé (l'entrée quitte ses anciens préfixes ;
+            # un libellé sans mot la retire de l'index)
+            label = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            popularity = rng.uniform(0, 10000)
+
+        index.add(kind, ref, label, popularity)
+
+        weight = popularity_weight(popularity)
+        if current is not None and current[0] == label and abs(current[1] - weight) < WEIGHT_EPSILON:
+            pass
+        elif PrefixIndex._keys_for(label):
+            model[(kind, ref)] = (label, weight)
+        else:
+            model.pop((kind, ref), None)
+
+        if step % 50 == 0:
+            for text in ("s", "st", "sta", "sto", "w", "wa", "war", "su", "sea", "stone"):
+                for kinds in (KINDS, ("movie",)):
+                    got = [(item["type"], item["id"]) for item in index.complete(text, kinds, limit=TOP_SIZE)]
+                    assert got == brute_force(model, text, kinds, TOP_SIZE), (step, text, kinds)
+
+    assert len(index) == len(model)
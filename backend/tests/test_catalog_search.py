@@ -0,0 +1,31 @@
+"""
+Tests de la recherche dans le catalogue local (repli vers l'API externe)
+"""
+
+from unittest.mock import MagicMock
+
+from sqlalchemy.exc import ProgrammingError
+
+from app.services import catalog_search
+from app.services.catalog_search import LocalResults
+
+
+def test_database_error_rolls_back_and_falls_through():
+    db = MagicMock()
+    db.query.side_effect = ProgrammingError("SELECT", {}, Exception("column search_vector does not exist"))
+
+    results = catalog_search.search_tracks(db, "daft punk", limit=20)
+
+    assert results is None
+    db.rollback.assert_called_once()
+    assert not catalog_search.is_sufficient("local_first", results, 20)
+    assert not catalog_search.is_sufficient("local", results, 20)
+
+
+def test_weak_matches_do_not_fill_the_page():
+    weak_page = LocalResults(items=[object()] * 20, total=120, strong=3)
+    strong_page = LocalResults(items=[object()] * 20, total=120, strong=20)
+
+    assert not catalog_search.is_sufficient("local_first", weak_page, 20)
+    assert catalog_search.is_sufficient("local_first", strong_page, 20)
+    assert catalog_search.is_sufficient("local", weak_page, 20)
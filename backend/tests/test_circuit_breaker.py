@@ -0,0 +1,67 @@
+"""
+Tests du disjoncteur : la requête de test d'un circuit semi-ouvert est
+toujours libérée, quelle que soit l'issue de l'appel
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker
+
+
+def open_breaker() -> CircuitBreaker:
+    """Disjoncteur ouvert, prêt à passer en semi-ouvert"""
+    breaker = CircuitBreaker("Test", failure_threshold=1, reset_timeout_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_cancelled_probe_is_released():
+    breaker = open_breaker()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def probe():
+            call = breaker.acquire()
+            assert call is not None and call.is_probe
+            with call:
+                started.set()
+                await asyncio.sleep(60)
+
+        task = asyncio.create_task(probe())
+        await asyncio.wait_for(started.wait(), timeout=5)
+        assert breaker.acquire() is None  # Une seule requête de test à la fois
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    # Annulation : ni succès ni échec, une nouvelle requête de test passe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire() is not None
+
+
+def test_unexpected_error_counts_as_failure():
+    breaker = open_breaker()
+
+    call = breaker.acquire()
+    with pytest.raises(ValueError):
+        with call:
+            raise ValueError("réponse JSON invalide")
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.acquire() is not None  # reset_timeout écoulé : nouvelle requête de test
+
+
+def test_successful_probe_closes_circuit():
+    breaker = open_breaker()
+
+    with breaker.acquire() as call:
+        call.success(0.01)
+
+    assert breaker.state == CircuitBreaker.CLOSED
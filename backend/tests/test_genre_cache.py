@@ -0,0 +1,34 @@
+"""
+Tests du cache des genres (IDs inconnus)
+"""
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.movie import Genre
+from app.services.genre_cache import GenreCache
+
+
+def test_unknown_ids_are_not_looked_up_again():
+    engine = create_engine("sqlite://")
+    Genre.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(Genre(id=28, name="Action"))
+    db.commit()
+
+    cache = GenreCache()
+    cache.load(db)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    assert cache.known_ids(db, [28, 99]) == {28}
+    assert cache.known_ids(db, [28, 99]) == {28}
+    assert len(statements) == 1
+    assert "IN" in statements[0]
+
+    cache.register({99: "Documentary"})
+    assert cache.known_ids(db, [28, 99]) == {28, 99}
+    assert len(statements) == 1
+    db.close()
@@ -0,0 +1,50 @@
+"""
+Tests du service Google Books : annuler une recherche (comme le fait
+/books/recommendations) ne bloque pas le disjoncteur ; validation des
+volumes retenus par /books/recommendations
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.google_books_service import GoogleBooksService
+
+
+def test_cancelled_search_releases_half_open_probe(monkeypatch):
+    breaker = CircuitBreaker("Google Books", failure_threshold=1, reset_timeout_seconds=0)
+    breaker.record_failure()
+    monkeypatch.setitem(circuit_breaker._breakers, "Google Books", breaker)
+
+    async def scenario():
+        in_flight = asyncio.Event()
+
+        async def slow_get(self, url, **kwargs):
+            in_flight.set()
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(httpx.AsyncClient, "get", slow_get)
+
+        task = asyncio.create_task(GoogleBooksService().search_books("dune"))
+        await asyncio.wait_for(in_flight.wait(), timeout=5)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire() is not None
+
+
+def test_valid_volume_id_rejects_malformed_volumes():
+    assert GoogleBooksService.valid_volume_id({"id": "abc", "volumeInfo": {"title": "Dune"}}) == "abc"
+    assert GoogleBooksService.valid_volume_id({"id": "abc", "volumeInfo": "oops"}) is None
+    assert GoogleBooksService.valid_volume_id({"id": 42}) is None
+    assert GoogleBooksService.valid_volume_id("abc") is None
+    assert GoogleBooksService.valid_volume_id(None) is None
@@ -0,0 +1,66 @@
+"""
+Tests de l'enrichissement musical (tâche de fond)
+"""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+from fastapi import HTTPException
+
+from app.services import music_enrichment
+from app.services.music_enrichment import MusicEnrichmentService
+
+
+class FakeSpotifyService:
+    """Deux lots de pistes périmées ; enregistre le thread de chaque accès BDD"""
+
+    def __init__(self):
+        self.batches = [["a", "b"], ["c"]]
+        self.db_threads = []
+
+    def stale_track_ids(self, db, limit):
+        self.db_threads.append(threading.current_thread())
+        return self.batches[0] if self.batches else []
+
+    async def get_tracks(self, spotify_ids):
+        return [{"id": spotify_id, "name": spotify_id} for spotify_id in spotify_ids]
+
+    def save_refreshed_tracks(self, db, stale_ids, tracks_data):
+        self.db_threads.append(threading.current_thread())
+        self.batches.pop(0)
+        return len(tracks_data)
+
+
+def test_stale_tracks_are_persisted_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(music_enrichment, "SessionLocal", MagicMock)
+    monkeypatch.setattr(music_enrichment.settings, "music_enrichment_batch_delay_seconds", 0)
+    spotify = FakeSpotifyService()
+    service = MusicEnrichmentService(spotify_service=spotify, audio_feature_provider=object())
+
+    refreshed = asyncio.run(asyncio.wait_for(service.refresh_stale_tracks(), timeout=5))
+
+    assert refreshed == 3
+    assert spotify.db_threads
+    assert threading.main_thread() not in spotify.db_threads
+
+
+class ForbiddenAudioFeatureProvider:
+    """Application sans accès à /audio-features"""
+
+    async def get_features(self, spotify_ids):
+        raise HTTPException(status_code=503, detail="Spotify API error: 403 Forbidden")
+
+
+def test_audio_features_error_does_not_stop_the_stale_track_refresh(monkeypatch):
+    monkeypatch.setattr(music_enrichment, "SessionLocal", MagicMock)
+    monkeypatch.setattr(music_enrichment.settings, "music_enrichment_batch_delay_seconds", 0)
+    spotify = FakeSpotifyService()
+    service = MusicEnrichmentService(spotify_service=spotify, audio_feature_provider=ForbiddenAudioFeatureProvider())
+    monkeypatch.setattr(service, "pending_artist_ids", lambda db, limit: [])
+    monkeypatch.setattr(service, "pending_feature_tracks", lambda db, limit: [(1, "a")])
+
+    stats = asyncio.run(asyncio.wait_for(service.run_once(), timeout=5))
+
+    assert stats["audio_features"] == 0
+    assert stats["refreshed"] == 3
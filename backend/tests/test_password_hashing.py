@@ -0,0 +1,54 @@
+"""
+Tests du pool de hachage : la file reflète les calculs réellement en
+cours, même quand les requêtes qui les attendent sont annulées
+"""
+
+import asyncio
+import threading
+
+from app.services.password_hashing import PasswordHashingPool
+
+
+def test_cancelled_request_keeps_its_job_counted_until_it_ends():
+    pool = PasswordHashingPool(workers=1, max_queue=4)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    async def scenario():
+        running = asyncio.create_task(pool.run(slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.create_task(pool.run(lambda: "queued"))
+        await asyncio.sleep(0)
+
+        # Le calcul en cours continue dans l'exécuteur : toujours compté
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        assert pool.stats()["in_flight"] == 1
+        assert pool.stats()["queued"] == 1
+
+        # Le calcul encore en file est retiré de l'exécuteur : décompté
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert pool.stats()["queued"] == 0
+        assert pool.stats()["in_flight"] == 1
+
+        release.set()
+        for _ in range(100):
+            if pool.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    try:
+        asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    finally:
+        release.set()
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 1
@@ -0,0 +1,105 @@
+"""
+Tests des triggers de notation (database/init.sql) : les statistiques
+tenues à jour par apply_rating_delta restent égales à un recalcul complet
+(refresh_user_movie_preferences)
+
+Nécessite PostgreSQL : TEST_DATABASE_URL doit désigner une base vide.
+Le schéma est créé dans une transaction annulée à la fin du test.
+"""
+
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+INIT_SQL = Path(__file__).resolve().parents[2] / "database" / "init.sql"
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL non défini (PostgreSQL requis)")
+
+PREFERENCE_COLUMNS = (
+    "favorite_genres, average_rating, total_ratings, rating_sum, "
+    "highly_rated_count, rating_distribution, last_rating_date"
+)
+
+
+@pytest.fixture
+def cursor():
+    connection = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with connection.cursor() as cur:
+            cur.execute(INIT_SQL.read_text(encoding="utf-8"))
+            yield cur
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def preferences(cur, user_id):
+    cur.execute(f"SELECT {PREFERENCE_COLUMNS} FROM user_movie_preferences WHERE user_id = %s", (user_id,))
+    return cur.fetchone()
+
+
+def recomputed_preferences(cur, user_id):
+    cur.execute("SAVEPOINT recompute")
+    cur.execute("SELECT refresh_user_movie_preferences(%s)", (user_id,))
+    row = preferences(cur, user_id)
+    cur.execute("ROLLBACK TO SAVEPOINT recompute")
+    return row
+
+
+def test_rating_deltas_match_full_recompute(cursor):
+    rng = random.Random(50)
+    cur = cursor
+
+    user_ids = []
+    for name in ("alice", "bob"):
+        cur.execute(
+            "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, '-') RETURNING id",
+            (name, f"{name}@example.com")
+        )
+        user_ids.append(cur.fetchone()[0])
+
+    genre_ids = [900001, 900002, 900003]
+    for genre_id in genre_ids:
+        cur.execute("INSERT INTO genres (id, name) VALUES (%s, %s)", (genre_id, f"Genre {genre_id}"))
+
+    movie_ids = list(range(900001, 900011))
+    for movie_id in movie_ids:
+        cur.execute("INSERT INTO movies (id, title) VALUES (%s, %s)", (movie_id, f"Film {movie_id}"))
+        for genre_id in rng.sample(genre_ids, rng.randint(0, 2)):
+            cur.execute("INSERT INTO movie_genres (movie_id, genre_id) VALUES (%s, %s)", (movie_id, genre_id))
+
+    ratings = {}  # (user_id, movie_id) -> rating_id
+    for step in range(300):
+        operation = rng.choice(("insert", "insert", "update", "move", "delete"))
+        user_id, movie_id = rng.choice(user_ids), rng.choice(movie_ids)
+
+        if operation == "insert" and (user_id, movie_id) not in ratings:
+            cur.execute(
+                "INSERT INTO ratings (user_id, movie_id, rating, updated_at) "
+                "VALUES (%s, %s, %s, TIMESTAMP '2024-01-01' + %s * INTERVAL '1 minute') RETURNING id",
+                (user_id, movie_id, rng.randint(1, 5), rng.randint(0, 10000))
+            )
+            ratings[(user_id, movie_id)] = cur.fetchone()[0]
+        elif operation == "update" and ratings:
+            key = rng.choice(sorted(ratings))
+            cur.execute("UPDATE ratings SET rating = %s WHERE id = %s", (rng.randint(1, 5), ratings[key]))
+        elif operation == "move" and ratings:
+            (old_user_id, movie_id) = key = rng.choice(sorted(ratings))
+            new_user_id = next(other for other in user_ids if other != old_user_id)
+            if (new_user_id, movie_id) in ratings:
+                continue
+            cur.execute("UPDATE ratings SET user_id = %s WHERE id = %s", (new_user_id, ratings[key]))
+            ratings[(new_user_id, movie_id)] = ratings.pop(key)
+        elif operation == "delete" and ratings:
+            key = rng.choice(sorted(ratings))
+            cur.execute("DELETE FROM ratings WHERE id = %s", (ratings.pop(key),))
+
+        for checked_user_id in user_ids:
+            current = preferences(cur, checked_user_id)
+            if current is not None:
+                assert current == recomputed_preferences(cur, checked_user_id), (step, operation)
@@ -0,0 +1,40 @@
+"""
+Tests du curseur de pagination de GET /ratings
+"""
+
+import base64
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.ratings import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    rating = SimpleNamespace(updated_at=datetime(2024, 3, 1, 12, 30, 5, 123456), id=42)
+
+    cursor = _encode_cursor(rating)
+
+    assert _decode_cursor(cursor) == (rating.updated_at, 42)
+    assert "|" not in cursor
+
+
+@pytest.mark.parametrize("raw", [
+    b"2024-03-01T12:30:05",
+    b"2024-03-01T12:30:05|42|7",
+    b"not-a-date|42",
+    b"2024-03-01T12:30:05|abc",
+    b"\xff\xfe|42",
+])
+def test_invalid_cursor_is_rejected(raw):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(base64.urlsafe_b64encode(raw).decode())
+    assert error.value.status_code == 400
+
+
+def test_cursor_that_is_not_base64_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor("abc")
+    assert error.value.status_code == 400
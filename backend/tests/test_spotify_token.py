@@ -0,0 +1,29 @@
+"""
+Tests du token Spotify : le verrou de fichier partagé n'est jamais perdu
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.spotify_token import SpotifyTokenManager, fcntl
+
+
+@pytest.mark.skipif(fcntl is None, reason="verrou inter-processus indisponible")
+def test_cancelled_lock_wait_releases_file_lock(tmp_path):
+    manager = SpotifyTokenManager(token_path=str(tmp_path / "token.json"))
+    holder = manager._acquire_file_lock()  # Un autre worker rafraîchit
+
+    async def scenario():
+        waiter = asyncio.create_task(manager._acquire_file_lock_async())
+        await asyncio.sleep(0.1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # Le thread abandonné obtient le verrou une fois libéré, puis le rend
+        manager._release_file_lock(holder)
+        lock_file = await asyncio.wait_for(manager._acquire_file_lock_async(), timeout=5)
+        manager._release_file_lock(lock_file)
+
+    asyncio.run(scenario())
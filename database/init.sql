@@ -4,6 +4,15 @@
 -- Extension pour UUID (optionnel, utile pour les tokens)
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Extension pour la recherche approximative (trigrammes) dans le catalogue local
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- array_to_string n'est pas IMMUTABLE : enveloppe utilisable dans une colonne générée
+CREATE OR REPLACE FUNCTION immutable_array_to_string(value TEXT[], separator TEXT)
+RETURNS TEXT AS $$
+    SELECT COALESCE(array_to_string(value, separator), '')
+$$ LANGUAGE SQL IMMUTABLE;
+
 -- ============================================
 -- TABLE: users
 -- ============================================
@@ -42,13 +51,20 @@ CREATE TABLE movies (
     status VARCHAR(50),  -- Released, Post Production, etc.
     tagline TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Recherche plein texte locale (titre, résumé)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(overview, '')), 'B')
+    ) STORED
 );
 
 CREATE INDEX idx_movies_title ON movies(title);
 CREATE INDEX idx_movies_release_date ON movies(release_date);
 CREATE INDEX idx_movies_popularity ON movies(popularity DESC);
 CREATE INDEX idx_movies_vote_average ON movies(vote_average DESC);
+CREATE INDEX idx_movies_search_vector ON movies USING GIN(search_vector);
+CREATE INDEX idx_movies_title_trgm ON movies USING GIN(title gin_trgm_ops);
 
 -- ============================================
 -- TABLE: genres
@@ -87,6 +103,7 @@ CREATE INDEX idx_ratings_user ON ratings(user_id);
 CREATE INDEX idx_ratings_movie ON ratings(movie_id);
 CREATE INDEX idx_ratings_rating ON ratings(rating);
 CREATE INDEX idx_ratings_user_rating ON ratings(user_id, rating);
+CREATE INDEX idx_ratings_user_updated ON ratings(user_id, updated_at, id);  -- Pagination par curseur de GET /ratings
 
 -- ============================================
 -- TABLE: recommendations
@@ -117,7 +134,9 @@ CREATE TABLE user_movie_preferences (
     favorite_genres JSONB,  -- {"Action": 15, "Drama": 10, "Comedy": 8, ...}
     average_rating DECIMAL(3,2),  -- Moyenne des notes données
     total_ratings INTEGER DEFAULT 0,
+    rating_sum INTEGER DEFAULT 0,  -- Somme des notes (moyenne tenue à jour par delta)
     highly_rated_count INTEGER DEFAULT 0,  -- Nombre de films notés 4-5
+    rating_distribution JSONB,  -- {"1": 2, "2": 0, "3": 5, "4": 9, "5": 4}
     last_rating_date TIMESTAMP,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -179,54 +198,208 @@ CREATE TRIGGER update_movies_updated_at BEFORE UPDATE ON movies
 CREATE TRIGGER update_ratings_updated_at BEFORE UPDATE ON ratings
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Trigger pour mettre à jour les préférences utilisateur après une note
-CREATE OR REPLACE FUNCTION update_user_preferences_on_rating()
-RETURNS TRIGGER AS $$
+-- Recalcule entièrement les statistiques de notation d'un utilisateur
+-- (remplissage initial, réparation) dans user_movie_preferences.
+-- p_create = FALSE : ne crée pas la ligne
+CREATE OR REPLACE FUNCTION refresh_user_movie_preferences(p_user_id INTEGER, p_create BOOLEAN DEFAULT TRUE)
+RETURNS VOID AS $$
 DECLARE
     user_avg DECIMAL(3,2);
     user_total INTEGER;
+    user_sum INTEGER;
     user_high_rated INTEGER;
+    user_last_rating TIMESTAMP;
+    user_distribution JSONB;
+    user_genres JSONB;
 BEGIN
-    -- Calculer les statistiques
     SELECT 
         AVG(rating)::DECIMAL(3,2),
         COUNT(*),
-        COUNT(*) FILTER (WHERE rating >= 4)
-    INTO user_avg, user_total, user_high_rated
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE rating >= 4),
+        MAX(updated_at),
+        jsonb_build_object(
+            '1', COUNT(*) FILTER (WHERE rating = 1),
+            '2', COUNT(*) FILTER (WHERE rating = 2),
+            '3', COUNT(*) FILTER (WHERE rating = 3),
+            '4', COUNT(*) FILTER (WHERE rating = 4),
+            '5', COUNT(*) FILTER (WHERE rating = 5)
+        )
+    INTO user_avg, user_total, user_sum, user_high_rated, user_last_rating, user_distribution
     FROM ratings
-    WHERE user_id = NEW.user_id;
-
-    -- Insérer ou mettre à jour les préférences
-    INSERT INTO user_movie_preferences (
-        user_id, 
-        average_rating, 
-        total_ratings, 
-        highly_rated_count,
-        last_rating_date,
-        last_updated
-    )
-    VALUES (
-        NEW.user_id, 
-        user_avg, 
-        user_total, 
-        user_high_rated,
-        NEW.created_at,
-        CURRENT_TIMESTAMP
-    )
-    ON CONFLICT (user_id) 
-    DO UPDATE SET
-        average_rating = user_avg,
-        total_ratings = user_total,
-        highly_rated_count = user_high_rated,
-        last_rating_date = NEW.created_at,
-        last_updated = CURRENT_TIMESTAMP;
+    WHERE user_id = p_user_id;
+
+    -- Genres des films notés 4-5 : {"Action": 15, "Drama": 10, ...}
+    SELECT jsonb_object_agg(genre_name, genre_count)
+    INTO user_genres
+    FROM (
+        SELECT g.name AS genre_name, COUNT(*) AS genre_count
+        FROM ratings r
+        JOIN movie_genres mg ON mg.movie_id = r.movie_id
+        JOIN genres g ON g.id = mg.genre_id
+        WHERE r.user_id = p_user_id AND r.rating >= 4
+        GROUP BY g.name
+    ) AS genre_counts;
+
+    IF p_create THEN
+        INSERT INTO user_movie_preferences (
+            user_id, 
+            favorite_genres,
+            average_rating, 
+            total_ratings, 
+            rating_sum,
+            highly_rated_count,
+            rating_distribution,
+            last_rating_date,
+            last_updated
+        )
+        VALUES (
+            p_user_id, 
+            user_genres,
+            user_avg, 
+            user_total, 
+            user_sum,
+            user_high_rated,
+            user_distribution,
+            user_last_rating,
+            CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (user_id) 
+        DO UPDATE SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            rating_sum = user_sum,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE user_movie_preferences SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            rating_sum = user_sum,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = p_user_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Applique l'ajout (p_sign = 1) ou le retrait (p_sign = -1) d'une note aux
+-- statistiques de l'utilisateur, sans relire ses autres notes.
+-- p_rated_at : date de la note (last_rating_date avancée à l'ajout,
+-- recalculée au retrait de la plus récente) ; NULL : date inchangée
+CREATE OR REPLACE FUNCTION apply_rating_delta(
+    p_user_id INTEGER,
+    p_movie_id INTEGER,
+    p_rating INTEGER,
+    p_sign INTEGER,
+    p_rated_at TIMESTAMP DEFAULT NULL
+)
+RETURNS VOID AS $$
+DECLARE
+    genre_delta JSONB;
+BEGIN
+    -- Genres du film, comptés pour les notes 4-5 uniquement
+    IF p_rating >= 4 THEN
+        SELECT jsonb_object_agg(g.name, p_sign)
+        INTO genre_delta
+        FROM movie_genres mg
+        JOIN genres g ON g.id = mg.genre_id
+        WHERE mg.movie_id = p_movie_id;
+    END IF;
+
+    UPDATE user_movie_preferences SET
+        total_ratings = COALESCE(total_ratings, 0) + p_sign,
+        rating_sum = COALESCE(rating_sum, 0) + p_sign * p_rating,
+        average_rating = CASE
+            WHEN COALESCE(total_ratings, 0) + p_sign > 0
+            THEN ((COALESCE(rating_sum, 0) + p_sign * p_rating)::DECIMAL
+                  / (COALESCE(total_ratings, 0) + p_sign))::DECIMAL(3,2)
+        END,
+        highly_rated_count = COALESCE(highly_rated_count, 0) + CASE WHEN p_rating >= 4 THEN p_sign ELSE 0 END,
+        rating_distribution = jsonb_set(
+            COALESCE(rating_distribution, '{}'::JSONB),
+            ARRAY[p_rating::TEXT],
+            to_jsonb(COALESCE((rating_distribution ->> p_rating::TEXT)::INTEGER, 0) + p_sign)
+        ),
+        -- Compteurs par genre additionnés, genres à zéro retirés
+        favorite_genres = CASE
+            WHEN genre_delta IS NULL THEN favorite_genres
+            ELSE (
+                SELECT jsonb_object_agg(genre_name, genre_count)
+                FROM (
+                    SELECT key AS genre_name, SUM(value::INTEGER) AS genre_count
+                    FROM (
+                        SELECT key, value FROM jsonb_each_text(COALESCE(favorite_genres, '{}'::JSONB))
+                        UNION ALL
+                        SELECT key, value FROM jsonb_each_text(genre_delta)
+                    ) AS counts
+                    GROUP BY key
+                    HAVING SUM(value::INTEGER) > 0
+                ) AS merged
+            )
+        END,
+        last_rating_date = CASE
+            WHEN p_rated_at IS NULL THEN last_rating_date
+            WHEN p_sign > 0 THEN GREATEST(last_rating_date, p_rated_at)
+            WHEN last_rating_date <= p_rated_at
+            THEN (SELECT MAX(updated_at) FROM ratings WHERE user_id = p_user_id)
+            ELSE last_rating_date
+        END,
+        last_updated = CURRENT_TIMESTAMP
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger pour mettre à jour les préférences utilisateur après une note :
+-- l'ancienne note est retirée, la nouvelle ajoutée (coût constant quel
+-- que soit le nombre de notes de l'utilisateur)
+CREATE OR REPLACE FUNCTION update_user_preferences_on_rating()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Note inchangée (ex: simple mise à jour de updated_at)
+    IF TG_OP = 'UPDATE'
+        AND OLD.user_id = NEW.user_id
+        AND OLD.movie_id = NEW.movie_id
+        AND OLD.rating = NEW.rating THEN
+        UPDATE user_movie_preferences SET
+            last_rating_date = GREATEST(last_rating_date, NEW.updated_at),
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = NEW.user_id;
+        RETURN NEW;
+    END IF;
+
+    -- Suppression : mise à jour seule (la ligne de préférences peut
+    -- disparaître avec l'utilisateur dans la même cascade)
+    IF TG_OP = 'DELETE' THEN
+        PERFORM apply_rating_delta(OLD.user_id, OLD.movie_id, OLD.rating, -1, OLD.updated_at);
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM apply_rating_delta(
+            OLD.user_id, OLD.movie_id, OLD.rating, -1,
+            CASE WHEN OLD.user_id <> NEW.user_id THEN OLD.updated_at END
+        );
+    END IF;
+
+    INSERT INTO user_movie_preferences (user_id, total_ratings, rating_sum, highly_rated_count, rating_distribution)
+    VALUES (NEW.user_id, 0, 0, 0, '{"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}')
+    ON CONFLICT (user_id) DO NOTHING;
+
+    PERFORM apply_rating_delta(NEW.user_id, NEW.movie_id, NEW.rating, 1, NEW.updated_at);
 
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER update_preferences_after_rating
-    AFTER INSERT OR UPDATE ON ratings
+    AFTER INSERT OR UPDATE OR DELETE ON ratings
     FOR EACH ROW
     EXECUTE FUNCTION update_user_preferences_on_rating();
 
@@ -348,21 +521,41 @@ CREATE TABLE tracks (
     spotify_id VARCHAR(100) UNIQUE NOT NULL,
     title VARCHAR(500) NOT NULL,
     artist VARCHAR(500) NOT NULL,
+    artist_spotify_id VARCHAR(100),
     album VARCHAR(500),
     release_year INTEGER,
     preview_url VARCHAR(500),
     image_url VARCHAR(500),
     duration_ms BIGINT,
     popularity INTEGER,
-    genres JSONB DEFAULT '[]',
+    genres TEXT[] DEFAULT '{}',
+    audio_features BYTEA,  -- Vecteur float32 des caractéristiques audio
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Recherche plein texte locale (titre, artiste)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(artist, '')), 'A')
+    ) STORED
 );
 
 CREATE INDEX idx_tracks_spotify_id ON tracks(spotify_id);
 CREATE INDEX idx_tracks_title ON tracks(title);
 CREATE INDEX idx_tracks_artist ON tracks(artist);
 CREATE INDEX idx_tracks_popularity ON tracks(popularity DESC);
+CREATE INDEX idx_tracks_artist_spotify_id ON tracks(artist_spotify_id);
+CREATE INDEX idx_tracks_genres ON tracks USING GIN(genres);
+CREATE INDEX idx_tracks_search_vector ON tracks USING GIN(search_vector);
+CREATE INDEX idx_tracks_title_trgm ON tracks USING GIN(title gin_trgm_ops);
+CREATE INDEX idx_tracks_artist_trgm ON tracks USING GIN(artist gin_trgm_ops);
+
+-- Genres des artistes Spotify (recopiés dans tracks.genres)
+CREATE TABLE artist_genres (
+    spotify_id VARCHAR(100) PRIMARY KEY,
+    name VARCHAR(500),
+    genres TEXT[] DEFAULT '{}',
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Table des notes musicales
 CREATE TABLE music_ratings (
@@ -396,6 +589,12 @@ CREATE INDEX idx_music_recommendations_user ON music_recommendations(user_id);
 CREATE INDEX idx_music_recommendations_track ON music_recommendations(track_id);
 CREATE INDEX idx_music_recommendations_score ON music_recommendations(score DESC);
 
+-- Dernière génération des recommandations musicales (même sans résultat)
+CREATE TABLE music_recommendation_runs (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    generated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Trigger pour mise à jour de tracks
 CREATE TRIGGER update_tracks_updated_at BEFORE UPDATE ON tracks
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -441,6 +640,21 @@ CREATE TABLE book_ratings (
 CREATE INDEX idx_book_ratings_user ON book_ratings(user_id);
 CREATE INDEX idx_book_ratings_book ON book_ratings(book_id);
 
+-- Voisins précalculés entre livres (filtrage collaboratif + contenu)
+CREATE TABLE book_similarity (
+    id SERIAL PRIMARY KEY,
+    book_id_1 INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    book_id_2 INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    similarity_score DECIMAL(5,3) NOT NULL CHECK (similarity_score >= 0 AND similarity_score <= 1),
+    common_ratings_count INTEGER NOT NULL DEFAULT 0,
+    calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CHECK (book_id_1 < book_id_2),
+    UNIQUE(book_id_1, book_id_2)
+);
+
+CREATE INDEX idx_book_similarity_book1 ON book_similarity(book_id_1, similarity_score DESC);
+CREATE INDEX idx_book_similarity_book2 ON book_similarity(book_id_2, similarity_score DESC);
+
 -- ============================================
 -- TABLES SÉRIES TV (TMDB)
 -- ============================================
@@ -573,7 +787,7 @@ BEGIN
     RAISE NOTICE '✅ Nexus Recommendations Database initialized successfully!';
     RAISE NOTICE '📊 Tables created: users, movies, genres, ratings, recommendations';
     RAISE NOTICE '🎵 Music tables: tracks, music_ratings, music_recommendations';
-    RAISE NOTICE '📚 Books tables: books, book_ratings';
+    RAISE NOTICE '📚 Books tables: books, book_ratings, book_similarity';
     RAISE NOTICE '📺 TV Shows tables: tv_shows, tv_genres, tv_ratings';
     RAISE NOTICE '🎮 Games tables: games, game_ratings';
     RAISE NOTICE '🎬 Genres seeded with TMDB standard genres';
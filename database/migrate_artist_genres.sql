@@ -0,0 +1,20 @@
+-- Migration : genres des artistes Spotify pour les pistes
+
+-- Artiste principal de chaque piste (rempli à la prochaine sauvegarde)
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS artist_spotify_id VARCHAR(100);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist_spotify_id ON tracks(artist_spotify_id);
+
+-- Cache local artiste -> genres
+CREATE TABLE IF NOT EXISTS artist_genres (
+    spotify_id VARCHAR(100) PRIMARY KEY,
+    name VARCHAR(500),
+    genres JSONB DEFAULT '[]',
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recopie des genres déjà connus dans les pistes
+UPDATE tracks
+SET genres = artist_genres.genres
+FROM artist_genres
+WHERE tracks.artist_spotify_id = artist_genres.spotify_id
+  AND tracks.genres IS DISTINCT FROM artist_genres.genres;
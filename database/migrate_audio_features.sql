@@ -0,0 +1,4 @@
+-- Migration : vecteur des caractéristiques audio des pistes
+-- (float32 contigus, rempli en tâche de fond par lots de 100 pistes)
+
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS audio_features BYTEA;
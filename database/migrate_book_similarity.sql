@@ -0,0 +1,18 @@
+-- Migration : voisins précalculés entre livres (recommandations locales)
+
+CREATE TABLE IF NOT EXISTS book_similarity (
+    id SERIAL PRIMARY KEY,
+    book_id_1 INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    book_id_2 INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    similarity_score DECIMAL(5,3) NOT NULL CHECK (similarity_score >= 0 AND similarity_score <= 1),
+    common_ratings_count INTEGER NOT NULL DEFAULT 0,
+    calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CHECK (book_id_1 < book_id_2),
+    UNIQUE(book_id_1, book_id_2)
+);
+
+CREATE INDEX IF NOT EXISTS idx_book_similarity_book1 ON book_similarity(book_id_1, similarity_score DESC);
+CREATE INDEX IF NOT EXISTS idx_book_similarity_book2 ON book_similarity(book_id_2, similarity_score DESC);
+
+-- La table est remplie par le backend au démarrage, ou via :
+--   python -m app.services.book_recommendation_engine
@@ -0,0 +1,35 @@
+-- Migration : recherche locale dans le catalogue (plein texte + trigrammes)
+-- À lancer après migrate_books.sql (schéma Google Books de la table books)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- array_to_string n'est pas IMMUTABLE : enveloppe utilisable dans une colonne générée
+CREATE OR REPLACE FUNCTION immutable_array_to_string(value TEXT[], separator TEXT)
+RETURNS TEXT AS $$
+    SELECT COALESCE(array_to_string(value, separator), '')
+$$ LANGUAGE SQL IMMUTABLE;
+
+-- Films : titre (A) + résumé (B)
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(overview, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_movies_search_vector ON movies USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_movies_title_trgm ON movies USING GIN(title gin_trgm_ops);
+
+-- Pistes : titre (A) + artiste (A)
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(artist, '')), 'A')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_tracks_search_vector ON tracks USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_tracks_title_trgm ON tracks USING GIN(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist_trgm ON tracks USING GIN(artist gin_trgm_ops);
+
+-- Livres : titre (A) + auteurs (B)
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', immutable_array_to_string(authors, ' ')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_books_search_vector ON books USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_books_title_trgm ON books USING GIN(title gin_trgm_ops);
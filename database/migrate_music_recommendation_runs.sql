@@ -0,0 +1,15 @@
+-- Migration : date de dernière génération des recommandations musicales
+-- Enregistrée même quand la génération ne produit rien, pour ne pas
+-- relancer une génération complète à chaque GET /music/recommendations
+
+CREATE TABLE IF NOT EXISTS music_recommendation_runs (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    generated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Jeux existants : date du plus récent
+INSERT INTO music_recommendation_runs (user_id, generated_at)
+SELECT user_id, MAX(created_at)
+FROM music_recommendations
+GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
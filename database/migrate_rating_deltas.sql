@@ -0,0 +1,221 @@
+-- Migration : statistiques de notation mises à jour par delta
+-- Le trigger des notes applique l'écart entre ancienne et nouvelle note
+-- (somme, nombres, distribution, genres) au lieu de tout recalculer.
+-- À lancer après migrate_rating_stats.sql
+
+ALTER TABLE user_movie_preferences ADD COLUMN IF NOT EXISTS rating_sum INTEGER DEFAULT 0;
+
+DROP TRIGGER IF EXISTS update_preferences_after_rating ON ratings;
+
+-- Recalcule entièrement les statistiques de notation d'un utilisateur
+-- (remplissage initial, réparation) dans user_movie_preferences.
+-- p_create = FALSE : ne crée pas la ligne
+CREATE OR REPLACE FUNCTION refresh_user_movie_preferences(p_user_id INTEGER, p_create BOOLEAN DEFAULT TRUE)
+RETURNS VOID AS $$
+DECLARE
+    user_avg DECIMAL(3,2);
+    user_total INTEGER;
+    user_sum INTEGER;
+    user_high_rated INTEGER;
+    user_last_rating TIMESTAMP;
+    user_distribution JSONB;
+    user_genres JSONB;
+BEGIN
+    SELECT 
+        AVG(rating)::DECIMAL(3,2),
+        COUNT(*),
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE rating >= 4),
+        MAX(updated_at),
+        jsonb_build_object(
+            '1', COUNT(*) FILTER (WHERE rating = 1),
+            '2', COUNT(*) FILTER (WHERE rating = 2),
+            '3', COUNT(*) FILTER (WHERE rating = 3),
+            '4', COUNT(*) FILTER (WHERE rating = 4),
+            '5', COUNT(*) FILTER (WHERE rating = 5)
+        )
+    INTO user_avg, user_total, user_sum, user_high_rated, user_last_rating, user_distribution
+    FROM ratings
+    WHERE user_id = p_user_id;
+
+    -- Genres des films notés 4-5 : {"Action": 15, "Drama": 10, ...}
+    SELECT jsonb_object_agg(genre_name, genre_count)
+    INTO user_genres
+    FROM (
+        SELECT g.name AS genre_name, COUNT(*) AS genre_count
+        FROM ratings r
+        JOIN movie_genres mg ON mg.movie_id = r.movie_id
+        JOIN genres g ON g.id = mg.genre_id
+        WHERE r.user_id = p_user_id AND r.rating >= 4
+        GROUP BY g.name
+    ) AS genre_counts;
+
+    IF p_create THEN
+        INSERT INTO user_movie_preferences (
+            user_id, 
+            favorite_genres,
+            average_rating, 
+            total_ratings, 
+            rating_sum,
+            highly_rated_count,
+            rating_distribution,
+            last_rating_date,
+            last_updated
+        )
+        VALUES (
+            p_user_id, 
+            user_genres,
+            user_avg, 
+            user_total, 
+            user_sum,
+            user_high_rated,
+            user_distribution,
+            user_last_rating,
+            CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (user_id) 
+        DO UPDATE SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            rating_sum = user_sum,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE user_movie_preferences SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            rating_sum = user_sum,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = p_user_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Applique l'ajout (p_sign = 1) ou le retrait (p_sign = -1) d'une note aux
+-- statistiques de l'utilisateur, sans relire ses autres notes.
+-- p_rated_at : date de la note (last_rating_date avancée à l'ajout,
+-- recalculée au retrait de la plus récente) ; NULL : date inchangée
+CREATE OR REPLACE FUNCTION apply_rating_delta(
+    p_user_id INTEGER,
+    p_movie_id INTEGER,
+    p_rating INTEGER,
+    p_sign INTEGER,
+    p_rated_at TIMESTAMP DEFAULT NULL
+)
+RETURNS VOID AS $$
+DECLARE
+    genre_delta JSONB;
+BEGIN
+    -- Genres du film, comptés pour les notes 4-5 uniquement
+    IF p_rating >= 4 THEN
+        SELECT jsonb_object_agg(g.name, p_sign)
+        INTO genre_delta
+        FROM movie_genres mg
+        JOIN genres g ON g.id = mg.genre_id
+        WHERE mg.movie_id = p_movie_id;
+    END IF;
+
+    UPDATE user_movie_preferences SET
+        total_ratings = COALESCE(total_ratings, 0) + p_sign,
+        rating_sum = COALESCE(rating_sum, 0) + p_sign * p_rating,
+        average_rating = CASE
+            WHEN COALESCE(total_ratings, 0) + p_sign > 0
+            THEN ((COALESCE(rating_sum, 0) + p_sign * p_rating)::DECIMAL
+                  / (COALESCE(total_ratings, 0) + p_sign))::DECIMAL(3,2)
+        END,
+        highly_rated_count = COALESCE(highly_rated_count, 0) + CASE WHEN p_rating >= 4 THEN p_sign ELSE 0 END,
+        rating_distribution = jsonb_set(
+            COALESCE(rating_distribution, '{}'::JSONB),
+            ARRAY[p_rating::TEXT],
+            to_jsonb(COALESCE((rating_distribution ->> p_rating::TEXT)::INTEGER, 0) + p_sign)
+        ),
+        -- Compteurs par genre additionnés, genres à zéro retirés
+        favorite_genres = CASE
+            WHEN genre_delta IS NULL THEN favorite_genres
+            ELSE (
+                SELECT jsonb_object_agg(genre_name, genre_count)
+                FROM (
+                    SELECT key AS genre_name, SUM(value::INTEGER) AS genre_count
+                    FROM (
+                        SELECT key, value FROM jsonb_each_text(COALESCE(favorite_genres, '{}'::JSONB))
+                        UNION ALL
+                        SELECT key, value FROM jsonb_each_text(genre_delta)
+                    ) AS counts
+                    GROUP BY key
+                    HAVING SUM(value::INTEGER) > 0
+                ) AS merged
+            )
+        END,
+        last_rating_date = CASE
+            WHEN p_rated_at IS NULL THEN last_rating_date
+            WHEN p_sign > 0 THEN GREATEST(last_rating_date, p_rated_at)
+            WHEN last_rating_date <= p_rated_at
+            THEN (SELECT MAX(updated_at) FROM ratings WHERE user_id = p_user_id)
+            ELSE last_rating_date
+        END,
+        last_updated = CURRENT_TIMESTAMP
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger pour mettre à jour les préférences utilisateur après une note :
+-- l'ancienne note est retirée, la nouvelle ajoutée (coût constant quel
+-- que soit le nombre de notes de l'utilisateur)
+CREATE OR REPLACE FUNCTION update_user_preferences_on_rating()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Note inchangée (ex: simple mise à jour de updated_at)
+    IF TG_OP = 'UPDATE'
+        AND OLD.user_id = NEW.user_id
+        AND OLD.movie_id = NEW.movie_id
+        AND OLD.rating = NEW.rating THEN
+        UPDATE user_movie_preferences SET
+            last_rating_date = GREATEST(last_rating_date, NEW.updated_at),
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = NEW.user_id;
+        RETURN NEW;
+    END IF;
+
+    -- Suppression : mise à jour seule (la ligne de préférences peut
+    -- disparaître avec l'utilisateur dans la même cascade)
+    IF TG_OP = 'DELETE' THEN
+        PERFORM apply_rating_delta(OLD.user_id, OLD.movie_id, OLD.rating, -1, OLD.updated_at);
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM apply_rating_delta(
+            OLD.user_id, OLD.movie_id, OLD.rating, -1,
+            CASE WHEN OLD.user_id <> NEW.user_id THEN OLD.updated_at END
+        );
+    END IF;
+
+    INSERT INTO user_movie_preferences (user_id, total_ratings, rating_sum, highly_rated_count, rating_distribution)
+    VALUES (NEW.user_id, 0, 0, 0, '{"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}')
+    ON CONFLICT (user_id) DO NOTHING;
+
+    PERFORM apply_rating_delta(NEW.user_id, NEW.movie_id, NEW.rating, 1, NEW.updated_at);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_preferences_after_rating
+    AFTER INSERT OR UPDATE OR DELETE ON ratings
+    FOR EACH ROW
+    EXECUTE FUNCTION update_user_preferences_on_rating();
+
+-- Remise à niveau de toutes les lignes (rating_sum, compteurs) avant les premiers deltas
+SELECT refresh_user_movie_preferences(user_id)
+FROM (
+    SELECT user_id FROM ratings
+    UNION
+    SELECT user_id FROM user_movie_preferences
+) AS users_to_refresh;
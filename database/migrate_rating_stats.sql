@@ -0,0 +1,122 @@
+-- Migration : statistiques de notation précalculées (GET /ratings/stats)
+-- Distribution des notes et genres préférés tenus à jour par trigger,
+-- y compris à la suppression d'une note
+
+ALTER TABLE user_movie_preferences ADD COLUMN IF NOT EXISTS rating_distribution JSONB;
+
+DROP TRIGGER IF EXISTS update_preferences_after_rating ON ratings;
+
+-- Recalcule les statistiques de notation d'un utilisateur (note moyenne,
+-- distribution, genres préférés) dans user_movie_preferences.
+-- p_create = FALSE : ne crée pas la ligne (suppression de notes)
+CREATE OR REPLACE FUNCTION refresh_user_movie_preferences(p_user_id INTEGER, p_create BOOLEAN DEFAULT TRUE)
+RETURNS VOID AS $$
+DECLARE
+    user_avg DECIMAL(3,2);
+    user_total INTEGER;
+    user_high_rated INTEGER;
+    user_last_rating TIMESTAMP;
+    user_distribution JSONB;
+    user_genres JSONB;
+BEGIN
+    SELECT 
+        AVG(rating)::DECIMAL(3,2),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE rating >= 4),
+        MAX(updated_at),
+        jsonb_build_object(
+            '1', COUNT(*) FILTER (WHERE rating = 1),
+            '2', COUNT(*) FILTER (WHERE rating = 2),
+            '3', COUNT(*) FILTER (WHERE rating = 3),
+            '4', COUNT(*) FILTER (WHERE rating = 4),
+            '5', COUNT(*) FILTER (WHERE rating = 5)
+        )
+    INTO user_avg, user_total, user_high_rated, user_last_rating, user_distribution
+    FROM ratings
+    WHERE user_id = p_user_id;
+
+    -- Genres des films notés 4-5 : {"Action": 15, "Drama": 10, ...}
+    SELECT jsonb_object_agg(genre_name, genre_count)
+    INTO user_genres
+    FROM (
+        SELECT g.name AS genre_name, COUNT(*) AS genre_count
+        FROM ratings r
+        JOIN movie_genres mg ON mg.movie_id = r.movie_id
+        JOIN genres g ON g.id = mg.genre_id
+        WHERE r.user_id = p_user_id AND r.rating >= 4
+        GROUP BY g.name
+    ) AS genre_counts;
+
+    IF p_create THEN
+        INSERT INTO user_movie_preferences (
+            user_id, 
+            favorite_genres,
+            average_rating, 
+            total_ratings, 
+            highly_rated_count,
+            rating_distribution,
+            last_rating_date,
+            last_updated
+        )
+        VALUES (
+            p_user_id, 
+            user_genres,
+            user_avg, 
+            user_total, 
+            user_high_rated,
+            user_distribution,
+            user_last_rating,
+            CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (user_id) 
+        DO UPDATE SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE user_movie_preferences SET
+            favorite_genres = user_genres,
+            average_rating = user_avg,
+            total_ratings = user_total,
+            highly_rated_count = user_high_rated,
+            rating_distribution = user_distribution,
+            last_rating_date = user_last_rating,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = p_user_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger pour mettre à jour les préférences utilisateur après une note
+CREATE OR REPLACE FUNCTION update_user_preferences_on_rating()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Suppression : mise à jour seule (la ligne de préférences peut
+    -- disparaître avec l'utilisateur dans la même cascade)
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_user_movie_preferences(OLD.user_id, FALSE);
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.user_id <> NEW.user_id THEN
+        PERFORM refresh_user_movie_preferences(OLD.user_id, FALSE);
+    END IF;
+
+    PERFORM refresh_user_movie_preferences(NEW.user_id);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_preferences_after_rating
+    AFTER INSERT OR UPDATE OR DELETE ON ratings
+    FOR EACH ROW
+    EXECUTE FUNCTION update_user_preferences_on_rating();
+
+-- Remplissage pour les utilisateurs existants
+SELECT refresh_user_movie_preferences(user_id)
+FROM (SELECT DISTINCT user_id FROM ratings) AS rated_users;
@@ -0,0 +1,4 @@
+-- Migration : pagination par curseur de GET /ratings
+-- Parcours (updated_at DESC, id DESC) des notes d'un utilisateur sans OFFSET
+
+CREATE INDEX IF NOT EXISTS idx_ratings_user_updated ON ratings(user_id, updated_at, id);
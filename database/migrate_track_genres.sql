@@ -0,0 +1,21 @@
+-- Migration : tracks.genres et artist_genres.genres passent de JSONB à TEXT[]
+-- (recherche par chevauchement de genres via un index GIN)
+
+-- Conversion JSONB -> TEXT[] (une sous-requête n'est pas autorisée dans USING)
+CREATE OR REPLACE FUNCTION jsonb_to_text_array(value JSONB)
+RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(element), '{}')
+    FROM jsonb_array_elements_text(COALESCE(value, '[]')) AS element
+$$ LANGUAGE SQL IMMUTABLE;
+
+ALTER TABLE tracks ALTER COLUMN genres DROP DEFAULT;
+ALTER TABLE tracks ALTER COLUMN genres TYPE TEXT[] USING jsonb_to_text_array(genres);
+ALTER TABLE tracks ALTER COLUMN genres SET DEFAULT '{}';
+
+ALTER TABLE artist_genres ALTER COLUMN genres DROP DEFAULT;
+ALTER TABLE artist_genres ALTER COLUMN genres TYPE TEXT[] USING jsonb_to_text_array(genres);
+ALTER TABLE artist_genres ALTER COLUMN genres SET DEFAULT '{}';
+
+DROP FUNCTION jsonb_to_text_array(JSONB);
+
+CREATE INDEX IF NOT EXISTS idx_tracks_genres ON tracks USING GIN(genres);